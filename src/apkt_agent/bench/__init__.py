@@ -0,0 +1,26 @@
+"""Offline benchmarks for the SE004 parsers, writers and download path.
+
+Parsers/writers: python -m apkt_agent.bench --sizes small,medium
+Download path (mock APKT-SS + Playwright): python -m apkt_agent.bench.download --workers 1,2,4
+Import time: python -m apkt_agent.bench.imports
+"""
+
+from .mock_server import MockApktServer, MockSettings
+from .runner import SIZES, BenchResult, run_benchmarks, format_results
+from .synthetic import (
+    generate_kumulatif_workbooks,
+    generate_detail_gangguan_workbooks,
+    generate_koreksi_cleansing_workbooks,
+)
+
+__all__ = [
+    "MockApktServer",
+    "MockSettings",
+    "SIZES",
+    "BenchResult",
+    "run_benchmarks",
+    "format_results",
+    "generate_kumulatif_workbooks",
+    "generate_detail_gangguan_workbooks",
+    "generate_koreksi_cleansing_workbooks",
+]
@@ -0,0 +1,67 @@
+"""Command line entry point: python -m apkt_agent.bench."""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from ..logging_ import setup_logger
+from .runner import SIZES, check_streaming_output, format_results, run_benchmarks
+
+
+def main() -> int:
+    """Run the parser benchmarks and report regressions.
+    
+    Returns:
+        Exit code (1 if --fail-on-regression and a regression was found,
+        or if --check-output found a mismatch)
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m apkt_agent.bench",
+        description="Benchmark SE004 parsers and writers on synthetic workbooks.",
+    )
+    arg_parser.add_argument("--sizes", default="small", help=f"Comma separated size presets ({', '.join(SIZES)})")
+    arg_parser.add_argument("--cases", default="", help="Comma separated case names (default: all)")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per case")
+    arg_parser.add_argument("--threshold", type=float, default=0.2, help="Regression threshold (0.2 = 20%%)")
+    arg_parser.add_argument("--seed", type=int, default=0, help="Random seed for synthetic workbooks")
+    arg_parser.add_argument("--output-dir", default="./workspace/bench", help="Bench data and history directory")
+    arg_parser.add_argument("--no-record", action="store_true", help="Do not append results to history.jsonl")
+    arg_parser.add_argument("--fail-on-regression", action="store_true", help="Exit with code 1 on regression")
+    arg_parser.add_argument(
+        "--check-output", action="store_true",
+        help="Only check that streamed and concatenated CSVs are identical (mixed int/blank columns)",
+    )
+    args = arg_parser.parse_args()
+    
+    # Parsers log every file at INFO; keep the benchmark output readable
+    setup_logger(level=logging.WARNING)
+    
+    if args.check_output:
+        checks = check_streaming_output(Path(args.output_dir), seed=args.seed)
+        for dataset, identical in checks.items():
+            print(f"{dataset:20s} {'identical' if identical else 'MISMATCH'}")
+        return 0 if all(checks.values()) else 1
+    
+    results = run_benchmarks(
+        output_dir=Path(args.output_dir),
+        sizes=[s.strip() for s in args.sizes.split(",") if s.strip()],
+        cases=[c.strip() for c in args.cases.split(",") if c.strip()] or None,
+        repeat=args.repeat,
+        threshold=args.threshold,
+        seed=args.seed,
+        record=not args.no_record,
+    )
+    
+    print(format_results(results))
+    
+    regressions = [r for r in results if r.regression]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {Path(args.output_dir) / 'history.jsonl'}")
+        return 1 if args.fail_on_regression else 0
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Download-path load test against the local mock APKT-SS server.
+
+Drives the real filter setters and download_excel of each runner against
+MockApktServer, splitting the units over N browser workers, so waits,
+retries and concurrency can be tuned without touching production:
+
+    python -m apkt_agent.bench.download --dataset se004_kumulatif --workers 1,2,4 --latency 2
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..errors import NoDataFoundError
+from ..logging_ import get_logger
+from ..workspace import RunContext
+from .mock_server import MockApktServer, MockSettings
+
+
+@dataclass
+class DownloadBenchResult:
+    """Outcome of one load test run."""
+    
+    dataset: str
+    workers: int
+    units: int
+    wall_s: float
+    downloads: int = 0
+    no_data: int = 0
+    failed: int = 0
+    download_s: List[float] = field(default_factory=list)
+    server: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def throughput_per_min(self) -> float:
+        """Completed exports (downloads + no-data) per minute."""
+        return 60.0 * (self.downloads + self.no_data) / self.wall_s if self.wall_s else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (per-download timings summarised)."""
+        data = asdict(self)
+        timings = data.pop("download_s")
+        data["throughput_per_min"] = round(self.throughput_per_min, 2)
+        data["download_median_s"] = round(statistics.median(timings), 3) if timings else None
+        data["download_max_s"] = round(max(timings), 3) if timings else None
+        return data
+
+
+def _filter_steps(dataset: str) -> Tuple[Callable[[Any, str, str, str], None], Callable[[Any], None]]:
+    """Return (apply_filters, click_export) as the generic runner drives the dataset's page.
+    
+    Like the runner, apply_filters only sets filters whose selection changed
+    since the previous call (call _filter_steps once per browser page).
+    """
+    from ..datasets.runner import apply_filters, click_export_excel
+    from ..datasets.se004.descriptors import get_descriptor
+    
+    descriptor = get_descriptor(dataset)
+    if descriptor is None:
+        raise ValueError(f"Unknown dataset: {dataset}")
+    # Other dimensions (kelompok, status) stay on their first value
+    fixed = {dim: values[0] for dim, values in descriptor.dimension_values.items()}
+    selected: Dict[str, str] = {}
+    
+    def apply(page, unit_text, month_name, year):
+        labels = {"month": month_name, "year": year, "unit": unit_text, **fixed}
+        apply_filters(page, descriptor, labels, selected)
+    
+    return apply, click_export_excel
+
+
+def _bench_context(output_dir: Path, dataset: str, period_ym: str, worker: int) -> RunContext:
+    """Minimal RunContext whose excel/logs dirs live under the bench output dir."""
+    run_dir = Path(output_dir) / f"{dataset}_w{worker}"
+    excel_dir = run_dir / "raw" / "excel"
+    logs_dir = run_dir / "logs"
+    excel_dir.mkdir(parents=True, exist_ok=True)
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    return RunContext(
+        run_id=f"bench_w{worker}",
+        dataset=dataset,
+        period_ym=period_ym,
+        snapshot_date=time.strftime("%Y%m%d"),
+        run_dir=run_dir,
+        raw_dir=run_dir / "raw",
+        excel_dir=excel_dir,
+        parsed_dir=run_dir / "parsed",
+        logs_dir=logs_dir,
+        manifest_path=run_dir / "manifest.json",
+    )
+
+
+def _run_worker(
+    worker: int,
+    page_url: str,
+    dataset: str,
+    units: List[str],
+    month_name: str,
+    year: str,
+    period_ym: str,
+    output_dir: Path,
+    headless: bool,
+    result: DownloadBenchResult,
+    lock: threading.Lock,
+) -> None:
+    """Download `units` sequentially in one browser, like a runner does."""
+    from playwright.sync_api import sync_playwright
+    
+    from ..browser.download import download_excel
+    
+    logger = get_logger()
+    apply_filters, click_export = _filter_steps(dataset)
+    ctx = _bench_context(output_dir, dataset, period_ym, worker)
+    
+    # Each thread owns its Playwright instance (the sync API is not thread-safe)
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless)
+        page = browser.new_context(accept_downloads=True).new_page()
+        page.goto(page_url)
+        page.wait_for_load_state("networkidle")
+        
+        for i, unit_text in enumerate(units):
+            start = time.perf_counter()
+            outcome = "downloads"
+            try:
+                apply_filters(page, unit_text, month_name, year)
+                download_excel(
+                    page=page,
+                    ctx=ctx,
+                    click_export_fn=lambda: click_export(page),
+                    target_filename=f"{dataset}_{period_ym}_w{worker}_{i}.xlsx",
+                    max_attempts=3,
+                )
+            except NoDataFoundError:
+                outcome = "no_data"
+            except Exception as e:
+                logger.warning(f"Worker {worker}: {unit_text} failed: {e}")
+                outcome = "failed"
+            elapsed = time.perf_counter() - start
+            
+            with lock:
+                setattr(result, outcome, getattr(result, outcome) + 1)
+                result.download_s.append(elapsed)
+        
+        browser.close()
+
+
+def run_download_benchmark(
+    dataset: str = "se004_kumulatif",
+    workers: int = 1,
+    unit_count: Optional[int] = None,
+    period_ym: str = "202501",
+    settings: Optional[MockSettings] = None,
+    output_dir: Path = Path("./workspace/bench/downloads"),
+    headless: bool = True,
+) -> DownloadBenchResult:
+    """Run one load test: start the mock server and download every unit.
+    
+    Args:
+        dataset: Dataset page to drive (key of mock_server.PAGE_PATHS)
+        workers: Number of parallel browsers
+        unit_count: Number of units to download (default: all units in the select)
+        period_ym: Period in YYYYMM
+        settings: Mock server behaviour
+        output_dir: Directory for downloaded files
+        headless: Run browsers headless
+    
+    Returns:
+        DownloadBenchResult
+    """
+    from ..datasets.se004.schema import BULAN_INDONESIA_REVERSE
+    
+    month_name, year = BULAN_INDONESIA_REVERSE[period_ym[4:]], period_ym[:4]
+    lock = threading.Lock()
+    
+    with MockApktServer(settings) as server:
+        units = server.options["unitInduk"][:unit_count] if unit_count else server.options["unitInduk"]
+        result = DownloadBenchResult(dataset=dataset, workers=workers, units=len(units), wall_s=0.0)
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    _run_worker, worker, server.url(dataset), dataset, units[worker::workers],
+                    month_name, year, period_ym, Path(output_dir), headless, result, lock,
+                )
+                for worker in range(workers)
+                if units[worker::workers]
+            ]
+            for future in futures:
+                future.result()
+        result.wall_s = round(time.perf_counter() - start, 3)
+        result.server = dict(server.stats.__dict__)
+    
+    return result
+
+
+def main() -> None:
+    """Run the download load test for one or more worker counts."""
+    import logging
+    
+    from ..logging_ import setup_logger
+    
+    arg_parser = argparse.ArgumentParser(description="Download-path load test against the mock APKT-SS server.")
+    arg_parser.add_argument("--dataset", default="se004_kumulatif")
+    arg_parser.add_argument("--workers", default="1", help="Comma separated worker counts, e.g. 1,2,4")
+    arg_parser.add_argument("--units", type=int, default=None, help="Number of units (default: all)")
+    arg_parser.add_argument("--period", default="202501", help="Period YYYYMM")
+    arg_parser.add_argument("--latency", type=float, default=1.0)
+    arg_parser.add_argument("--jitter", type=float, default=0.0)
+    arg_parser.add_argument("--no-data-rate", type=float, default=0.0)
+    arg_parser.add_argument("--error-rate", type=float, default=0.0)
+    arg_parser.add_argument("--rows", type=int, default=200)
+    arg_parser.add_argument("--output-dir", default="./workspace/bench/downloads")
+    arg_parser.add_argument("--headed", action="store_true", help="Show the browsers")
+    args = arg_parser.parse_args()
+    
+    setup_logger(level=logging.WARNING)
+    settings = MockSettings(
+        latency_s=args.latency,
+        jitter_s=args.jitter,
+        no_data_rate=args.no_data_rate,
+        error_rate=args.error_rate,
+        rows=args.rows,
+    )
+    
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        result = run_download_benchmark(
+            dataset=args.dataset,
+            workers=workers,
+            unit_count=args.units,
+            period_ym=args.period,
+            settings=settings,
+            output_dir=Path(args.output_dir),
+            headless=not args.headed,
+        )
+        print(json.dumps(result.to_dict(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
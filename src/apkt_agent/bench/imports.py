@@ -0,0 +1,202 @@
+"""Import-time benchmark for the CLI and the main entry modules.
+
+Each target is imported in a fresh interpreter with -X importtime; the
+result records the import time and which heavy dependencies were pulled in.
+Results go to the same history.jsonl as the parser benchmarks (case
+"import_<target>"), so startup regressions are flagged the same way:
+
+    python -m apkt_agent.bench.imports --repeat 5
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from ..logging_ import get_logger
+from .runner import BenchResult, check_regression, load_history, _environment
+
+
+# Target name -> Python statement executed in a fresh interpreter
+TARGETS: Dict[str, str] = {
+    "package": "import apkt_agent",
+    "cli": "import apkt_agent.cli",
+    "cli_help": "import sys; sys.argv = ['apkt-agent', '--help']; import apkt_agent.cli as c; c.parse_args()",
+    "registry": "import apkt_agent.datasets.registry",
+    "parser": "import apkt_agent.datasets.se004.parser",
+    "sheets": "import apkt_agent.sinks.sheets",
+}
+
+# Dependencies that must not be imported by targets that do not use them
+HEAVY_MODULES = ("playwright", "pandas", "numpy", "openpyxl", "gspread", "google.auth", "requests")
+
+# Targets expected to stay free of all HEAVY_MODULES
+LIGHT_TARGETS = ("package", "cli", "cli_help", "registry")
+
+# "import time: <self us> | <cumulative us> | <indented module>"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+\d+\s+\|\s*(\S+)")
+
+
+def _src_path() -> str:
+    """Directory containing the apkt_agent package (for PYTHONPATH)."""
+    return str(Path(__file__).resolve().parents[2])
+
+
+def import_profile(statement: str) -> Tuple[float, Set[str], List[Tuple[str, float]]]:
+    """Run `statement` in a fresh interpreter under -X importtime.
+    
+    Args:
+        statement: Python code to execute (typically an import)
+    
+    Returns:
+        Tuple of (wall time in seconds, imported module names,
+        (module, self seconds) of every import)
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [_src_path(), env.get("PYTHONPATH")]))
+    
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True, text=True, env=env, timeout=120,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit code {proc.returncode}"
+        raise RuntimeError(f"'{statement}' failed: {error}")
+    
+    modules = set()
+    self_times = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            modules.add(match.group(2))
+            self_times.append((match.group(2), int(match.group(1)) / 1e6))
+    return wall, modules, self_times
+
+
+def heavy_imports(modules: Set[str]) -> List[str]:
+    """HEAVY_MODULES present in a set of imported module names."""
+    return [heavy for heavy in HEAVY_MODULES if heavy in modules]
+
+
+def run_import_benchmarks(
+    targets: Optional[List[str]] = None,
+    repeat: int = 5,
+    threshold: float = 0.2,
+    history_path: Optional[Path] = None,
+) -> List[BenchResult]:
+    """Measure import time of each target.
+    
+    Args:
+        targets: Keys of TARGETS (default: all)
+        repeat: Fresh interpreters per target
+        threshold: Regression threshold (relative)
+        history_path: history.jsonl to compare with (and append to), None = no history
+    
+    Returns:
+        List of BenchResult (case "import_<target>", rows = number of modules imported).
+        Heavy dependencies loaded by the target are listed in environment["heavy"].
+    """
+    history = load_history(history_path) if history_path else []
+    environment = _environment()
+    results = []
+    
+    for target in targets or list(TARGETS):
+        if target not in TARGETS:
+            raise ValueError(f"Unknown target '{target}'. Expected one of {list(TARGETS)}")
+        
+        timings = []
+        modules: Set[str] = set()
+        try:
+            for _ in range(repeat):
+                wall, modules, _ = import_profile(TARGETS[target])
+                timings.append(wall)
+        except RuntimeError as e:
+            # e.g. gspread not installed for the sheets target
+            get_logger().warning(f"Skipping import_{target}: {e}")
+            continue
+        
+        result = BenchResult(
+            case=f"import_{target}",
+            size="-",
+            rows=len(modules),
+            repeat=repeat,
+            min_s=round(min(timings), 4),
+            median_s=round(statistics.median(timings), 4),
+            peak_mb=0.0,
+            environment={**environment, "heavy": ",".join(heavy_imports(modules))},
+        )
+        result.regression = check_regression(result, history, threshold)
+        results.append(result)
+    
+    if history_path and results:
+        history_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(history_path, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+    
+    return results
+
+
+def main() -> int:
+    """Run the import-time benchmark.
+    
+    Returns:
+        Exit code (1 if a light target imports a heavy dependency, or on
+        regression with --fail-on-regression)
+    """
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m apkt_agent.bench.imports",
+        description="Measure import time of the CLI and entry modules in fresh interpreters.",
+    )
+    arg_parser.add_argument("--targets", default="", help=f"Comma separated targets ({', '.join(TARGETS)})")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target")
+    arg_parser.add_argument("--threshold", type=float, default=0.2, help="Regression threshold (0.2 = 20%%)")
+    arg_parser.add_argument("--output-dir", default="./workspace/bench", help="Directory of history.jsonl")
+    arg_parser.add_argument("--no-record", action="store_true", help="Do not append results to history.jsonl")
+    arg_parser.add_argument("--fail-on-regression", action="store_true", help="Exit with code 1 on regression")
+    arg_parser.add_argument("--top", type=int, default=0, help="Show the N modules with the highest self import time")
+    args = arg_parser.parse_args()
+    
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()] or None
+    history_path = None if args.no_record else Path(args.output_dir) / "history.jsonl"
+    results = run_import_benchmarks(targets, repeat=args.repeat, threshold=args.threshold, history_path=history_path)
+    
+    header = f"{'target':22s} {'min s':>8s} {'median s':>9s} {'modules':>8s}  heavy / note"
+    print(header)
+    print("-" * len(header))
+    violations = []
+    for r in results:
+        target = r.case[len("import_"):]
+        heavy = r.environment.get("heavy", "")
+        note = heavy or "-"
+        if heavy and target in LIGHT_TARGETS:
+            violations.append(target)
+            note += "  (should be lazy)"
+        if r.regression:
+            note += "  REGRESSION " + ", ".join(f"{k} x{v['ratio']}" for k, v in r.regression.items())
+        print(f"{target:22s} {r.min_s:8.3f} {r.median_s:9.3f} {r.rows:8d}  {note}")
+        
+        if args.top:
+            _, _, self_times = import_profile(TARGETS[target])
+            for module, seconds in sorted(self_times, key=lambda item: -item[1])[:args.top]:
+                print(f"    {seconds * 1000:8.1f} ms  {module}")
+    
+    if violations:
+        print(f"\nHeavy dependencies imported by: {', '.join(violations)}")
+        return 1
+    if args.fail_on_regression and any(r.regression for r in results):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
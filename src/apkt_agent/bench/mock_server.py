@@ -0,0 +1,536 @@
+"""Local stand-in for the APKT-SS report pages.
+
+Serves simplified versions of the Saidi Saifi report pages with the same
+selectors the runners use (select#unitInduk, vc-component-* period selects,
+Eksport -> Excel menu, SweetAlert2 "Data tidak ditemukan" popup) and returns
+synthetic Excel exports after a configurable latency. Select options are read
+from the saved pages in sandbox/menu 3 and sandbox/menu 4 when available.
+
+Only the standard library is used on the server side, so it can run next to
+a Playwright load test:
+
+    python -m apkt_agent.bench.mock_server --port 8765 --latency 2 --no-data-rate 0.1
+"""
+
+import argparse
+import html
+import json
+import random
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+from urllib.parse import parse_qs, urlparse
+
+from ..logging_ import get_logger
+from . import synthetic
+
+
+SANDBOX_DIR = Path(__file__).resolve().parents[3] / "sandbox"
+
+MONTHS = [
+    "Januari", "Februari", "Maret", "April", "Mei", "Juni",
+    "Juli", "Agustus", "September", "Oktober", "November", "Desember",
+]
+
+DEFAULT_UNITS = [
+    "11 - WILAYAH ACEH",
+    "12 - WILAYAH SUMATERA UTARA",
+    "13 - WILAYAH SUMATERA BARAT",
+    "14 - WILAYAH SUMATERA SELATAN, JAMBI & BENGKULU (S2JB)",
+    "16 - WILAYAH BANGKA BELITUNG",
+    "17 - DISTRIBUSI LAMPUNG",
+    "18 - WILAYAH RIAU DAN KEPULAUAN RIAU",
+    "21 - WILAYAH KALIMANTAN BARAT",
+    "22 - WILAYAH KALIMANTAN SELATAN DAN TENGAH",
+    "23 - WILAYAH KALIMANTAN TIMUR",
+]
+
+DEFAULT_KELOMPOK = ["DISTRIBUSI", "TRANSMISI", "PEMBANGKIT"]
+
+DEFAULT_STATUS = [
+    "Semua Data",
+    "Belum Setuju Approval Ke-1",
+    "Belum Setuju Approval Ke-2",
+    "Setuju Approval Ke-1",
+    "Setuju Approval Ke-2",
+    "Tidak Setuju",
+]
+
+# Dataset -> page path (same paths as production APKT-SS)
+PAGE_PATHS = {
+    "se004_kumulatif": "/home/laporan-saidi-saifi-kumulatif-se004",
+    "se004_bulanan": "/home/laporan-saidi-saifi-se004",
+    "se004_detail_gangguan": "/home/laporan-detil-kode-gangguan-se004",
+    "koreksi_cleansing": "/home/laporan-koreksi-dan-cleansing",
+}
+
+PAGE_TITLES = {
+    "se004_kumulatif": "Laporan Saidi Saifi Kumulatif SE004",
+    "se004_bulanan": "Laporan Saidi Saifi SE004",
+    "se004_detail_gangguan": "Laporan Detail Kode Gangguan SE004",
+    "koreksi_cleansing": "Laporan Koreksi dan Cleansing",
+}
+
+
+class _SelectOptionParser(HTMLParser):
+    """Collects option labels of every <select id=...> in a saved page."""
+    
+    def __init__(self):
+        super().__init__()
+        self.options: Dict[str, List[str]] = {}
+        self._select: Optional[str] = None
+        self._in_option = False
+        self._text = ""
+    
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "select":
+            self._select = attrs.get("id") or attrs.get("name")
+            self.options.setdefault(self._select, [])
+        elif tag == "option" and self._select and "disabled" not in attrs:
+            self._in_option = True
+            self._text = ""
+    
+    def handle_data(self, data):
+        if self._in_option:
+            self._text += data
+    
+    def handle_endtag(self, tag):
+        if tag == "option" and self._in_option:
+            self._in_option = False
+            text = self._text.strip()
+            if text:
+                self.options[self._select].append(text)
+        elif tag == "select":
+            self._select = None
+
+
+def extract_select_options(html_path: Path) -> Dict[str, List[str]]:
+    """Read select options from a saved APKT page.
+    
+    Args:
+        html_path: Path to a saved "APKT Saidi Saifi.html"
+    
+    Returns:
+        Dict of select id -> option labels (placeholder options excluded)
+    """
+    parser = _SelectOptionParser()
+    parser.feed(Path(html_path).read_text(encoding="utf-8", errors="replace"))
+    return {key: values for key, values in parser.options.items() if values}
+
+
+def load_sandbox_options(sandbox_dir: Path = SANDBOX_DIR) -> Dict[str, List[str]]:
+    """Unit, kelompok, month, year and status options from the sandbox pages.
+    
+    Falls back to built-in defaults when the sandbox pages are not available.
+    """
+    options = {
+        "unitInduk": list(DEFAULT_UNITS),
+        "kelompok": list(DEFAULT_KELOMPOK),
+        "month": list(MONTHS),
+        "year": [str(y) for y in range(2026, 2017, -1)],
+        "status": list(DEFAULT_STATUS),
+    }
+    
+    menu3 = Path(sandbox_dir) / "menu 3" / "APKT Saidi Saifi.html"
+    menu4 = Path(sandbox_dir) / "menu 4" / "APKT Saidi Saifi.html"
+    
+    if menu4.exists():
+        found = extract_select_options(menu4)
+        options["unitInduk"] = found.get("unitInduk", options["unitInduk"])
+        options["month"] = found.get("vc-component-4", options["month"])
+        options["year"] = found.get("vc-component-6", options["year"])
+        options["status"] = found.get("vc-component-8", options["status"])
+    if menu3.exists():
+        found = extract_select_options(menu3)
+        options["kelompok"] = found.get("kelompok", options["kelompok"])
+    
+    return options
+
+
+@dataclass
+class MockSettings:
+    """Behaviour of the mock server."""
+    
+    latency_s: float = 1.0
+    jitter_s: float = 0.0
+    no_data_rate: float = 0.0
+    no_data_units: Set[str] = field(default_factory=set)
+    error_rate: float = 0.0
+    rows: int = 200
+    seed: int = 0
+
+
+@dataclass
+class MockStats:
+    """Counters exposed at /stats."""
+    
+    page_views: int = 0
+    exports: int = 0
+    no_data: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    export_seconds: float = 0.0
+
+
+def _select_html(name: str, options: List[str], multiple: bool = False, hidden_id: bool = True) -> str:
+    """Render a select with a disabled placeholder, like the rich-select markup."""
+    id_attr = f' id="{name}"' if hidden_id else ""
+    multiple_attr = " multiple" if multiple else ""
+    items = "".join(f"<option>{html.escape(opt)}</option>" for opt in options)
+    return (
+        f'<select{id_attr} name="{name}"{multiple_attr}>'
+        f'<option disabled selected value="">Select an option</option>{items}</select>'
+    )
+
+
+def _page_filters(dataset: str, options: Dict[str, List[str]]) -> str:
+    """Filter form of one report page."""
+    units = options["unitInduk"]
+    months = options["month"]
+    years = options["year"]
+    
+    if dataset == "se004_detail_gangguan":
+        # Menu 3: multi-select unit, kelompok, period on vc-component-9/11
+        return (
+            f'<label for="unitInduk">Unit Induk</label>{_select_html("unitInduk", units, multiple=True)}'
+            f'<label for="kelompok">Kelompok</label>{_select_html("kelompok", options["kelompok"])}'
+            f'<h3>Periode</h3>{_select_html("vc-component-9", months)}{_select_html("vc-component-11", years)}'
+        )
+    
+    if dataset == "koreksi_cleansing":
+        # Menu 4: unit is picked from a rich-select button list
+        unit_buttons = "".join(
+            f'<button type="button" role="option" data-value="{html.escape(u)}">{html.escape(u)}</button>'
+            for u in units
+        )
+        return (
+            '<label for="unitInduk">Wilayah/Distribusi</label>'
+            '<div><button type="button" id="unit-trigger" aria-expanded="false">Pilih Unit Induk</button></div>'
+            f'<div id="unit-options" role="listbox" hidden>{unit_buttons}</div>'
+            '<input type="hidden" id="unitInduk" name="unitInduk" value="">'
+            f'<label for="periode">Periode</label>{_select_html("vc-component-4", months)}{_select_html("vc-component-6", years)}'
+            f'<label for="status">Status</label>{_select_html("vc-component-8", options["status"])}'
+        )
+    
+    # Kumulatif / bulanan
+    return (
+        f'<label for="unitInduk">Unit Induk</label>{_select_html("unitInduk", units)}'
+        f'<h3>Periode</h3>{_select_html("vc-component-4", months)}{_select_html("vc-component-6", years)}'
+    )
+
+
+_PAGE_SCRIPT = """
+const DATASET = %s;
+function value(sel) {
+  const el = document.querySelector(sel);
+  if (!el) return '';
+  if (el.tagName === 'SELECT') {
+    return Array.from(el.selectedOptions).filter(o => !o.disabled).map(o => o.text).join('|');
+  }
+  return el.value || '';
+}
+function showPopup(title, icon) {
+  const container = document.createElement('div');
+  container.className = 'swal2-container';
+  container.innerHTML = '<div class="swal2-popup swal2-icon-' + icon + '" role="dialog">' +
+    '<h2 class="swal2-title">' + title + '</h2>' +
+    '<div class="swal2-actions"><button type="button" class="swal2-confirm">Ok</button></div></div>';
+  container.querySelector('.swal2-confirm').onclick = () => container.remove();
+  document.body.appendChild(container);
+}
+async function exportExcel() {
+  document.getElementById('export-menu').hidden = true;
+  const params = new URLSearchParams({
+    unit: value('#unitInduk'),
+    kelompok: value('#kelompok'),
+    month: value("select[name='vc-component-4']") || value("select[name='vc-component-9']"),
+    year: value("select[name='vc-component-6']") || value("select[name='vc-component-11']"),
+    status: value("select[name='vc-component-8']"),
+  });
+  const response = await fetch('/export/' + DATASET + '?' + params.toString());
+  if (response.status === 404) { showPopup('Data tidak ditemukan', 'warning'); return; }
+  if (!response.ok) { showPopup('Terjadi kesalahan pada server', 'error'); return; }
+  const blob = await response.blob();
+  const link = document.createElement('a');
+  link.href = URL.createObjectURL(blob);
+  link.download = response.headers.get('X-Filename') || 'export.xlsx';
+  document.body.appendChild(link);
+  link.click();
+  link.remove();
+}
+document.getElementById('headlessui-menu-button-v-2').onclick = () => {
+  const menu = document.getElementById('export-menu');
+  menu.hidden = !menu.hidden;
+};
+document.getElementById('export-excel').onclick = exportExcel;
+const trigger = document.getElementById('unit-trigger');
+if (trigger) {
+  trigger.onclick = () => { document.getElementById('unit-options').hidden = false; };
+  document.querySelectorAll("#unit-options button[role='option']").forEach(btn => {
+    btn.onclick = () => {
+      document.getElementById('unitInduk').value = btn.dataset.value;
+      trigger.textContent = btn.dataset.value;
+      document.getElementById('unit-options').hidden = true;
+    };
+  });
+}
+"""
+
+
+def render_page(dataset: str, options: Dict[str, List[str]]) -> str:
+    """Render the HTML of one report page."""
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>APKT Saidi Saifi</title></head><body>"
+        f"<h1>{PAGE_TITLES[dataset]}</h1>"
+        f"<form onsubmit='return false'>{_page_filters(dataset, options)}</form>"
+        '<div><button type="button" id="headlessui-menu-button-v-2" aria-haspopup="menu">Eksport</button>'
+        '<div id="export-menu" role="menu" hidden>'
+        '<button type="button" role="menuitem" id="export-excel">Excel</button>'
+        '<button type="button" role="menuitem">PDF</button></div></div>'
+        f"<script>{_PAGE_SCRIPT % json.dumps(dataset)}</script>"
+        "</body></html>"
+    )
+
+
+def render_home() -> str:
+    """Landing page with the APKT-SS tile and links to the report pages."""
+    links = "".join(
+        f'<li><a href="{path}">{PAGE_TITLES[dataset]}</a></li>' for dataset, path in PAGE_PATHS.items()
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>APKT-SS</title></head><body>"
+        f'<a href="/home"><p>APKT-SS</p></a><ul>{links}</ul></body></html>'
+    )
+
+
+class MockApktServer:
+    """Threaded HTTP server emulating the APKT-SS report pages.
+    
+    Usage:
+        with MockApktServer(MockSettings(latency_s=2.0, no_data_rate=0.1)) as server:
+            page.goto(server.url("se004_kumulatif"))
+    """
+    
+    def __init__(
+        self,
+        settings: Optional[MockSettings] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        sandbox_dir: Path = SANDBOX_DIR,
+    ):
+        """Initialize server (call start() or use as a context manager).
+        
+        Args:
+            settings: Latency, no-data and error behaviour
+            host: Bind address
+            port: Bind port (0 = pick a free port)
+            sandbox_dir: Directory with the saved menu 3 / menu 4 pages
+        """
+        self.logger = get_logger()
+        self.settings = settings or MockSettings()
+        self.options = load_sandbox_options(sandbox_dir)
+        self.stats = MockStats()
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.settings.seed)
+        self._exports = self._build_exports()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def base_url(self) -> str:
+        """Base URL of the running server."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def url(self, dataset: Optional[str] = None) -> str:
+        """URL of a report page (or the home page when dataset is None)."""
+        return self.base_url + (PAGE_PATHS[dataset] if dataset else "/home")
+    
+    def _build_exports(self) -> Dict[str, bytes]:
+        """Generate one synthetic workbook per dataset; every export serves its bytes."""
+        rows = self.settings.rows
+        seed = self.settings.seed
+        generators = {
+            "se004_kumulatif": lambda d: synthetic.generate_kumulatif_workbooks(
+                d, units=1, rows_per_file=min(rows, 450), seed=seed
+            ),
+            "se004_detail_gangguan": lambda d: synthetic.generate_detail_gangguan_workbooks(
+                d, units=1, rows_per_file=rows, seed=seed
+            ),
+            "koreksi_cleansing": lambda d: synthetic.generate_koreksi_cleansing_workbooks(
+                d, units=1, rows_per_file=rows, seed=seed
+            ),
+        }
+        exports = {}
+        with tempfile.TemporaryDirectory() as tmp:
+            for dataset, generate in generators.items():
+                path = generate(Path(tmp) / dataset)[0]
+                exports[dataset] = path.read_bytes()
+        exports["se004_bulanan"] = exports["se004_kumulatif"]
+        return exports
+    
+    def _export(self, dataset: str, params: Dict[str, str]) -> tuple:
+        """Decide the outcome of one export request.
+        
+        Returns:
+            Tuple of (status, body, filename)
+        """
+        settings = self.settings
+        with self._lock:
+            self.stats.exports += 1
+            self.stats.in_flight += 1
+            self.stats.peak_in_flight = max(self.stats.peak_in_flight, self.stats.in_flight)
+            delay = max(0.0, settings.latency_s + self._rng.uniform(-settings.jitter_s, settings.jitter_s))
+            roll = self._rng.random()
+        
+        start = time.perf_counter()
+        try:
+            time.sleep(delay)
+            unit = params.get("unit", "")
+            if not unit or unit in settings.no_data_units or roll < settings.no_data_rate:
+                with self._lock:
+                    self.stats.no_data += 1
+                return 404, json.dumps({"message": "Data tidak ditemukan"}).encode(), None
+            if roll < settings.no_data_rate + settings.error_rate:
+                with self._lock:
+                    self.stats.errors += 1
+                return 500, json.dumps({"message": "Internal Server Error"}).encode(), None
+            
+            filename = f"{PAGE_TITLES[dataset]} {params.get('month', '')} {params.get('year', '')}.xlsx"
+            return 200, self._exports[dataset], filename
+        finally:
+            with self._lock:
+                self.stats.in_flight -= 1
+                self.stats.export_seconds += time.perf_counter() - start
+    
+    def _handler_class(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                server.logger.debug(f"mock {self.address_string()} {format % args}")
+            
+            def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                path = parsed.path.rstrip("/") or "/"
+                
+                if path in ("/", "/home"):
+                    with server._lock:
+                        server.stats.page_views += 1
+                    self._send(200, render_home().encode(), "text/html; charset=utf-8")
+                    return
+                
+                for dataset, page_path in PAGE_PATHS.items():
+                    if path == page_path:
+                        with server._lock:
+                            server.stats.page_views += 1
+                        body = render_page(dataset, server.options).encode()
+                        self._send(200, body, "text/html; charset=utf-8")
+                        return
+                
+                if path.startswith("/export/"):
+                    dataset = path.split("/", 2)[2]
+                    if dataset not in PAGE_PATHS:
+                        self._send(404, b"{}", "application/json")
+                        return
+                    params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                    status, body, filename = server._export(dataset, params)
+                    if filename:
+                        self._send(
+                            status, body,
+                            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            {"X-Filename": filename, "Content-Disposition": f'attachment; filename="{filename}"'},
+                        )
+                    else:
+                        self._send(status, body, "application/json")
+                    return
+                
+                if path == "/stats":
+                    with server._lock:
+                        body = json.dumps(server.stats.__dict__).encode()
+                    self._send(200, body, "application/json")
+                    return
+                
+                self._send(404, b"Not Found", "text/plain")
+        
+        return Handler
+    
+    def start(self) -> "MockApktServer":
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-apktss", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Mock APKT-SS running at {self.base_url}")
+        return self
+    
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def __enter__(self) -> "MockApktServer":
+        return self.start()
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+def main() -> None:
+    """Run the mock server in the foreground."""
+    from ..logging_ import setup_logger
+    
+    arg_parser = argparse.ArgumentParser(description="Local mock of the APKT-SS report pages.")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--latency", type=float, default=1.0, help="Export latency in seconds")
+    arg_parser.add_argument("--jitter", type=float, default=0.0, help="Uniform latency jitter in seconds")
+    arg_parser.add_argument("--no-data-rate", type=float, default=0.0, help="Share of exports answered with 'Data tidak ditemukan'")
+    arg_parser.add_argument("--no-data-unit", action="append", default=[], help="Unit label that never has data (repeatable)")
+    arg_parser.add_argument("--error-rate", type=float, default=0.0, help="Share of exports answered with HTTP 500")
+    arg_parser.add_argument("--rows", type=int, default=200, help="Rows per generated workbook")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+    
+    setup_logger()
+    settings = MockSettings(
+        latency_s=args.latency,
+        jitter_s=args.jitter,
+        no_data_rate=args.no_data_rate,
+        no_data_units=set(args.no_data_unit),
+        error_rate=args.error_rate,
+        rows=args.rows,
+        seed=args.seed,
+    )
+    server = MockApktServer(settings, host=args.host, port=args.port).start()
+    for dataset in PAGE_PATHS:
+        print(f"{dataset:24s} {server.url(dataset)}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Offline parser/writer benchmark runner with regression history.
+
+Each case times a parser or writer on synthetic workbooks (see synthetic.py)
+and measures its peak traced memory. Results are appended to a JSONL history
+file, and every new result is compared with the median of the previous runs
+of the same case and size.
+"""
+
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ..logging_ import get_logger
+from . import synthetic
+
+
+# Workbook sizes per preset: units (files) and rows per file for each dataset
+SIZES: Dict[str, Dict[str, int]] = {
+    "small": {"units": 2, "kumulatif_rows": 40, "detail_rows": 500, "koreksi_rows": 200},
+    "medium": {"units": 11, "kumulatif_rows": 150, "detail_rows": 2000, "koreksi_rows": 1000},
+    "large": {"units": 11, "kumulatif_rows": 450, "detail_rows": 10000, "koreksi_rows": 5000},
+}
+
+# Number of previous runs used as the regression baseline
+BASELINE_RUNS = 5
+
+
+@dataclass
+class BenchResult:
+    """Result of one benchmark case at one size."""
+    
+    case: str
+    size: str
+    rows: int
+    repeat: int
+    min_s: float
+    median_s: float
+    peak_mb: float
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    environment: Dict[str, str] = field(default_factory=dict)
+    regression: Optional[Dict[str, Any]] = None
+
+
+def _environment() -> Dict[str, str]:
+    """Versions and git revision recorded with each result."""
+    import openpyxl
+    import pandas as pd
+    
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "openpyxl": openpyxl.__version__,
+        "machine": platform.node(),
+    }
+
+
+def prepare_data(data_root: Path, size: str, seed: int = 0) -> Dict[str, Path]:
+    """Generate (or reuse) synthetic workbooks for a size preset.
+    
+    Args:
+        data_root: Directory holding generated data sets
+        size: Key of SIZES
+        seed: Random seed
+    
+    Returns:
+        Dict of dataset name -> directory of workbooks
+    """
+    spec = SIZES[size]
+    base = Path(data_root) / f"{size}_seed{seed}"
+    generators = {
+        "kumulatif": lambda d: synthetic.generate_kumulatif_workbooks(
+            d, units=spec["units"], rows_per_file=spec["kumulatif_rows"], seed=seed
+        ),
+        "detail_gangguan": lambda d: synthetic.generate_detail_gangguan_workbooks(
+            d, units=spec["units"], rows_per_file=spec["detail_rows"], seed=seed
+        ),
+        "koreksi_cleansing": lambda d: synthetic.generate_koreksi_cleansing_workbooks(
+            d, units=spec["units"], rows_per_file=spec["koreksi_rows"], seed=seed
+        ),
+    }
+    
+    dirs = {}
+    for dataset, generate in generators.items():
+        directory = base / dataset
+        marker = directory / ".complete"
+        if not marker.exists():
+            get_logger().info(f"Generating synthetic {dataset} workbooks ({size})...")
+            generate(directory)
+            marker.write_text(json.dumps(spec))
+        dirs[dataset] = directory
+    return dirs
+
+
+def build_cases(data: Dict[str, Path], scratch: Path) -> Dict[str, Callable[[], int]]:
+    """Benchmark cases for one data set. Each callable returns the rows processed.
+    
+    Writer cases use frames parsed once up front, so only the write is timed.
+    """
+    import pandas as pd
+    
+    from ..datasets.se004 import parser as kumulatif_parser
+    from ..datasets.se004 import parser_detail_gangguan as detail_parser
+    from ..datasets.se004 import parser_koreksi_cleansing as koreksi_parser
+    from ..output.incremental_writer import IncrementalFrameWriter
+    from ..transform.reconcile import reconcile_se004_kumulatif
+    from ..transform.rules import RULE_SETS
+    from ..transform.validate import validate_se004_kumulatif
+    
+    scratch.mkdir(parents=True, exist_ok=True)
+    
+    kumulatif_frames = [
+        kumulatif_parser.parse_se004_kumulatif_xlsx(path)
+        for path in kumulatif_parser.list_excel_files(data["kumulatif"])
+    ]
+    kumulatif_df = pd.concat(kumulatif_frames, ignore_index=True)
+    detail_df = detail_parser.concat_detail_gangguan_frames([
+        detail_parser.parse_single_file(path) for path in sorted(data["detail_gangguan"].glob("*.xlsx"))
+    ])
+    
+    def write_concat() -> int:
+        kumulatif_parser.save_csv_indonesian_format(kumulatif_df, scratch / "kumulatif_concat.csv")
+        return len(kumulatif_df)
+    
+    def write_incremental() -> int:
+        with IncrementalFrameWriter(
+            scratch / "kumulatif_incremental.csv",
+            columns=kumulatif_parser.SE004_KUMULATIF_COLUMNS,
+            sep=";",
+            encoding="utf-8-sig",
+            formatter=kumulatif_parser.format_indonesian_frame,
+        ) as writer:
+            for frame in kumulatif_frames:
+                writer.append(frame)
+        return writer.rows_written
+    
+    def validate_kumulatif() -> int:
+        validate_se004_kumulatif(kumulatif_df)
+        return len(kumulatif_df)
+    
+    def rules_detail_gangguan() -> int:
+        RULE_SETS["se004_detail_gangguan"].validate(detail_df)
+        return len(detail_df)
+    
+    def reconcile_kumulatif() -> int:
+        reconcile_se004_kumulatif(kumulatif_df)
+        return len(kumulatif_df)
+    
+    return {
+        "parse_kumulatif": lambda: len(kumulatif_parser.parse_all_excel_files(data["kumulatif"])),
+        "parse_detail_gangguan": lambda: detail_parser.parse_all_files(
+            data["detail_gangguan"], scratch / "detail_concat"
+        )["total_rows"],
+        "parse_detail_gangguan_streaming": lambda: detail_parser.parse_all_files(
+            data["detail_gangguan"], scratch / "detail_streaming", streaming=True
+        )["total_rows"],
+        "parse_koreksi_cleansing": lambda: len(koreksi_parser.parse_all_excel_files(data["koreksi_cleansing"])),
+        "write_kumulatif_csv": write_concat,
+        "write_kumulatif_csv_incremental": write_incremental,
+        "validate_kumulatif": validate_kumulatif,
+        "rules_detail_gangguan": rules_detail_gangguan,
+        "reconcile_kumulatif": reconcile_kumulatif,
+    }
+
+
+def check_streaming_output(output_dir: Path, seed: int = 0) -> Dict[str, bool]:
+    """Check that streamed and concatenated parser output are byte-identical.
+    
+    Uses small workbooks where every other file leaves integer cells blank,
+    so pd.concat upcasts those columns to float while the streamed frames of
+    the other files keep them as int.
+    
+    Args:
+        output_dir: Bench directory (workbooks and CSVs go under check/)
+        seed: Random seed for the synthetic workbooks
+    
+    Returns:
+        Dict of dataset name -> True if both outputs are identical
+    """
+    from ..datasets.se004 import parser as kumulatif_parser
+    from ..datasets.se004 import parser_detail_gangguan as detail_parser
+    from ..datasets.se004 import parser_koreksi_cleansing as koreksi_parser
+    
+    base = Path(output_dir) / "check" / f"seed{seed}"
+    kumulatif_dir = base / "kumulatif"
+    detail_dir = base / "detail_gangguan"
+    koreksi_dir = base / "koreksi_cleansing"
+    synthetic.generate_kumulatif_workbooks(kumulatif_dir, units=3, rows_per_file=20, seed=seed)
+    synthetic.generate_detail_gangguan_workbooks(detail_dir, units=3, rows_per_file=50, seed=seed, blank_every=7)
+    synthetic.generate_koreksi_cleansing_workbooks(koreksi_dir, units=3, rows_per_file=50, seed=seed, blank_every=7)
+    
+    kumulatif_parser.save_csv_indonesian_format(
+        kumulatif_parser.parse_all_excel_files(kumulatif_dir), base / "kumulatif_concat.csv"
+    )
+    kumulatif_parser.stream_all_excel_files(kumulatif_dir, base / "kumulatif_streaming.csv")
+    
+    detail_concat = detail_parser.parse_all_files(detail_dir, base / "detail_concat")["output_path"]
+    detail_streaming = detail_parser.parse_all_files(detail_dir, base / "detail_streaming", streaming=True)["output_path"]
+    
+    koreksi_parser.save_csv_indonesian_format(
+        koreksi_parser.parse_all_excel_files(koreksi_dir), base / "koreksi_concat.csv"
+    )
+    koreksi_parser.stream_all_excel_files(koreksi_dir, base / "koreksi_streaming.csv")
+    
+    pairs = {
+        "kumulatif": (base / "kumulatif_concat.csv", base / "kumulatif_streaming.csv"),
+        "detail_gangguan": (Path(detail_concat), Path(detail_streaming)),
+        "koreksi_cleansing": (base / "koreksi_concat.csv", base / "koreksi_streaming.csv"),
+    }
+    return {
+        dataset: concat.read_bytes() == streaming.read_bytes()
+        for dataset, (concat, streaming) in pairs.items()
+    }
+
+
+def measure(fn: Callable[[], int], repeat: int = 3) -> Dict[str, Any]:
+    """Time `fn` `repeat` times, then run it once more under tracemalloc.
+    
+    Returns:
+        Dict with rows, min_s, median_s and peak_mb
+    """
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        rows = fn()
+        timings.append(time.perf_counter() - start)
+    
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        "rows": int(rows),
+        "min_s": round(min(timings), 4),
+        "median_s": round(statistics.median(timings), 4),
+        "peak_mb": round(peak / 1024**2, 2),
+    }
+
+
+def load_history(history_path: Path) -> List[Dict[str, Any]]:
+    """Read all previous results from the JSONL history file."""
+    if not history_path.exists():
+        return []
+    records = []
+    with open(history_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def check_regression(
+    result: BenchResult,
+    history: List[Dict[str, Any]],
+    threshold: float = 0.2,
+) -> Optional[Dict[str, Any]]:
+    """Compare a result with the median of the last BASELINE_RUNS runs of the same case/size.
+    
+    Only runs on the same machine and Python version count: timings from
+    another host or interpreter are not comparable.
+    
+    Args:
+        result: New result
+        history: Previous results
+        threshold: Allowed relative slowdown / memory growth (0.2 = 20%)
+    
+    Returns:
+        Dict describing the regression, or None
+    """
+    environment = {key: result.environment.get(key) for key in ("machine", "python")}
+    previous = [
+        r for r in history
+        if r.get("case") == result.case
+        and r.get("size") == result.size
+        and all(r.get("environment", {}).get(key) == value for key, value in environment.items())
+    ]
+    previous = previous[-BASELINE_RUNS:]
+    if not previous:
+        return None
+    
+    baseline_time = statistics.median(r["min_s"] for r in previous)
+    baseline_peak = statistics.median(r["peak_mb"] for r in previous)
+    
+    regression = {}
+    if baseline_time > 0 and result.min_s > baseline_time * (1 + threshold):
+        regression["time"] = {"baseline_s": baseline_time, "ratio": round(result.min_s / baseline_time, 2)}
+    if baseline_peak > 0 and result.peak_mb > baseline_peak * (1 + threshold):
+        regression["memory"] = {"baseline_mb": baseline_peak, "ratio": round(result.peak_mb / baseline_peak, 2)}
+    
+    return regression or None
+
+
+def run_benchmarks(
+    output_dir: Path,
+    sizes: List[str],
+    cases: Optional[List[str]] = None,
+    repeat: int = 3,
+    threshold: float = 0.2,
+    seed: int = 0,
+    record: bool = True,
+) -> List[BenchResult]:
+    """Run benchmark cases for each size and append results to the history.
+    
+    Args:
+        output_dir: Bench directory (data/, scratch/ and history.jsonl live here)
+        sizes: Size presets to run (keys of SIZES)
+        cases: Case names to run (default: all)
+        repeat: Timed repetitions per case
+        threshold: Regression threshold (relative)
+        seed: Random seed for the synthetic workbooks
+        record: Append results to history.jsonl
+    
+    Returns:
+        List of BenchResult
+    """
+    output_dir = Path(output_dir)
+    history_path = output_dir / "history.jsonl"
+    history = load_history(history_path)
+    environment = _environment()
+    results = []
+    
+    for size in sizes:
+        if size not in SIZES:
+            raise ValueError(f"Unknown size '{size}'. Expected one of {list(SIZES)}")
+        
+        data = prepare_data(output_dir / "data", size, seed=seed)
+        available = build_cases(data, output_dir / "scratch" / size)
+        selected = cases or list(available)
+        
+        for case in selected:
+            if case not in available:
+                raise ValueError(f"Unknown case '{case}'. Expected one of {list(available)}")
+            
+            stats = measure(available[case], repeat=repeat)
+            result = BenchResult(case=case, size=size, repeat=repeat, environment=environment, **stats)
+            result.regression = check_regression(result, history, threshold)
+            results.append(result)
+    
+    if record and results:
+        history_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(history_path, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+    
+    return results
+
+
+def format_results(results: List[BenchResult]) -> str:
+    """Render results as a plain text table."""
+    header = f"{'case':34s} {'size':7s} {'rows':>8s} {'min s':>8s} {'median s':>9s} {'peak MB':>8s}  note"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        note = ""
+        if r.regression:
+            parts = [f"{kind} x{info['ratio']}" for kind, info in r.regression.items()]
+            note = "REGRESSION " + ", ".join(parts)
+        lines.append(
+            f"{r.case:34s} {r.size:7s} {r.rows:8d} {r.min_s:8.3f} {r.median_s:9.3f} {r.peak_mb:8.1f}  {note}"
+        )
+    return "\n".join(lines)
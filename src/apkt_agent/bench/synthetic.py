@@ -0,0 +1,291 @@
+"""Synthetic SE004 workbook generator.
+
+Produces workbooks with the same layout as the APKT-SS exports so the real
+parsers can be benchmarked offline:
+
+- kumulatif/bulanan: metadata header block (unit, period, jumlah pelanggan,
+  SAIDI/SAIFI totals), NO. KODE table and TOTAL KESELURUHAN row
+  (se004_kumulatif_{period}_{UNIT}.xlsx)
+- detail gangguan: 15 metadata rows + 2 merged header rows (17-row preamble),
+  31 data columns, TOTAL footer (se004_detail_{period}_{UNIT}_{kelompok}.xlsx)
+- koreksi cleansing: title block and a single header row
+  (koreksi_cleansing_{period}_{UNIT}.xlsx)
+
+Totals are consistent with the detail rows, so the reconciliation checks pass.
+With blank_every, every other detail/koreksi file leaves some integer cells
+blank, so the same column is int in one file and float in the next.
+"""
+
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Sequence
+
+from openpyxl import Workbook
+
+from ..datasets.se004.parser import UNIT_CODE_TO_NAME
+from ..datasets.se004.schema import BULAN_INDONESIA_REVERSE
+
+
+DEFAULT_UNITS = list(UNIT_CODE_TO_NAME)
+
+ULP_NAMES = [f"ULP {name}" for name in ("KOTA", "TIMUR", "BARAT", "UTARA", "SELATAN", "PESISIR")]
+CAUSES = ["POHON", "PETIR", "LAYANG-LAYANG", "BINATANG", "PERALATAN", "TIDAK DITEMUKAN"]
+WEATHER = ["CERAH", "HUJAN", "BERAWAN", "ANGIN KENCANG"]
+KELOMPOK = ["distribusi", "transmisi", "pembangkit"]
+
+
+def _units(count: int) -> List[str]:
+    """Return the first `count` known unit codes."""
+    if not 1 <= count <= len(DEFAULT_UNITS):
+        raise ValueError(f"units must be between 1 and {len(DEFAULT_UNITS)}, got {count}")
+    return DEFAULT_UNITS[:count]
+
+
+def _period_label(period_ym: str) -> str:
+    """202501 -> 'Januari 2025'."""
+    return f"{BULAN_INDONESIA_REVERSE[period_ym[4:]]} {period_ym[:4]}"
+
+
+def _id_number(value: float, decimals: int = 2) -> str:
+    """Format a number the way the export header does (1.234,56)."""
+    text = f"{value:,.{decimals}f}"
+    return text.replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def generate_kumulatif_workbooks(
+    output_dir: Path,
+    units: int = 11,
+    rows_per_file: int = 40,
+    period_ym: str = "202501",
+    seed: int = 0,
+) -> List[Path]:
+    """Generate SE004 kumulatif workbooks, one per unit.
+    
+    Args:
+        output_dir: Directory to write workbooks to
+        units: Number of unit files
+        rows_per_file: Detail rows per file (parser reads at most ~500 table rows)
+        period_ym: Period in YYYYMM
+        seed: Random seed
+    
+    Returns:
+        List of generated file paths
+    """
+    rng = random.Random(seed)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    
+    for unit_code in _units(units):
+        jumlah_pelanggan = rng.randint(500_000, 3_000_000)
+        details = []
+        for kode in range(1, rows_per_file + 1):
+            padam = rng.randint(0, 20_000)
+            jam_x_padam = round(padam * rng.uniform(0.1, 6.0), 4)
+            details.append([
+                str(kode),
+                f"{rng.choice(CAUSES)} {kode}",
+                padam,
+                jam_x_padam,
+                round(jam_x_padam / jumlah_pelanggan, 6),
+                round(padam / jumlah_pelanggan, 6),
+                rng.randint(0, 200),
+                round(rng.uniform(0, 300), 4),
+                round(rng.uniform(0, 500_000), 4),
+            ])
+        totals = [round(sum(row[col] for row in details), 6) for col in range(2, 9)]
+        saidi, saifi = totals[2], totals[3]
+        
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["LAPORAN SAIDI SAIFI KUMULATIF (SE004)"])
+        ws.append([f"UNIT INDUK : {UNIT_CODE_TO_NAME.get(unit_code, unit_code)}"])
+        ws.append([f"PERIODE : Januari s/d {_period_label(period_ym)}"])
+        ws.append(["Jumlah Pelanggan", _id_number(jumlah_pelanggan, 0)])
+        ws.append(["SAIDI :", _id_number(saidi, 4), "Jam/Plg", _id_number(saidi * 60, 4), "Menit/Plg"])
+        ws.append(["SAIFI :", _id_number(saifi, 4), "Kali/Plg"])
+        ws.append([f"Tanggal Penarikan : {datetime.now():%d-%m-%Y %H:%M}"])
+        ws.append([])
+        ws.append([
+            "NO. KODE", "PENYEBAB GANGGUAN", "JML. PLG. PADAM", "JAM X JML PLG PADAM",
+            "SAIDI (JAM)", "SAIFI (KALI)", "JML. GANGGUAN (KALI)", "LAMA PADAM (JAM)",
+            "KWH TAK TERSALURKAN",
+        ])
+        for row in details:
+            ws.append(row)
+        ws.append(["", "TOTAL KESELURUHAN", *totals])
+        
+        path = output_dir / f"se004_kumulatif_{period_ym}_{unit_code}.xlsx"
+        wb.save(path)
+        paths.append(path)
+    
+    return paths
+
+
+def generate_detail_gangguan_workbooks(
+    output_dir: Path,
+    units: int = 11,
+    rows_per_file: int = 2000,
+    period_ym: str = "202501",
+    kelompok: Sequence[str] = ("distribusi",),
+    seed: int = 0,
+    blank_every: int = 0,
+) -> List[Path]:
+    """Generate SE004 detail gangguan workbooks, one per unit and kelompok.
+    
+    Args:
+        output_dir: Directory to write workbooks to
+        units: Number of units
+        rows_per_file: Outage rows per file
+        period_ym: Period in YYYYMM
+        kelompok: Kelompok values to generate a file for
+        seed: Random seed
+        blank_every: In every other file, leave JUMLAH PELANGGAN PADAM blank
+                     on every n-th row (0 = never)
+    
+    Returns:
+        List of generated file paths
+    """
+    rng = random.Random(seed)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    year, month = int(period_ym[:4]), int(period_ym[4:])
+    paths = []
+    serial = 0
+    
+    for unit_code in _units(units):
+        for kel in kelompok:
+            blank = blank_every and len(paths) % 2 == 1
+            wb = Workbook()
+            ws = wb.active
+            
+            # 15 metadata rows
+            ws.append(["LAPORAN DETIL KODE GANGGUAN (SE004)"])
+            ws.append([f"UNIT INDUK : {UNIT_CODE_TO_NAME.get(unit_code, unit_code)}"])
+            ws.append([f"KELOMPOK : {kel.upper()}"])
+            ws.append([f"PERIODE : {_period_label(period_ym)}"])
+            for i in range(4, 15):
+                ws.append([f"Keterangan {i}"] if i % 3 == 0 else [])
+            
+            # 2 header rows with merged group headers
+            ws.append([
+                "NO", "NO LAPORAN", "ULP", "PENYULANG", "LOKASI TITIK GANGGUAN",
+                "WAKTU PADAM", None, "WAKTU NYALA SEMENTARA", None, "WAKTU NYALA", None,
+                "KELOMPOK GANGGUAN", None, None, "EVENT DAMAGE", "CAUSE", "GROUP CAUSE",
+                "WEATHER", "JUMLAH PELANGGAN PADAM", "LAMA PADAM (JAM)",
+                "JAM X PELANGGAN PADAM", "PENYEBAB PADAM", "ENS", "AMPERE", "KETERANGAN",
+                "LOKASI GANGGUAN", "SECTION GANGGUAN", "PEMBATAS SECTION", "NO TIANG GANGGUAN",
+                "RELE PROTEKSI", "BESAR ARUS (A)",
+            ])
+            ws.append([
+                None, None, None, None, None, "TANGGAL", "JAM", "TANGGAL", "JAM", "TANGGAL", "JAM",
+                "FASILITAS", "SUB FASILITAS", "EQUIPMENT",
+            ])
+            header_row = ws.max_row - 1
+            for start, end in ((6, 7), (8, 9), (10, 11), (12, 14)):
+                ws.merge_cells(start_row=header_row, start_column=start, end_row=header_row, end_column=end)
+            
+            for no in range(1, rows_per_file + 1):
+                serial += 1
+                padam = datetime(year, month, rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59))
+                minutes = rng.randint(1, 600)
+                nyala = padam + timedelta(minutes=minutes)
+                lama = minutes / 60
+                pelanggan = rng.randint(1, 5000)
+                ws.append([
+                    no,
+                    f"{rng.choice('JP')}{period_ym}{serial:07d}",
+                    rng.choice(ULP_NAMES),
+                    f"PENYULANG {rng.randint(1, 80):02d}",
+                    f"GARDU {rng.randint(1, 999):03d}",
+                    padam.strftime("%d-%m-%Y"), padam.strftime("%H:%M:%S"),
+                    None, None,
+                    nyala.strftime("%d-%m-%Y"), nyala.strftime("%H:%M:%S"),
+                    "JTM", rng.choice(["SUTM", "SKTM"]), rng.choice(["FCO", "LBS", "RECLOSER"]),
+                    rng.choice(["YA", "TIDAK"]),
+                    rng.choice(CAUSES),
+                    rng.choice(["INTERNAL", "EKSTERNAL"]),
+                    rng.choice(WEATHER),
+                    None if blank and no % blank_every == 0 else pelanggan,
+                    round(lama, 2),
+                    round(pelanggan * lama, 2),
+                    rng.choice(["GANGGUAN", "PEMELIHARAAN"]),
+                    round(rng.uniform(0, 5000), 2),
+                    rng.randint(0, 400),
+                    "",
+                    f"LOKASI {rng.randint(1, 500)}",
+                    f"SECTION {rng.randint(1, 20)}",
+                    rng.choice(["LBS", "FCO", "RECLOSER"]),
+                    f"T{rng.randint(1, 9999):04d}",
+                    rng.choice(["OCR", "GFR", "-"]),
+                    rng.randint(0, 2000),
+                ])
+            ws.append(["TOTAL"])
+            
+            path = output_dir / f"se004_detail_{period_ym}_{unit_code}_{kel}.xlsx"
+            wb.save(path)
+            paths.append(path)
+    
+    return paths
+
+
+def generate_koreksi_cleansing_workbooks(
+    output_dir: Path,
+    units: int = 11,
+    rows_per_file: int = 500,
+    period_ym: str = "202501",
+    seed: int = 0,
+    blank_every: int = 0,
+) -> List[Path]:
+    """Generate Koreksi & Cleansing workbooks, one per unit.
+    
+    Args:
+        output_dir: Directory to write workbooks to
+        units: Number of units
+        rows_per_file: Data rows per file
+        period_ym: Period in YYYYMM
+        seed: Random seed
+        blank_every: In every other file, leave Kode Gangguan blank on every
+                     n-th row (0 = never)
+    
+    Returns:
+        List of generated file paths
+    """
+    rng = random.Random(seed)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    year, month = int(period_ym[:4]), int(period_ym[4:])
+    paths = []
+    
+    for unit_code in _units(units):
+        blank = blank_every and len(paths) % 2 == 1
+        wb = Workbook()
+        ws = wb.active
+        ws.append(["LAPORAN KOREKSI DAN CLEANSING"])
+        ws.append([f"UNIT INDUK : {UNIT_CODE_TO_NAME.get(unit_code, unit_code)}"])
+        ws.append([f"PERIODE : {_period_label(period_ym)}"])
+        ws.append([])
+        ws.append([
+            "No", "No Laporan", "Unit", "Tanggal", "Kode Gangguan", "Status",
+            "Nilai Awal", "Nilai Koreksi", "Keterangan",
+        ])
+        for no in range(1, rows_per_file + 1):
+            nilai = round(rng.uniform(0, 1000), 2)
+            ws.append([
+                no,
+                f"{rng.choice('JP')}{period_ym}{no:07d}",
+                rng.choice(ULP_NAMES),
+                datetime(year, month, rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59)),
+                None if blank and no % blank_every == 0 else rng.randint(100, 999),
+                rng.choice(["KOREKSI", "CLEANSING"]),
+                nilai,
+                round(nilai * rng.uniform(0.5, 1.5), 2),
+                rng.choice(["", "Salah input jam", "Duplikat laporan"]),
+            ])
+        
+        path = output_dir / f"koreksi_cleansing_{period_ym}_{unit_code}.xlsx"
+        wb.save(path)
+        paths.append(path)
+    
+    return paths
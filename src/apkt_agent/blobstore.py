@@ -0,0 +1,237 @@
+"""Content-addressed store for downloaded raw workbooks.
+
+Each downloaded Excel file is hashed once and stored under
+workspace/blobs/objects/<aa>/<sha256>.xlsx; the run's raw/excel file is a
+hardlink to that blob, so raw files must be replaced, never written in
+place. Downloading the same export again (the norm for past periods) costs
+no extra disk, and the SHA-256 is a stable cache key for parsed results.
+Every stored file is recorded in workspace/blobs/index.jsonl with its
+dataset, unit, period and snapshot:
+
+    workspace:
+      root: "./workspace"
+      blob_store: true
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .config import Config
+from .logging_ import get_logger
+
+
+@dataclass
+class BlobRef:
+    """Index entry of one stored raw file."""
+    
+    sha256: str
+    dataset: str
+    unit: Optional[str]
+    period_ym: str
+    snapshot_date: str
+    run_id: str
+    filename: str
+    bytes: int
+    stored_at: str
+    new: bool = False
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file's bytes."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class BlobStore:
+    """Raw workbooks stored once by content hash, hardlinked into run dirs."""
+    
+    def __init__(self, root: Path):
+        """Initialize store.
+        
+        Args:
+            root: Store directory (objects/ and index.jsonl are created inside)
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.jsonl"
+        self._lock = threading.Lock()
+    
+    def blob_path(self, sha256: str, suffix: str = ".xlsx") -> Path:
+        return self.objects_dir / sha256[:2] / f"{sha256}{suffix}"
+    
+    def put(
+        self,
+        path: Path,
+        dataset: str,
+        period_ym: str,
+        snapshot_date: str,
+        run_id: str,
+        unit: Optional[str] = None,
+    ) -> BlobRef:
+        """Store a downloaded file and replace it by a hardlink to its blob.
+        
+        Args:
+            path: Downloaded file (in the run's raw/excel)
+            dataset: Dataset name
+            period_ym: Period in YYYYMM format
+            snapshot_date: Snapshot date of the run
+            run_id: Run the file was downloaded in
+            unit: Unit code (and kelompok, if any)
+        
+        Returns:
+            BlobRef (new=False if the same content was already stored)
+        """
+        path = Path(path)
+        sha256 = file_sha256(path)
+        blob = self.blob_path(sha256, path.suffix)
+        
+        with self._lock:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            new = not blob.exists()
+            if new:
+                # The downloaded file becomes the blob (copy if on another filesystem)
+                try:
+                    os.link(path, blob)
+                except OSError:
+                    shutil.copy2(path, blob)
+            if not os.path.samefile(blob, path):
+                tmp_path = path.with_name(f".{path.name}.blob")
+                try:
+                    os.link(blob, tmp_path)
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    get_logger().debug(f"Keeping a copy of {path.name} (hardlink failed: {e})")
+            
+            ref = BlobRef(
+                sha256=sha256,
+                dataset=dataset,
+                unit=unit,
+                period_ym=period_ym,
+                snapshot_date=snapshot_date,
+                run_id=run_id,
+                filename=path.name,
+                bytes=blob.stat().st_size,
+                stored_at=datetime.now().isoformat(timespec="seconds"),
+                new=new,
+            )
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(ref), ensure_ascii=False) + "\n")
+        return ref
+    
+    def entries(self) -> Iterator[BlobRef]:
+        """All index entries, oldest first."""
+        if not self.index_path.exists():
+            return
+        with open(self.index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield BlobRef(**json.loads(line))
+                    except (TypeError, ValueError):
+                        continue
+    
+    def lookup(
+        self,
+        dataset: str,
+        period_ym: str,
+        unit: Optional[str] = None,
+        snapshot_date: Optional[str] = None,
+    ) -> List[BlobRef]:
+        """Index entries matching (dataset, period[, unit][, snapshot]), newest last."""
+        return [
+            ref for ref in self.entries()
+            if ref.dataset == dataset
+            and ref.period_ym == period_ym
+            and (unit is None or ref.unit == unit)
+            and (snapshot_date is None or ref.snapshot_date == snapshot_date)
+        ]
+    
+    def link(self, sha256: str, target_path: Path, suffix: str = ".xlsx") -> Path:
+        """Hardlink a stored blob to target_path (e.g. into a new run's raw/excel).
+        
+        Raises:
+            FileNotFoundError: If the blob is not in the store
+        """
+        blob = self.blob_path(sha256, suffix)
+        if not blob.exists():
+            raise FileNotFoundError(f"Blob not found: {sha256}")
+        target_path = Path(target_path)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(blob, target_path)
+        except OSError:
+            shutil.copy2(blob, target_path)
+        return target_path
+    
+    def gc(self, dry_run: bool = False) -> Dict[str, int]:
+        """Remove blobs no longer linked from any run directory.
+        
+        A blob whose only link is the store itself (st_nlink == 1) belongs
+        to runs that were pruned or compressed. Its index entries are dropped
+        as well.
+        
+        Args:
+            dry_run: Only count what would be removed
+        
+        Returns:
+            Dict with blobs (removed) and bytes (freed)
+        """
+        removed = set()
+        freed = 0
+        if self.objects_dir.is_dir():
+            for blob in self.objects_dir.glob("*/*"):
+                info = blob.stat()
+                if info.st_nlink > 1:
+                    continue
+                removed.add(blob.stem)
+                freed += info.st_size
+                if not dry_run:
+                    blob.unlink()
+        
+        if removed and not dry_run:
+            with self._lock:
+                kept = [ref for ref in self.entries() if ref.sha256 not in removed]
+                tmp_path = self.index_path.with_name(f".{self.index_path.name}.{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for ref in kept:
+                        f.write(json.dumps(asdict(ref), ensure_ascii=False) + "\n")
+                os.replace(tmp_path, self.index_path)
+        return {"blobs": len(removed), "bytes": freed}
+
+
+_store: Optional[BlobStore] = None
+
+
+def setup_blob_store(config: Config) -> Optional[BlobStore]:
+    """Enable the blob store for downloads (workspace.blob_store).
+    
+    Args:
+        config: Configuration object
+    
+    Returns:
+        The BlobStore, or None if disabled
+    """
+    global _store
+    if not config.get('workspace.blob_store', False):
+        _store = None
+        return None
+    workspace_root = Path(config.get('workspace.root', './workspace'))
+    _store = BlobStore(workspace_root / 'blobs')
+    return _store
+
+
+def get_blob_store() -> Optional[BlobStore]:
+    """The BlobStore set up by setup_blob_store (None if disabled)."""
+    return _store
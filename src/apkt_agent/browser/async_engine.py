@@ -0,0 +1,436 @@
+"""Playwright async engine: several report pages driven from one event loop.
+
+The sync runners export one unit at a time in a single page. This engine
+opens one browser and up to runtime.concurrency pages (each in its own
+context sharing the logged-in session), and lets them pull export jobs from
+a common queue. Parsing of finished downloads runs in an executor while
+the pages keep exporting:
+
+    runtime:
+      engine: async        # sync (default) | async
+      concurrency: 4       # pages exporting at the same time
+
+Login stays interactive (OTP prompt) and is done once with the sync API;
+the session is handed to the async contexts as Playwright storage state.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from ..config import Config
+from ..diagnostics import get_diagnostics, stop_trace_async, trace_enabled
+from ..errors import ApktAuthError, ApktDownloadError, BrowserError, NoDataFoundError
+from ..latency import record_latency, retry_backoff_s, save_latency, wait_ceiling_ms
+from ..logging_ import annotate_span, get_logger, span, traced
+from ..models import DownloadedFile
+from ..workspace import RunContext
+from .breaker import AUTH
+from .download import (
+    DEFAULT_BACKOFF_S,
+    DEFAULT_DOWNLOAD_WAIT_MS,
+    MAX_DOWNLOAD_WAIT_MS,
+    MIN_DOWNLOAD_WAIT_MS,
+    _store_blob,
+)
+from .driver import RequestRouter
+
+
+APKTSS_HOST = "new-apktss.pln.co.id"
+
+# SweetAlert2 confirm buttons (same popups as download._check_and_dismiss_popup)
+POPUP_SELECTORS = [
+    ".swal2-confirm",
+    ".swal2-actions button:has-text('Ok')",
+    "div[role='dialog'] button:has-text('Ok')",
+]
+
+
+@dataclass
+class ExportJob:
+    """One export: the filters to apply on a report page and the file to save."""
+    
+    unit: str
+    target_filename: str
+    apply_filters: Callable[[Any], Awaitable[None]]
+    kelompok: Optional[str] = None
+
+
+@dataclass
+class ExportOutcome:
+    """Files and errors of an export batch."""
+    
+    files: List[DownloadedFile] = field(default_factory=list)
+    errors: List[Dict[str, str]] = field(default_factory=list)
+    no_data: List[str] = field(default_factory=list)
+    session_expired: bool = False
+
+
+def capture_storage_state(ctx: RunContext, config: Config, page: Optional[Any] = None) -> Dict[str, Any]:
+    """Cookies and local storage of a logged-in APKT-SS session (sync API).
+    
+    Args:
+        ctx: Run context (used for a fresh login's browser)
+        config: Configuration object
+        page: Logged-in sync page to take the session from (None = log in now)
+    
+    Returns:
+        Playwright storage state, usable as new_context(storage_state=...)
+    """
+    if page is not None:
+        return page.context.storage_state()
+    
+    from .auth import login_apkt
+    from .driver import close_browser, open_browser
+    
+    playwright, browser, context, page = open_browser(ctx, config)
+    try:
+        login_apkt(page, ctx, config)
+        # Visit APKT-SS once so its SSO cookies are part of the state
+        apktss_link = page.locator("p:has-text('APKT-SS')").first
+        if APKTSS_HOST not in page.url and apktss_link.count() > 0:
+            apktss_link.click()
+            page.wait_for_url(f"**/{APKTSS_HOST}/**", timeout=30000)
+        return context.storage_state()
+    finally:
+        close_browser(playwright, browser, context)
+
+
+async def check_and_dismiss_popup(page: Any) -> Tuple[bool, bool]:
+    """Async counterpart of download._check_and_dismiss_popup.
+    
+    Returns:
+        Tuple of (popup_found, is_no_data_error)
+    """
+    is_no_data = False
+    try:
+        is_no_data = await page.locator("text='Data tidak ditemukan'").is_visible()
+    except Exception:
+        pass
+    
+    for selector in POPUP_SELECTORS:
+        try:
+            button = page.locator(selector).first
+            if await button.is_visible():
+                await button.click()
+                return (True, is_no_data)
+        except Exception:
+            continue
+    return (False, is_no_data)
+
+
+async def select_label(page: Any, selector: str, label: str, timeout_ms: int = 15000) -> None:
+    """Select an option by label once the select is visible, then let the page settle."""
+    select = page.locator(selector).first
+    await select.wait_for(state="visible", timeout=timeout_ms)
+    await select.select_option(label=label)
+    try:
+        await page.wait_for_load_state("networkidle", timeout=5000)
+    except Exception:
+        pass
+
+
+@traced("export_click")
+async def click_export_excel(page: Any) -> None:
+    """Click Eksport and then its Excel option."""
+    export_button = page.locator("button:has-text('Eksport')").first
+    await export_button.wait_for(state="visible", timeout=5000)
+    await export_button.click()
+    
+    excel_button = page.locator("button:has-text('Excel')").first
+    await excel_button.wait_for(state="visible", timeout=5000)
+    await excel_button.click()
+
+
+@traced("download")
+async def download_excel_async(
+    page: Any,
+    ctx: RunContext,
+    target_filename: str,
+    click_export_fn: Callable[[Any], Awaitable[None]] = click_export_excel,
+    max_attempts: int = 3,
+    timeout_s: Optional[float] = None,
+) -> Path:
+    """Async counterpart of download.download_excel (same retries and popups).
+    
+    Args:
+        page: Async Playwright page with the filters set
+        ctx: Run context with download directory info
+        target_filename: Target filename in ctx.excel_dir
+        click_export_fn: Coroutine function triggering the export on the page
+        max_attempts: Maximum number of download attempts
+        timeout_s: Time to wait for the download to start per attempt
+            (None = derived from recent export times, see latency.py)
+    
+    Returns:
+        Path to the downloaded file
+    
+    Raises:
+        ApktDownloadError: If download fails after all attempts
+        NoDataFoundError: If no data available for filter
+    """
+    logger = get_logger()
+    target_path = ctx.excel_dir / target_filename
+    
+    for attempt in range(1, max_attempts + 1):
+        annotate_span(attempts=attempt)
+        wait_s = timeout_s or wait_ceiling_ms(
+            ctx.dataset, "download", DEFAULT_DOWNLOAD_WAIT_MS, MIN_DOWNLOAD_WAIT_MS, MAX_DOWNLOAD_WAIT_MS
+        ) / 1000
+        download_future = asyncio.get_running_loop().create_future()
+        
+        def on_download(download):
+            if not download_future.done():
+                download_future.set_result(download)
+        
+        page.on("download", on_download)
+        try:
+            await click_export_fn(page)
+            
+            # Wait for the download, checking for the "no data" popup meanwhile
+            clicked = asyncio.get_running_loop().time()
+            while not download_future.done():
+                popup_found, is_no_data = await check_and_dismiss_popup(page)
+                if is_no_data:
+                    raise NoDataFoundError("No data found for this filter combination")
+                if popup_found:
+                    raise ApktDownloadError("Download blocked by popup")
+                waited_s = asyncio.get_running_loop().time() - clicked
+                if waited_s > wait_s:
+                    record_latency(ctx.dataset, "download", waited_s * 1000, timed_out=True)
+                    raise ApktDownloadError(f"Download timeout - no file received after {wait_s:.0f}s")
+                await asyncio.wait({download_future}, timeout=1.0)
+            record_latency(ctx.dataset, "download", (asyncio.get_running_loop().time() - clicked) * 1000)
+            
+            download = download_future.result()
+            # Replace, never overwrite: it may be a hardlink to a stored blob
+            if target_path.exists():
+                target_path.unlink()
+            await download.save_as(target_path)
+            
+            file_size = target_path.stat().st_size if target_path.exists() else 0
+            if file_size == 0:
+                raise ApktDownloadError(f"Downloaded file is empty: {target_path}")
+            
+            logger.info(f"Download successful: {target_path} ({file_size} bytes)")
+            annotate_span(bytes=file_size)
+            await asyncio.to_thread(_store_blob, target_path, ctx)
+            return target_path
+        
+        except NoDataFoundError:
+            raise
+        
+        except Exception as e:
+            logger.warning(f"Download attempt {attempt} of {target_filename} failed: {e}")
+            _, is_no_data = await check_and_dismiss_popup(page)
+            if is_no_data:
+                raise NoDataFoundError("No data found for this filter combination")
+            
+            await get_diagnostics(ctx).capture_async(page, Path(target_filename).stem, attempt)
+            
+            if attempt == max_attempts:
+                raise ApktDownloadError(
+                    f"Download failed after {max_attempts} attempts: {target_filename}. Last error: {e}"
+                ) from e
+            await asyncio.sleep(retry_backoff_s(ctx.dataset, "download", attempt, DEFAULT_BACKOFF_S))
+        
+        finally:
+            page.remove_listener("download", on_download)
+    
+    raise ApktDownloadError(f"Download failed: {target_filename}")
+
+
+class AsyncBrowserSession:
+    """One Chromium shared by several concurrent report pages (async API)."""
+    
+    def __init__(
+        self,
+        ctx: RunContext,
+        config: Config,
+        storage_state: Optional[Union[Dict[str, Any], str, Path]] = None,
+        concurrency: Optional[int] = None,
+    ):
+        """Initialize session.
+        
+        Args:
+            ctx: Run context (excel_dir, logs_dir)
+            config: Configuration object (runtime.headless, viewport, concurrency)
+            storage_state: Logged-in state from capture_storage_state (or its JSON file)
+            concurrency: Pages exporting at the same time (default: runtime.concurrency)
+        """
+        self.ctx = ctx
+        self.config = config
+        self.storage_state = str(storage_state) if isinstance(storage_state, Path) else storage_state
+        self.concurrency = max(1, int(concurrency or config.get('runtime.concurrency', 4)))
+        self.logger = get_logger()
+        self._playwright = None
+        self._browser = None
+        # One router for all pages, so they share its bundle cache (runtime.routing)
+        self.router = RequestRouter.from_config(config)
+    
+    async def __aenter__(self) -> "AsyncBrowserSession":
+        await self.start()
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    async def start(self) -> None:
+        """Start Playwright and launch Chromium (same options as driver.open_browser)."""
+        from playwright.async_api import async_playwright
+        
+        try:
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.config.get('runtime.headless', False),
+                args=['--no-sandbox', '--disable-setuid-sandbox'],
+                timeout=60000,
+            )
+        except Exception as e:
+            await self.close()
+            raise BrowserError(f"Failed to open browser: {e}")
+        self.logger.info(f"Async browser opened (concurrency={self.concurrency})")
+    
+    async def close(self) -> None:
+        """Close the browser and stop Playwright."""
+        try:
+            if self._browser:
+                await self._browser.close()
+            if self._playwright:
+                await self._playwright.stop()
+        except Exception as e:
+            self.logger.warning(f"Error during async browser cleanup: {e}")
+        finally:
+            self._browser = None
+            self._playwright = None
+    
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Any]:
+        """A new page in its own context carrying the logged-in session."""
+        if self._browser is None:
+            raise BrowserError("Async browser session is not started")
+        
+        viewport = None
+        viewport_config = self.config.get('runtime.viewport')
+        if isinstance(viewport_config, dict):
+            viewport = {"width": viewport_config.get('width', 1920), "height": viewport_config.get('height', 1080)}
+        
+        context = await self._browser.new_context(
+            accept_downloads=True,
+            viewport=viewport,
+            storage_state=self.storage_state,
+        )
+        context.set_default_timeout(30000)
+        if self.router is not None:
+            await context.route("**/*", self.router.handle_async)
+        if trace_enabled():
+            await context.tracing.start(snapshots=True)
+        try:
+            yield await context.new_page()
+        finally:
+            await stop_trace_async(context)
+            await context.close()
+    
+    @traced("navigate.dataset")
+    async def open_report(self, page: Any, url: str) -> None:
+        """Open a report page and check the session was accepted.
+        
+        Raises:
+            ApktAuthError: If APKT-SS redirected to the login page
+        """
+        await page.goto(url)
+        await page.wait_for_load_state("networkidle")
+        if APKTSS_HOST not in page.url:
+            raise ApktAuthError(f"Session not accepted by APKT-SS (redirected to {page.url})")
+    
+    async def export(
+        self,
+        url: str,
+        jobs: List[ExportJob],
+        prepare: Optional[Callable[[Any], Awaitable[None]]] = None,
+        on_file: Optional[Callable[[DownloadedFile], Any]] = None,
+    ) -> ExportOutcome:
+        """Export all jobs, spread over up to `concurrency` pages.
+        
+        Each page opens the report once, runs `prepare` (e.g. the period
+        filter, shared by all jobs) and then takes jobs from a common queue.
+        An expired session (ApktAuthError) stops all pages: the failed job is
+        recorded with failure "auth", the jobs still queued are skipped and
+        the files downloaded so far are returned, like the sync runner does
+        once it has no re-login left.
+        
+        Args:
+            url: Report page URL
+            jobs: Export jobs
+            prepare: Coroutine function run once per page after opening it
+            on_file: Called with every downloaded file as soon as it is saved
+                (e.g. to start parsing it in an executor)
+        
+        Returns:
+            ExportOutcome
+        """
+        outcome = ExportOutcome()
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+        
+        async def worker(index: int) -> None:
+            async with self.page() as page:
+                with span("page.open", page=index):
+                    await self.open_report(page, url)
+                    if prepare:
+                        await prepare(page)
+                
+                while not queue.empty() and not outcome.session_expired:
+                    job = queue.get_nowait()
+                    attrs = {"unit": job.unit, "kelompok": job.kelompok} if job.kelompok else {"unit": job.unit}
+                    with span("unit", **attrs):
+                        try:
+                            await job.apply_filters(page)
+                            path = await download_excel_async(page, self.ctx, job.target_filename)
+                        except NoDataFoundError:
+                            self.logger.info(f"No data for {job.unit}")
+                            outcome.no_data.append(job.unit)
+                            continue
+                        except ApktAuthError as e:
+                            self.logger.error(f"Session expired during export of {job.unit}: {e}")
+                            outcome.errors.append({"unit": job.unit, "error": str(e), "failure": AUTH})
+                            outcome.session_expired = True
+                            break
+                        except Exception as e:
+                            self.logger.warning(f"Export of {job.unit} failed: {e}")
+                            outcome.errors.append({"unit": job.unit, "error": str(e)})
+                            continue
+                    
+                    downloaded = DownloadedFile(
+                        filename=path.name,
+                        path=str(path),
+                        size=path.stat().st_size,
+                        downloaded_at=datetime.now(),
+                    )
+                    outcome.files.append(downloaded)
+                    if on_file:
+                        on_file(downloaded)
+        
+        pages = min(self.concurrency, len(jobs))
+        results = await asyncio.gather(*(worker(i) for i in range(pages)), return_exceptions=True)
+        await asyncio.to_thread(save_latency)
+        for result in results:
+            if isinstance(result, ApktAuthError):
+                # Session refused while opening the report page
+                self.logger.error(f"Session expired: {result}")
+                outcome.errors.append({"unit": "GLOBAL", "error": str(result), "failure": AUTH})
+                outcome.session_expired = True
+            elif isinstance(result, Exception):
+                self.logger.error(f"Export page failed: {result}")
+                outcome.errors.append({"unit": "GLOBAL", "error": str(result)})
+        
+        # Jobs left by failed pages or an expired session
+        reason = "Skipped: session expired" if outcome.session_expired else "not exported (page failed)"
+        while not queue.empty():
+            job = queue.get_nowait()
+            outcome.errors.append({"unit": job.unit, "error": reason})
+        return outcome
@@ -8,8 +8,9 @@ import yaml
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeout
 
 from ..config import Config
+from ..diagnostics import get_diagnostics
 from ..errors import AuthError, ApktAuthError
-from ..logging_ import get_logger
+from ..logging_ import get_logger, traced
 from ..workspace import RunContext
 
 
@@ -36,9 +37,19 @@ def load_credentials() -> Tuple[Optional[str], Optional[str]]:
     return None, None
 
 
+@traced("login")
+def _on_apkt(url: str) -> bool:
+    """Whether the page is on APKT past its login page (session accepted)."""
+    return "new-apkt.pln.co.id" in url and "/login" not in url
+
+
 def login_apkt(page: Page, ctx: RunContext, config: Config) -> bool:
     """Login to APKT via SSO/IAM with interactive credential input.
     
+    A persistent browser profile (runtime.persistent_profile) may still hold a
+    live APKT or IAM session: APKT then skips its login page, or IAM sends
+    the SSO click straight back to APKT, and the remaining steps are skipped.
+    
     Args:
         page: Playwright page instance
         ctx: Run context
@@ -63,6 +74,11 @@ def login_apkt(page: Page, ctx: RunContext, config: Config) -> bool:
         page.wait_for_load_state("networkidle")
         logger.info(f"Current URL: {page.url}")
         
+        if _on_apkt(page.url):
+            logger.info("APKT session still valid, login skipped")
+            print("\n✓ Already logged in (saved session)")
+            return True
+        
         # Step 2: Click SSO button
         logger.info("Step 2: Looking for SSO button...")
         
@@ -94,9 +110,14 @@ def login_apkt(page: Page, ctx: RunContext, config: Config) -> bool:
         sso_button.click()
         page.wait_for_load_state("networkidle")
         
-        # Step 3: Wait for IAM page
+        # Step 3: Wait for IAM page (or APKT, when IAM still has a session)
         logger.info("Step 3: Waiting for IAM page...")
-        page.wait_for_url("**/iam.pln.co.id/**", timeout=30000)
+        page.wait_for_url(lambda url: "iam.pln.co.id" in url or _on_apkt(url), timeout=30000)
+        if _on_apkt(page.url):
+            page.wait_for_load_state("networkidle")
+            logger.info(f"IAM session still valid, redirected to APKT: {page.url}")
+            print("\n✓ Login successful! (saved IAM session)")
+            return True
         logger.info(f"Redirected to IAM: {page.url}")
         
         # Step 4: Get credentials from credentials.yaml
@@ -272,27 +293,18 @@ def login_apkt(page: Page, ctx: RunContext, config: Config) -> bool:
         raise ApktAuthError(f"Login failed: {e}")
 
 
-def _save_screenshot(page: Page, ctx: RunContext, filename: str) -> Path:
-    """Save screenshot to raw directory.
+def _save_screenshot(page: Page, ctx: RunContext, filename: str) -> Optional[Path]:
+    """Capture the page after a failed login (see diagnostics.py).
     
     Args:
         page: Playwright page
         ctx: Run context
-        filename: Screenshot filename
+        filename: Capture name (its stem names the diagnostics file)
         
     Returns:
-        Path to saved screenshot
+        Path of the capture, or None if not captured
     """
-    logger = get_logger()
-    screenshot_path = ctx.raw_dir / filename
-    
-    try:
-        page.screenshot(path=str(screenshot_path))
-        logger.info(f"Screenshot saved: {screenshot_path}")
-    except Exception as e:
-        logger.warning(f"Failed to save screenshot: {e}")
-    
-    return screenshot_path
+    return get_diagnostics(ctx).capture(page, Path(filename).stem)
 
 
 # Keep class for backward compatibility (deprecated)
@@ -0,0 +1,271 @@
+"""Circuit breaker around the export path.
+
+When APKT-SS is degraded, every unit used to burn its three download
+attempts (with screenshots and backoff) before the run moved on to the
+next unit, so a full run could take an hour to fail. The runner now
+classifies every failed export:
+
+- no_data: "Data tidak ditemukan", the server answered normally
+- auth: the session expired (back on the login page, AuthError)
+- timeout: filter or download timed out
+- server: 5xx responses or network errors from APKT-SS
+- other: anything else (missing selector, unexpected popup, ...)
+
+After failure_threshold consecutive timeout/server failures the circuit
+opens: exports pause for cooldown_s, then a single export with one attempt
+probes the server. Success closes the circuit; failure opens it again
+with a doubled pause. After max_trips openings the remaining units are
+skipped. An expired session is re-authenticated (OTP prompt) and the unit
+retried, at most max_reauth times per run; after that the remaining units
+are skipped:
+
+    circuit_breaker:
+      enabled: true
+      failure_threshold: 3
+      cooldown_s: 60
+      max_cooldown_s: 600
+      max_trips: 3
+      max_reauth: 1
+"""
+
+import re
+import time
+from typing import Any, Callable, Dict, Iterator
+
+from ..config import Config
+from ..errors import AuthError, NoDataFoundError
+from ..logging_ import annotate_span, get_logger
+
+
+# Failure kinds
+NO_DATA = "no_data"
+AUTH = "auth"
+TIMEOUT = "timeout"
+SERVER = "server"
+OTHER = "other"
+
+# Failures that say the server (or the network to it) is in trouble
+INFRASTRUCTURE = (TIMEOUT, SERVER)
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Pages showing the session is gone
+LOGIN_URL_MARKERS = ("/login", "iam.pln.co.id")
+
+_SESSION_EXPIRED = re.compile(r"session expired|sesi (telah )?berakhir|unauthori[sz]ed|\b401\b", re.IGNORECASE)
+_SERVER_ERROR = re.compile(
+    r"\b50[0-4]\b|bad gateway|service unavailable|internal server error|gateway time-?out"
+    r"|net::ERR_|ECONNRESET|ECONNREFUSED|connection (reset|refused|closed)",
+    re.IGNORECASE,
+)
+_TIMEOUT = re.compile(r"timeout|timed out", re.IGNORECASE)
+
+
+def _chain(error: BaseException) -> Iterator[BaseException]:
+    """The error and its causes (raise ... from ...)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def on_login_page(page: Any) -> bool:
+    """Whether the page was sent back to the APKT or IAM login."""
+    try:
+        url = page.url
+    except Exception:
+        return False
+    return any(marker in url for marker in LOGIN_URL_MARKERS)
+
+
+def classify_failure(error: BaseException, page: Any = None) -> str:
+    """Kind of a failed export (NO_DATA, AUTH, TIMEOUT, SERVER or OTHER).
+    
+    Args:
+        error: Exception raised by the filter or download step
+        page: Page the export ran on (its URL shows an expired session)
+    
+    Returns:
+        Failure kind
+    """
+    errors = list(_chain(error))
+    if any(isinstance(e, NoDataFoundError) for e in errors):
+        return NO_DATA
+    if any(isinstance(e, AuthError) for e in errors) or (page is not None and on_login_page(page)):
+        return AUTH
+    
+    text = " ".join(str(e) for e in errors)
+    if _SESSION_EXPIRED.search(text):
+        return AUTH
+    if _SERVER_ERROR.search(text):
+        return SERVER
+    # Playwright's TimeoutError and the builtin one share the name
+    if any(type(e).__name__ == "TimeoutError" for e in errors) or _TIMEOUT.search(text):
+        return TIMEOUT
+    return OTHER
+
+
+class CircuitBreaker:
+    """Consecutive infrastructure failures of one run's exports, and what to do about them."""
+    
+    def __init__(
+        self,
+        enabled: bool = True,
+        failure_threshold: int = 3,
+        cooldown_s: float = 60,
+        max_cooldown_s: float = 600,
+        max_trips: int = 3,
+        max_reauth: int = 1,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """Initialize breaker.
+        
+        Args:
+            enabled: False = never opens and never re-authenticates (failures only counted)
+            failure_threshold: Consecutive timeout/server failures that open the circuit
+            cooldown_s: Pause before the first probe
+            max_cooldown_s: Longest pause (the pause doubles after every failed probe)
+            max_trips: Openings after which the remaining exports are skipped
+            max_reauth: Re-logins allowed when the session expires
+            sleep: Pause function (time.sleep)
+        """
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.initial_cooldown_s = cooldown_s
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.max_trips = max_trips
+        self.max_reauth = max_reauth
+        self._sleep = sleep
+        
+        self.state = CLOSED
+        self.consecutive = 0
+        self.trips = 0
+        self.reauths = 0
+        self.stopped = False
+        self.failures: Dict[str, int] = {}
+        self._server_errors = 0
+    
+    def watch(self, page: Any) -> None:
+        """Count 5xx responses seen by the page (evidence for SERVER failures)."""
+        page.on("response", self._on_response)
+    
+    def unwatch(self, page: Any) -> None:
+        """Stop counting the page's responses (the page may be reused by the next run)."""
+        try:
+            page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
+    
+    def _on_response(self, response: Any) -> None:
+        try:
+            if response.status >= 500:
+                self._server_errors += 1
+        except Exception:
+            pass
+    
+    def begin_job(self) -> None:
+        """Start watching a new export."""
+        self._server_errors = 0
+    
+    def classify(self, error: BaseException, page: Any = None) -> str:
+        """classify_failure, with 5xx responses during the export turning timeouts into SERVER."""
+        kind = classify_failure(error, page)
+        if kind in (TIMEOUT, OTHER) and self._server_errors:
+            kind = SERVER
+        self.failures[kind] = self.failures.get(kind, 0) + 1
+        annotate_span(failure=kind)
+        return kind
+    
+    def attempts(self, default: int) -> int:
+        """Download attempts for the next export (one while the server is failing)."""
+        if self.enabled and (self.state == HALF_OPEN or self.consecutive > 0):
+            return 1
+        return default
+    
+    def record_success(self) -> None:
+        """The server answered (export done, or no data for the filter)."""
+        if self.state != CLOSED:
+            get_logger().info("Circuit closed: APKT-SS is answering again")
+        self.state = CLOSED
+        self.consecutive = 0
+        self.cooldown_s = self.initial_cooldown_s
+    
+    def record_failure(self, kind: str) -> None:
+        """Account for a failed export of the given kind."""
+        if kind == NO_DATA:
+            self.record_success()
+            return
+        if kind not in INFRASTRUCTURE or not self.enabled:
+            return
+        
+        self.consecutive += 1
+        if self.state == HALF_OPEN or self.consecutive >= self.failure_threshold:
+            self._trip()
+    
+    def _trip(self) -> None:
+        logger = get_logger()
+        if self.state == HALF_OPEN:
+            self.cooldown_s = min(self.max_cooldown_s, self.cooldown_s * 2)
+        self.state = OPEN
+        self.trips += 1
+        if self.trips >= self.max_trips:
+            self.stopped = True
+            logger.error(f"Circuit open {self.trips} times: skipping the remaining exports")
+        else:
+            logger.warning(
+                f"Circuit open after {self.consecutive} consecutive failures: "
+                f"pausing {self.cooldown_s:.0f}s before probing APKT-SS"
+            )
+    
+    def wait_if_open(self) -> bool:
+        """Pause while the circuit is open, then let one probe export through.
+        
+        Returns:
+            True if it paused (the caller should reload the report page)
+        """
+        if self.state != OPEN or self.stopped:
+            return False
+        print(f"⏸ APKT-SS not responding, pausing {self.cooldown_s:.0f}s...")
+        self._sleep(self.cooldown_s)
+        self.state = HALF_OPEN
+        return True
+    
+    def can_reauthenticate(self) -> bool:
+        """Take one re-login from the run's allowance."""
+        if not self.enabled or self.reauths >= self.max_reauth:
+            return False
+        self.reauths += 1
+        return True
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "trips": self.trips,
+            "reauthentications": self.reauths,
+            "stopped": self.stopped,
+            "failures": dict(self.failures),
+        }
+
+
+def open_breaker(config: Config) -> CircuitBreaker:
+    """Circuit breaker of a run from config (circuit_breaker.*).
+    
+    Args:
+        config: Configuration object
+    
+    Returns:
+        CircuitBreaker (a disabled breaker only classifies failures)
+    """
+    return CircuitBreaker(
+        enabled=config.get('circuit_breaker.enabled', True),
+        failure_threshold=config.get('circuit_breaker.failure_threshold', 3),
+        cooldown_s=config.get('circuit_breaker.cooldown_s', 60),
+        max_cooldown_s=config.get('circuit_breaker.max_cooldown_s', 600),
+        max_trips=config.get('circuit_breaker.max_trips', 3),
+        max_reauth=config.get('circuit_breaker.max_reauth', 1),
+    )
@@ -1,16 +1,32 @@
 """File download handling for APKT data."""
 
+import re
 import time
 from pathlib import Path
 from typing import Callable, Optional, Tuple
 
 from playwright.sync_api import Page, Download, TimeoutError as PlaywrightTimeout
 
+from ..blobstore import get_blob_store
+from ..diagnostics import get_diagnostics
 from ..errors import ApktDownloadError, BrowserError, NoDataFoundError
-from ..logging_ import get_logger
+from ..latency import record_latency, retry_backoff_s, wait_ceiling_ms
+from ..logging_ import annotate_span, get_logger, traced
 from ..workspace import RunContext
 
 
+# Retry delays (s) and download wait (ms) until the latency model has samples (see latency.py)
+DEFAULT_BACKOFF_S = (2, 5, 10)
+DEFAULT_DOWNLOAD_WAIT_MS = 60000
+
+# Bounds of the adaptive download wait
+MIN_DOWNLOAD_WAIT_MS = 20000
+MAX_DOWNLOAD_WAIT_MS = 300000
+
+# Popup checks while waiting for the download
+POLL_INTERVAL_MS = 2000
+
+
 def _check_and_dismiss_popup(page: Page) -> Tuple[bool, bool]:
     """Check and dismiss any popup/modal that blocks download.
     
@@ -69,6 +85,31 @@ def _check_and_dismiss_popup(page: Page) -> Tuple[bool, bool]:
     return (False, is_no_data)
 
 
+def _store_blob(path: Path, ctx: RunContext) -> None:
+    """Move a downloaded file into the blob store, if enabled (see blobstore.py)."""
+    store = get_blob_store()
+    if store is None:
+        return
+    
+    # <dataset>_<YYYYMM>_<unit>[_<kelompok>].xlsx
+    match = re.search(r"_\d{6}_(.+)$", path.stem)
+    try:
+        ref = store.put(
+            path,
+            dataset=ctx.dataset,
+            period_ym=ctx.period_ym,
+            snapshot_date=ctx.snapshot_date,
+            run_id=ctx.run_id,
+            unit=match.group(1) if match else None,
+        )
+        annotate_span(sha256=ref.sha256)
+        if not ref.new:
+            get_logger().info(f"Same content as an earlier download, linked to blob {ref.sha256[:12]}")
+    except OSError as e:
+        get_logger().warning(f"Could not add {path.name} to the blob store: {e}")
+
+
+@traced("download")
 def download_excel(
     page: Page,
     ctx: RunContext,
@@ -94,24 +135,27 @@ def download_excel(
     """
     logger = get_logger()
     
-    # Backoff delays in seconds
-    backoff_delays = [2, 5, 10]
-    
     target_path = ctx.excel_dir / target_filename
     
     for attempt in range(1, max_attempts + 1):
         logger.info(f"Download attempt {attempt}/{max_attempts} for {target_filename}")
+        annotate_span(attempts=attempt)
+        
+        # Wait derived from this page's recent export times (60s until known)
+        wait_ms = wait_ceiling_ms(
+            ctx.dataset, "download", DEFAULT_DOWNLOAD_WAIT_MS, MIN_DOWNLOAD_WAIT_MS, MAX_DOWNLOAD_WAIT_MS
+        )
+        annotate_span(wait_ms=wait_ms)
         
         try:
-            # Setup download capture with reasonable timeout (60s for large files)
-            # and check for popup periodically during the wait
+            # Setup download capture and check for popup periodically during the wait
             download = None
-            download_started = False
+            download_started = None
             
             def on_download(d):
                 nonlocal download, download_started
                 download = d
-                download_started = True
+                download_started = time.monotonic()
             
             # Register download event listener
             page.on("download", on_download)
@@ -119,14 +163,10 @@ def download_excel(
             try:
                 # Trigger the export click
                 click_export_fn()
+                clicked = time.monotonic()
                 
-                # Poll for download or popup (check every 2 seconds, max 60 seconds)
-                max_wait = 30  # 30 iterations * 2 seconds = 60 seconds max
-                for i in range(max_wait):
-                    # Check if download started
-                    if download_started:
-                        break
-                    
+                # Poll for download or popup until the wait ceiling
+                while download_started is None:
                     # Check for popup every iteration
                     popup_found, is_no_data = _check_and_dismiss_popup(page)
                     if is_no_data:
@@ -134,11 +174,14 @@ def download_excel(
                     if popup_found:
                         raise ApktDownloadError("Download blocked by popup")
                     
-                    # Wait 2 seconds before next check
-                    page.wait_for_timeout(2000)
+                    waited_ms = (time.monotonic() - clicked) * 1000
+                    if waited_ms >= wait_ms:
+                        record_latency(ctx.dataset, "download", waited_ms, timed_out=True, save=True)
+                        raise ApktDownloadError(f"Download timeout - no file received after {waited_ms / 1000:.0f}s")
+                    
+                    page.wait_for_timeout(min(POLL_INTERVAL_MS, wait_ms - waited_ms))
                 
-                if not download_started:
-                    raise ApktDownloadError("Download timeout - no file received after 60s")
+                record_latency(ctx.dataset, "download", (download_started - clicked) * 1000, save=True)
                     
             finally:
                 # Remove event listener
@@ -147,7 +190,9 @@ def download_excel(
             # Log download info
             logger.info(f"Download started: {download.suggested_filename}")
             
-            # Save to target path
+            # Save to target path (replace, never overwrite: it may be a hardlink to a stored blob)
+            if target_path.exists():
+                target_path.unlink()
             download.save_as(target_path)
             
             # Verify file exists and has content
@@ -159,6 +204,8 @@ def download_excel(
                 raise ApktDownloadError(f"Downloaded file is empty: {target_path}")
             
             logger.info(f"Download successful: {target_path} ({file_size} bytes)")
+            annotate_span(bytes=file_size)
+            _store_blob(target_path, ctx)
             return target_path
             
         except NoDataFoundError:
@@ -173,18 +220,13 @@ def download_excel(
             if is_no_data:
                 raise NoDataFoundError("No data found for this filter combination")
             
-            # Take screenshot on failure
-            screenshot_path = ctx.logs_dir / f"download_fail_attempt_{attempt}.png"
-            try:
-                page.screenshot(path=str(screenshot_path))
-                logger.info(f"Screenshot saved: {screenshot_path}")
-            except Exception as ss_err:
-                logger.warning(f"Failed to save screenshot: {ss_err}")
+            # Capture the page (within the run's diagnostics budget)
+            get_diagnostics(ctx).capture(page, Path(target_filename).stem, attempt)
             
-            # If not last attempt, wait with backoff
+            # If not last attempt, wait with backoff (longer while the page is slow)
             if attempt < max_attempts:
-                delay = backoff_delays[min(attempt - 1, len(backoff_delays) - 1)]
-                logger.info(f"Waiting {delay}s before retry...")
+                delay = retry_backoff_s(ctx.dataset, "download", attempt, DEFAULT_BACKOFF_S)
+                logger.info(f"Waiting {delay:.0f}s before retry...")
                 time.sleep(delay)
             else:
                 # Last attempt failed
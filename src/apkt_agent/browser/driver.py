@@ -1,16 +1,322 @@
-"""Playwright browser driver management (sync API)."""
+"""Playwright browser driver management (sync API).
 
+Every context gets a request router (runtime.routing): images, fonts and
+media, analytics hosts and optionally every host outside pln.co.id are
+aborted, and fingerprinted JS/CSS bundles are kept in memory and served
+to every later context of the process. Playwright disables the browser's
+HTTP cache for routed contexts, so without this each new context would
+fetch the bundles again.
+
+With runtime.persistent_profile enabled, the sync browser instead runs in
+a Chromium profile kept in the workspace (launch_persistent_context), so
+bundles, service workers and cookies survive between runs in its disk
+cache. A lock file keeps two runs from sharing the profile; the second one
+falls back to a fresh context. Routing is not installed on the persistent
+context (it would disable that cache); images are turned off through
+Chromium settings instead.
+"""
+
+import os
+import re
+import threading
 from pathlib import Path
-from typing import Tuple, Any
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
 
 from playwright.sync_api import sync_playwright, Playwright, Browser, BrowserContext, Page
 
+from ..diagnostics import stop_trace, trace_enabled
 from ..errors import BrowserError
 from ..logging_ import get_logger
 from ..workspace import RunContext
 from ..config import Config
 
 
+# Resource types aborted by default (not needed to set filters or export)
+DEFAULT_BLOCKED_TYPES = ("image", "font", "media")
+
+# Analytics and tracking hosts, aborted whenever routing is enabled
+DEFAULT_BLOCKED_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "hotjar.com",
+    "clarity.ms",
+    "facebook.net",
+)
+
+# Hosts of the application (subdomains included)
+FIRST_PARTY_DOMAINS = ("pln.co.id",)
+
+# Bundles with a content hash in their name never change under the same URL
+_FINGERPRINTED = re.compile(r"[.-][0-9A-Za-z_]{8,}\.(?:m?js|css)$")
+
+# Memory kept for cached bundles, shared by all contexts of the process
+STATIC_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Headers that no longer match a decoded, replayed body
+_HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+# Router decisions
+CONTINUE = "continue"
+BLOCK = "block"
+CACHE = "cache"
+
+# Profile lock of the persistent context, next to Chromium's own Singleton* files
+PROFILE_LOCK = ".apkt-agent.lock"
+CHROMIUM_SINGLETONS = ("SingletonLock", "SingletonSocket", "SingletonCookie")
+
+_static_cache: Dict[str, Tuple[int, Dict[str, str], bytes]] = {}
+_static_cache_bytes = 0
+_static_cache_lock = threading.Lock()
+
+
+def _host_in(host: str, domains: Iterable[str]) -> bool:
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class RequestRouter:
+    """Aborts non-essential requests and serves cached static bundles."""
+    
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+        blocked_hosts: Iterable[str] = DEFAULT_BLOCKED_HOSTS,
+        block_third_party: bool = False,
+        first_party_domains: Iterable[str] = FIRST_PARTY_DOMAINS,
+        cache_static: bool = True,
+    ):
+        """Initialize router.
+        
+        Args:
+            blocked_types: Playwright resource types to abort ("image", "font", "stylesheet", ...)
+            blocked_hosts: Hosts (and their subdomains) to abort
+            block_third_party: Abort every request outside first_party_domains
+            first_party_domains: Hosts of the application
+            cache_static: Serve fingerprinted first-party JS/CSS from memory after the first fetch
+        """
+        self.blocked_types = set(blocked_types)
+        self.blocked_hosts = tuple(blocked_hosts)
+        self.block_third_party = block_third_party
+        self.first_party_domains = tuple(first_party_domains)
+        self.cache_static = cache_static
+        self.blocked = 0
+        self.cache_hits = 0
+    
+    @classmethod
+    def from_config(cls, config: Config) -> Optional["RequestRouter"]:
+        """Router from runtime.routing (None if routing is disabled)."""
+        if not config.get('runtime.routing.enabled', True):
+            return None
+        return cls(
+            blocked_types=config.get('runtime.routing.block_resource_types', DEFAULT_BLOCKED_TYPES),
+            blocked_hosts=config.get('runtime.routing.block_hosts', DEFAULT_BLOCKED_HOSTS),
+            block_third_party=config.get('runtime.routing.block_third_party', False),
+            first_party_domains=config.get('runtime.routing.first_party_domains', FIRST_PARTY_DOMAINS),
+            cache_static=config.get('runtime.routing.cache_static', True),
+        )
+    
+    def decide(self, url: str, resource_type: str, method: str = "GET") -> str:
+        """What to do with a request: CONTINUE, BLOCK or CACHE."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return CONTINUE
+        host = parts.hostname or ""
+        first_party = _host_in(host, self.first_party_domains)
+        # Pages and API calls are never blocked: the report and its export depend on them
+        if resource_type not in ("document", "xhr", "fetch"):
+            if resource_type in self.blocked_types or _host_in(host, self.blocked_hosts):
+                return BLOCK
+            if self.block_third_party and not first_party:
+                return BLOCK
+        elif _host_in(host, self.blocked_hosts):
+            return BLOCK
+        if (
+            self.cache_static and first_party and method == "GET"
+            and resource_type in ("script", "stylesheet") and _FINGERPRINTED.search(parts.path)
+        ):
+            return CACHE
+        return CONTINUE
+    
+    def _remember(self, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        global _static_cache_bytes
+        with _static_cache_lock:
+            if url in _static_cache or _static_cache_bytes + len(body) > STATIC_CACHE_MAX_BYTES:
+                return
+            kept = {name: value for name, value in headers.items() if name.lower() not in _HOP_HEADERS}
+            _static_cache[url] = (status, kept, body)
+            _static_cache_bytes += len(body)
+    
+    def handle(self, route) -> None:
+        """Route handler for a sync context (context.route("**/*", router.handle))."""
+        request = route.request
+        action = self.decide(request.url, request.resource_type, request.method)
+        try:
+            if action == BLOCK:
+                self.blocked += 1
+                route.abort("blockedbyclient")
+                return
+            if action == CACHE:
+                cached = _static_cache.get(request.url)
+                if cached is None:
+                    response = route.fetch()
+                    body = response.body()
+                    if response.status == 200:
+                        self._remember(request.url, response.status, response.headers, body)
+                    cached = (response.status, response.headers, body)
+                else:
+                    self.cache_hits += 1
+                status, headers, body = cached
+                route.fulfill(
+                    status=status,
+                    headers={k: v for k, v in headers.items() if k.lower() not in _HOP_HEADERS},
+                    body=body,
+                )
+                return
+            route.continue_()
+        except Exception as e:
+            get_logger().debug(f"Routing {request.url} failed ({e}), letting it through")
+            try:
+                route.continue_()
+            except Exception:
+                pass
+    
+    async def handle_async(self, route) -> None:
+        """Route handler for an async context (same decisions as handle)."""
+        request = route.request
+        action = self.decide(request.url, request.resource_type, request.method)
+        try:
+            if action == BLOCK:
+                self.blocked += 1
+                await route.abort("blockedbyclient")
+                return
+            if action == CACHE:
+                cached = _static_cache.get(request.url)
+                if cached is None:
+                    response = await route.fetch()
+                    body = await response.body()
+                    if response.status == 200:
+                        self._remember(request.url, response.status, response.headers, body)
+                    cached = (response.status, response.headers, body)
+                else:
+                    self.cache_hits += 1
+                status, headers, body = cached
+                await route.fulfill(
+                    status=status,
+                    headers={k: v for k, v in headers.items() if k.lower() not in _HOP_HEADERS},
+                    body=body,
+                )
+                return
+            await route.continue_()
+        except Exception as e:
+            get_logger().debug(f"Routing {request.url} failed ({e}), letting it through")
+            try:
+                await route.continue_()
+            except Exception:
+                pass
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def acquire_profile(profile_dir: Path) -> Optional[Path]:
+    """Lock a persistent profile directory for this process.
+    
+    A lock left by a process that no longer runs (crash, killed run) is
+    removed together with Chromium's Singleton* files, which would otherwise
+    make Chromium refuse the profile.
+    
+    Args:
+        profile_dir: Chromium user data directory (created if missing)
+    
+    Returns:
+        Lock file path, or None if another running process holds the profile
+    """
+    logger = get_logger()
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    lock_path = profile_dir / PROFILE_LOCK
+    
+    for _ in range(2):
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                owner = int(lock_path.read_text(encoding="utf-8").strip() or 0)
+            except (OSError, ValueError):
+                owner = 0
+            # Held by another run, or by a context this process still has open
+            in_use = lock_path in _profile_locks.values() if owner == os.getpid() else _pid_alive(owner)
+            if in_use:
+                return None
+            logger.info(f"Removing stale browser profile lock (pid {owner or 'unknown'})")
+            for name in (PROFILE_LOCK,) + CHROMIUM_SINGLETONS:
+                if os.path.lexists(profile_dir / name):
+                    os.unlink(profile_dir / name)
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+        return lock_path
+    return None
+
+
+# Locks held by open persistent contexts, released by close_browser
+_profile_locks: Dict[int, Path] = {}
+
+
+def _launch_persistent(playwright: Playwright, config: Config, headless: bool, viewport) -> Optional[BrowserContext]:
+    """Persistent context in the workspace profile (None if the profile is in use)."""
+    logger = get_logger()
+    workspace_root = Path(config.get('workspace.root', './workspace'))
+    profile_dir = Path(config.get('runtime.persistent_profile.path') or workspace_root / 'browser-profile').resolve()
+    
+    lock_path = acquire_profile(profile_dir)
+    if lock_path is None:
+        logger.warning(f"Browser profile {profile_dir} is used by another run, using a fresh context")
+        return None
+    
+    args = ['--no-sandbox', '--disable-setuid-sandbox', f"--disk-cache-dir={profile_dir / 'cache'}"]
+    cache_mb = config.get('runtime.persistent_profile.disk_cache_mb', 256)
+    if cache_mb:
+        args.append(f"--disk-cache-size={int(cache_mb) * 1024 * 1024}")
+    # No request routing here (it disables the disk cache): images are turned off by Chromium
+    blocked_types = config.get('runtime.routing.block_resource_types', DEFAULT_BLOCKED_TYPES)
+    if config.get('runtime.routing.enabled', True) and "image" in blocked_types:
+        args.append("--blink-settings=imagesEnabled=false")
+    
+    try:
+        context = playwright.chromium.launch_persistent_context(
+            str(profile_dir),
+            headless=headless,
+            args=args,
+            accept_downloads=True,
+            viewport=viewport,
+            timeout=60000,
+        )
+    except Exception:
+        lock_path.unlink(missing_ok=True)
+        raise
+    _profile_locks[id(context)] = lock_path
+    logger.info(f"Chromium launched with persistent profile {profile_dir}")
+    return context
+
+
 def open_browser(ctx: RunContext, config: Config) -> Tuple[Playwright, Browser, BrowserContext, Page]:
     """Open browser with Playwright sync API.
     
@@ -19,12 +325,14 @@ def open_browser(ctx: RunContext, config: Config) -> Tuple[Playwright, Browser,
         config: Configuration object
         
     Returns:
-        Tuple of (playwright, browser, context, page)
+        Tuple of (playwright, browser, context, page); browser is None with
+        a persistent profile (runtime.persistent_profile)
         
     Raises:
         BrowserError: If browser fails to launch
     """
     logger = get_logger()
+    playwright = browser = context = None
     
     try:
         headless = config.get('runtime.headless', False)
@@ -48,26 +356,41 @@ def open_browser(ctx: RunContext, config: Config) -> Tuple[Playwright, Browser,
         elapsed = time.time() - start_time
         logger.info(f"Playwright started in {elapsed:.2f}s")
         
-        # Launch Chromium browser with timeout and args
-        logger.info("Launching Chromium...")
-        browser = playwright.chromium.launch(
-            headless=headless,
-            args=['--no-sandbox', '--disable-setuid-sandbox'],
-            timeout=60000
-        )
-        logger.info("Chromium launched")
+        if config.get('runtime.persistent_profile.enabled', False):
+            logger.info("Launching Chromium with persistent profile...")
+            context = _launch_persistent(playwright, config, headless, viewport)
         
-        # Create context with download settings and viewport
-        context = browser.new_context(
-            accept_downloads=True,
-            viewport=viewport
-        )
+        if context is None:
+            # Launch Chromium browser with timeout and args
+            logger.info("Launching Chromium...")
+            browser = playwright.chromium.launch(
+                headless=headless,
+                args=['--no-sandbox', '--disable-setuid-sandbox'],
+                timeout=60000
+            )
+            logger.info("Chromium launched")
+            
+            # Create context with download settings and viewport
+            context = browser.new_context(
+                accept_downloads=True,
+                viewport=viewport
+            )
+            
+            # Skip images/fonts/analytics, serve cached bundles (runtime.routing)
+            router = RequestRouter.from_config(config)
+            if router is not None:
+                context.route("**/*", router.handle)
+                logger.info(f"Request routing on (blocked types: {', '.join(sorted(router.blocked_types)) or 'none'})")
         
         # Set default timeout to 30 seconds
         context.set_default_timeout(30000)
         
-        # Create page
-        page = context.new_page()
+        # diagnostics.mode "trace": failures save the trace since the previous capture
+        if trace_enabled():
+            context.tracing.start(snapshots=True)
+        
+        # Create page (a persistent context opens with one)
+        page = context.pages[0] if context.pages else context.new_page()
         logger.info("Page created")
         
         logger.info("Browser opened successfully")
@@ -76,6 +399,9 @@ def open_browser(ctx: RunContext, config: Config) -> Tuple[Playwright, Browser,
         
     except Exception as e:
         logger.error(f"Failed to open browser: {e}", exc_info=True)
+        # Release what was started (and the profile lock)
+        if playwright is not None:
+            close_browser(playwright, browser, context)
         raise BrowserError(f"Failed to open browser: {e}")
 
 
@@ -92,7 +418,13 @@ def close_browser(playwright: Playwright, browser: Browser, context: BrowserCont
     try:
         if context:
             logger.info("Closing browser context")
-            context.close()
+            try:
+                stop_trace(context)
+                context.close()
+            finally:
+                lock_path = _profile_locks.pop(id(context), None)
+                if lock_path is not None:
+                    lock_path.unlink(missing_ok=True)
         
         if browser:
             logger.info("Closing browser")
@@ -1,26 +1,27 @@
 """Command-line interface for APKT Agent."""
 
+import argparse
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Tuple, Optional
-
-import requests
-from playwright.sync_api import sync_playwright, Page, Browser
+from typing import Any, List, Tuple, Optional, TYPE_CHECKING
 
 from . import __version__
 from .config import Config, load_config
 from .logging_ import setup_logger, get_logger
+from .blobstore import setup_blob_store
+from .diagnostics import setup_diagnostics
+from .latency import setup_latency
+from .metrics import flush_metrics, setup_metrics
+from .profiling import PROFILE_MODES, enable_profiling, profile_run
 from .workspace import create_run
 
-# Lazy imports to avoid slow pandas/openpyxl loading at startup
-# from .datasets.se004.multi_download import load_units_selection, run_multi_unit_download
-# from .datasets.se004.bulanan import run_se004_bulanan as run_se004_bulanan_extraction
-# from .datasets.se004.detail_gangguan import (
-#     run_se004_detail_gangguan as run_se004_detail_gangguan_extraction,
-#     load_units_selection as load_units_selection_detail,
-# )
-from .browser.auth import login_apkt
+# Heavy dependencies (playwright, requests, pandas/openpyxl via the dataset
+# modules, gspread) are imported inside the functions that need them, so
+# --help and the configuration summary start instantly.
+# See python -m apkt_agent.bench.imports
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
 
 
 # Indonesian month names
@@ -34,6 +35,8 @@ BULAN_INDONESIA = {
 
 def check_url(url: str, timeout: int = 10) -> Tuple[bool, str]:
     """Check connectivity to a URL."""
+    import requests
+    
     try:
         response = requests.head(url, timeout=timeout, allow_redirects=True)
         return True, f"OK (HTTP {response.status_code})"
@@ -116,16 +119,37 @@ def print_menu(is_logged_in: bool = False, username: Optional[str] = None, confi
     print("\n" + "-" * 60)
 
 
-def perform_login(config: Config) -> Tuple[Optional[Page], Optional[str]]:
+# (playwright, browser, context) of the interactive session opened by perform_login
+_session: Optional[Tuple[Any, Any, Any]] = None
+
+
+def close_session() -> None:
+    """Close the browser of the interactive session (and release its persistent profile)."""
+    global _session
+    if _session is None:
+        return
+    from .browser.driver import close_browser
+    
+    playwright, browser, context = _session
+    _session = None
+    close_browser(playwright, browser, context)
+
+
+def perform_login(config: Config) -> Tuple[Optional["Page"], Optional[str]]:
     """Perform login to APKT system.
     
+    A previous session's browser is closed first.
+    
     Returns:
         Tuple of (page instance, username) or (None, None) if login failed
     """
+    global _session
+    from .browser.auth import login_apkt
     from .browser.driver import open_browser
     from .workspace import create_run
     
     logger = get_logger()
+    close_session()
     
     print("\n" + "=" * 60)
     print("PROSES LOGIN")
@@ -161,6 +185,7 @@ def perform_login(config: Config) -> Tuple[Optional[Page], Optional[str]]:
         
         # Open browser with user's headless preference
         playwright, browser, context, page = open_browser(ctx, config)
+        _session = (playwright, browser, context)
         
         # Perform login
         login_apkt(page, ctx, config)
@@ -199,15 +224,11 @@ def perform_login(config: Config) -> Tuple[Optional[Page], Optional[str]]:
         logger.error(f"Login failed: {e}")
         print(f"\n✗ Login gagal: {e}")
         # Close browser if login failed
-        if page and page.context and page.context.browser:
-            try:
-                page.context.browser.close()
-            except:
-                pass
+        close_session()
         return None, None
 
 
-def check_session_valid(page: Optional[Page]) -> bool:
+def check_session_valid(page: Optional["Page"]) -> bool:
     """Check if current session is still valid."""
     if not page:
         return False
@@ -297,7 +318,7 @@ def run_stub(menu_name: str) -> None:
     input("\nTekan Enter untuk kembali ke menu...")
 
 
-def run_se004_bulanan(config: Config, page: Optional[Page] = None) -> Optional[Page]:
+def run_se004_bulanan(config: Config, page: Optional["Page"] = None) -> Optional["Page"]:
     """Run SE004 monthly report extraction.
     
     Args:
@@ -413,6 +434,8 @@ def run_se004_bulanan(config: Config, page: Optional[Page] = None) -> Optional[P
         print(f"  Total unit      : {results.get('total', 0)}")
         print(f"  ✓ Berhasil      : {results.get('success', 0)}")
         print(f"  ✗ Gagal         : {results.get('failed', 0)}")
+        if results.get('unchanged'):
+            print(f"  = Tidak berubah : {results['unchanged']} (file sebelumnya dipakai ulang)")
         
         # Show failed units with errors
         if results.get('errors'):
@@ -458,7 +481,7 @@ def run_se004_bulanan(config: Config, page: Optional[Page] = None) -> Optional[P
     return page
 
 
-def run_se004_kumulatif(config: Config, page: Optional[Page] = None) -> Optional[Page]:
+def run_se004_kumulatif(config: Config, page: Optional["Page"] = None) -> Optional["Page"]:
     """Run SE004 Kumulatif extraction.
     
     Args:
@@ -562,10 +585,16 @@ def run_se004_kumulatif(config: Config, page: Optional[Page] = None) -> Optional
     print("=" * 60)
     
     try:
-        # Lazy import to avoid slow pandas loading at startup
-        from .datasets.se004.multi_download import run_multi_unit_download
-        
-        results, page = run_multi_unit_download(config, ctx, units, period_ym, page=page)
+        if config.get('runtime.engine', 'sync') == 'async':
+            # Concurrent pages on the async engine, reusing this session's login
+            from .datasets.se004.kumulatif import SE004KumulatifDataset
+            
+            results = SE004KumulatifDataset(config).run_concurrent(ctx, units, page=page)
+        else:
+            # Lazy import to avoid slow pandas loading at startup
+            from .datasets.se004.multi_download import run_multi_unit_download
+            
+            results, page = run_multi_unit_download(config, ctx, units, period_ym, page=page)
         
         # Step 9: Print final summary
         print("\n" + "=" * 60)
@@ -576,6 +605,8 @@ def run_se004_kumulatif(config: Config, page: Optional[Page] = None) -> Optional
         print(f"  Total unit      : {results['total']}")
         print(f"  ✓ Berhasil      : {results['success']}")
         print(f"  ✗ Gagal         : {results['failed']}")
+        if results.get('unchanged'):
+            print(f"  = Tidak berubah : {results['unchanged']} (file sebelumnya dipakai ulang)")
         
         if results.get('rows_parsed'):
             print(f"\n  📄 HASIL PARSING")
@@ -624,7 +655,7 @@ def run_se004_kumulatif(config: Config, page: Optional[Page] = None) -> Optional
     return page
 
 
-def run_se004_detail_gangguan(config: Config, page: Optional[Page] = None) -> Optional[Page]:
+def run_se004_detail_gangguan(config: Config, page: Optional["Page"] = None) -> Optional["Page"]:
     """Run SE004 Detail Kode Gangguan extraction.
     
     Args:
@@ -749,6 +780,8 @@ def run_se004_detail_gangguan(config: Config, page: Optional[Page] = None) -> Op
         print(f"  Total file      : {results.get('total', 0)} (unit × kelompok)")
         print(f"  ✓ Berhasil      : {results.get('success', 0)}")
         print(f"  ✗ Gagal         : {results.get('failed', 0)}")
+        if results.get('unchanged'):
+            print(f"  = Tidak berubah : {results['unchanged']} (file sebelumnya dipakai ulang)")
         
         # Show failed items with errors
         if results.get('errors'):
@@ -780,7 +813,7 @@ def run_se004_detail_gangguan(config: Config, page: Optional[Page] = None) -> Op
     return page
 
 
-def run_koreksi_cleansing(config: Config, page: Optional[Page] = None) -> Optional[Page]:
+def run_koreksi_cleansing(config: Config, page: Optional["Page"] = None) -> Optional["Page"]:
     """Run Koreksi Cleansing report extraction.
     
     Args:
@@ -896,6 +929,8 @@ def run_koreksi_cleansing(config: Config, page: Optional[Page] = None) -> Option
         print(f"  Total unit      : {results.get('total', 0)}")
         print(f"  ✓ Berhasil      : {results.get('success', 0)}")
         print(f"  ✗ Gagal         : {results.get('failed', 0)}")
+        if results.get('unchanged'):
+            print(f"  = Tidak berubah : {results['unchanged']} (file sebelumnya dipakai ulang)")
         
         # Show failed units with errors
         if results.get('errors'):
@@ -941,7 +976,7 @@ def run_koreksi_cleansing(config: Config, page: Optional[Page] = None) -> Option
     return page
 
 
-def handle_menu_choice(choice: str, config: Config, page: Optional[Page] = None) -> Tuple[bool, Optional[Page]]:
+def handle_menu_choice(choice: str, config: Config, page: Optional["Page"] = None) -> Tuple[bool, Optional["Page"]]:
     """Handle menu choice.
     
     Args:
@@ -977,11 +1012,133 @@ def handle_menu_choice(choice: str, config: Config, page: Optional[Page] = None)
         print("\n⚠ Pilihan tidak valid. Silakan coba lagi.")
         return True, page
 
-def main() -> int:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options.
+    
+    Args:
+        argv: Arguments (default: sys.argv[1:])
+    
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="apkt-agent", description="APKT Agent - interactive report downloader")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="stages",
+        choices=PROFILE_MODES,
+        help="Profile the parse/csv_write/sheets_upload stages (default) or each whole run; "
+             "reports are saved to the run's logs/profile/",
+    )
+    parser.add_argument(
+        "--profile-engine",
+        choices=("cprofile", "pyinstrument"),
+        help="Profiler to use (default: pyinstrument if installed, else cProfile)",
+    )
+    
+    # Offline commands over existing run directories (no login/browser)
+    commands = parser.add_subparsers(dest="command", metavar="{parse,upload,prune}")
+    parse_cmd = commands.add_parser("parse", help="Re-parse the Excel files of existing run directories")
+    parse_cmd.add_argument("run_dirs", nargs="+", type=Path, help="Run directories (workspace/runs/<run_id>)")
+    parse_cmd.add_argument("--workers", type=int, default=1, help="Parallel worker processes (default: 1)")
+    parse_cmd.add_argument("--upload", action="store_true", help="Upload each successfully parsed run afterwards")
+    upload_cmd = commands.add_parser("upload", help="Upload the parsed CSV of existing run directories to Google Sheets")
+    upload_cmd.add_argument("run_dirs", nargs="+", type=Path, help="Run directories (workspace/runs/<run_id>)")
+    upload_cmd.add_argument("--force", action="store_true", help="Upload even if reconciliation drift blocks it")
+    prune_cmd = commands.add_parser("prune", help="Apply the retention policy (config: retention) to workspace/runs")
+    prune_cmd.add_argument("--dry-run", action="store_true", help="Only show what would be removed or compressed")
+    return parser.parse_args(argv)
+
+
+def run_offline_command(args: argparse.Namespace, config: Config) -> int:
+    """Run the `parse` / `upload` / `prune` commands (no login or browser).
+    
+    Args:
+        args: Parsed arguments (command, run_dirs, ...)
+        config: Configuration object
+    
+    Returns:
+        Exit code (1 if any run directory failed)
+    """
+    if args.command == "prune":
+        return run_prune(config, dry_run=args.dry_run)
+    
+    from .offline import reparse_runs, upload_run
+    
+    results = []
+    upload_dirs = list(args.run_dirs)
+    if args.command == "parse":
+        print(f"\n🔄 Re-parsing {len(args.run_dirs)} run(s) with {args.workers} worker(s)...")
+        results = reparse_runs(args.run_dirs, config, workers=args.workers)
+        for r in results:
+            if r["success"]:
+                print(f"  ✓ {r['run_dir']}: {r['rows_parsed']:,} rows -> {Path(r['parsed_csv_path']).name}")
+            else:
+                print(f"  ✗ {r['run_dir']}: {r['error']}")
+        upload_dirs = [Path(r["run_dir"]) for r in results if r["success"]] if args.upload else []
+    
+    if upload_dirs:
+        print("\n📤 Uploading to Google Sheets...")
+        for run_dir in upload_dirs:
+            r = upload_run(run_dir, config, force=getattr(args, "force", False))
+            results.append(r)
+            if r["success"]:
+                print(f"  ✓ {r['run_dir']}: {r['row_count']:,} rows -> '{r['worksheet_name']}'")
+            else:
+                print(f"  ✗ {r['run_dir']}: {r['error']}")
+    
+    return 0 if results and all(r["success"] for r in results) else 1
+
+
+def run_prune(config: Config, dry_run: bool = False) -> int:
+    """Apply the workspace retention policy and print what was done.
+    
+    Args:
+        config: Configuration object
+        dry_run: Only show what would be done
+    
+    Returns:
+        Exit code
+    """
+    from .retention import prune_workspace
+    
+    try:
+        report = prune_workspace(config, dry_run=dry_run)
+    except ValueError as e:
+        print(f"\n✗ Invalid retention policy: {e}")
+        return 1
+    
+    verb = "Would free" if dry_run else "Freed"
+    print(f"\n🧹 Retention: {report.runs} run(s), {report.deduped_files} duplicate raw file(s) hardlinked")
+    for action in report.actions:
+        print(f"  - {action['action']:9s} {action['run_id']} ({action['bytes_freed'] / 1024 / 1024:.1f} MB)")
+    if report.blobs_removed:
+        print(f"  - {report.blobs_removed} unreferenced blob(s) removed from the blob store")
+    print(f"  {verb} {report.bytes_freed / 1024 / 1024:.1f} MB")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """Main CLI entry point."""
+    args = parse_args(argv)
+    
     try:
         config = load_config()
         logger = setup_logger()
+        metrics = setup_metrics(config)
+        setup_blob_store(config)
+        setup_latency(config)
+        setup_diagnostics(config)
+        
+        if args.profile:
+            enable_profiling(args.profile, args.profile_engine)
+        
+        if args.command:
+            try:
+                return run_offline_command(args, config)
+            finally:
+                if metrics:
+                    metrics.close()
         
         logger.info("APKT Agent CLI started")
         
@@ -1033,20 +1190,22 @@ def main() -> int:
                 print_menu(is_logged_in, username, config)
                 choice = input("Pilih menu (0-4): ").strip()
                 
-                continue_loop, page = handle_menu_choice(choice, config, page)
+                with profile_run(f"run_menu{choice}"):
+                    continue_loop, page = handle_menu_choice(choice, config, page)
+                flush_metrics()
+                if config.get('retention.auto', False) and choice in ('1', '2', '3', '4'):
+                    run_prune(config)
                 if not continue_loop:
                     break
             
             return 0
         
         finally:
+            if metrics:
+                metrics.close()
+            
             # Cleanup: close browser if it was opened
-            if page and page.context and page.context.browser:
-                try:
-                    page.context.browser.close()
-                    logger.info("Browser session closed")
-                except Exception as e:
-                    logger.warning(f"Error closing browser: {e}")
+            close_session()
     
     except KeyboardInterrupt:
         print("\n\n⚠ Aplikasi dihentikan oleh pengguna.")
@@ -0,0 +1,253 @@
+"""Cached catalogue of the options offered by each report's filters.
+
+Runs used to trust units_selection.yaml blindly: a unit renamed on APKT-SS
+("11 - WILAYAH ACEH" -> "11 - UID ACEH") failed every export of that unit
+after a 10 s select timeout. The catalogue keeps the options of every
+<select> filter per dataset, read from the report page with one evaluate()
+call, and is only refreshed when older than its TTL:
+
+    filter_catalogue:
+      enabled: true
+      path: "./workspace/state/filter_catalogue.json"
+      ttl_hours: 24
+
+The runner refreshes it from the report page it has already opened (no
+extra navigation), then maps each unit to the label currently on the page
+(by option value, then by normalized text) and skips units the page does
+not offer. Menu filters (e.g. the Koreksi Cleansing unit list) have no
+<select> and are not catalogued.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from ..config import Config
+from ..errors import DatasetError
+from ..logging_ import annotate_span, get_logger, span
+from .descriptor import MENU, DatasetDescriptor
+from .planner import DownloadJob, period_labels
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+
+# Options of each <select> (null if missing), placeholders and empty labels left out
+OPTIONS_JS = """
+(selectors) => selectors.map((selector) => {
+    let el = null;
+    try { el = document.querySelector(selector); } catch (e) { return null; }
+    if (!el || el.tagName !== 'SELECT') return null;
+    return Array.from(el.options)
+        .filter((option) => !option.disabled && option.textContent.trim())
+        .map((option) => ({value: option.value, text: option.textContent.trim()}));
+})
+"""
+
+Options = Dict[str, List[Dict[str, str]]]
+
+
+def read_options(page: "Page", descriptor: DatasetDescriptor) -> Options:
+    """Options of the page's select filters, read in one round-trip.
+    
+    Args:
+        page: Playwright page on the report
+        descriptor: Dataset descriptor
+    
+    Returns:
+        Dimension -> list of {value, text}, for the filters found on the page
+    """
+    specs = [spec for spec in descriptor.filters if spec.kind != MENU]
+    with span("filter.catalogue"):
+        try:
+            found = page.evaluate(OPTIONS_JS, [spec.selector for spec in specs])
+        except Exception as e:
+            get_logger().warning(f"Could not read filter options: {e}")
+            return {}
+        options = {spec.dimension: opts for spec, opts in zip(specs, found) if opts}
+        annotate_span(options=sum(len(opts) for opts in options.values()))
+    return options
+
+
+def _normalize(text: str) -> str:
+    return " ".join(str(text).split()).casefold()
+
+
+def map_units(
+    units: List[Dict[str, Any]],
+    options: List[Dict[str, str]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Match units against the unit filter's options.
+    
+    A unit matches an option with the same label, else one with the same
+    value, else one whose label only differs in case or spacing. Matched
+    units get the option's current label.
+    
+    Args:
+        units: List of unit dicts with value, text, code
+        options: Unit filter options ({value, text})
+    
+    Returns:
+        Tuple of (matched units, units without an option)
+    """
+    if not options:
+        return list(units), []
+    
+    by_text = {option["text"]: option for option in options}
+    by_value = {option["value"]: option for option in options if option["value"]}
+    by_normalized = {_normalize(option["text"]): option for option in options}
+    
+    matched, unknown = [], []
+    for unit in units:
+        option = (
+            by_text.get(unit["text"])
+            or by_value.get(str(unit.get("value", "")))
+            or by_normalized.get(_normalize(unit["text"]))
+        )
+        if option is None:
+            unknown.append(unit)
+            continue
+        if option["text"] != unit["text"]:
+            get_logger().info(f"Unit '{unit['text']}' is now labelled '{option['text']}' on the page")
+            # File names keep the code of the configured label
+            unit = dict(unit, text=option["text"], value=option["value"], code=DownloadJob.unit_code_of(unit))
+        matched.append(unit)
+    return matched, unknown
+
+
+def period_offered(options: Options, period_ym: str) -> bool:
+    """Whether the month and year filters offer the period (True if not catalogued)."""
+    for dim, label in period_labels(period_ym).items():
+        labels = {option["text"] for option in options.get(dim, [])}
+        if labels and label not in labels:
+            return False
+    return True
+
+
+class FilterCatalogue:
+    """Filter options per dataset with their fetch time, kept as JSON."""
+    
+    def __init__(self, path: Path, ttl_hours: Optional[float] = 24):
+        """Initialize catalogue.
+        
+        Args:
+            path: Catalogue file (created on first save)
+            ttl_hours: Age after which a dataset's options are read again (None = never)
+        """
+        self.path = Path(path)
+        self.ttl_hours = ttl_hours
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("datasets", {})
+            except (OSError, ValueError) as e:
+                get_logger().warning(f"Ignoring unreadable filter catalogue {self.path}: {e}")
+    
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        if self.ttl_hours is None:
+            return False
+        try:
+            fetched_at = datetime.fromisoformat(entry["fetched_at"])
+        except (KeyError, TypeError, ValueError):
+            return True
+        return datetime.now() - fetched_at > timedelta(hours=self.ttl_hours)
+    
+    def get(self, dataset: str) -> Optional[Options]:
+        """Cached options of a dataset, None if missing or older than the TTL."""
+        entry = self.entries.get(dataset)
+        if not entry or self._expired(entry):
+            return None
+        return entry.get("options", {})
+    
+    def refresh(self, page: "Page", descriptor: DatasetDescriptor) -> Options:
+        """Read the options from the open report page and save them.
+        
+        Args:
+            page: Playwright page on the report
+            descriptor: Dataset descriptor
+        
+        Returns:
+            Options read (an empty read is not saved)
+        """
+        options = read_options(page, descriptor)
+        if options:
+            self.entries[descriptor.name] = {
+                "fetched_at": datetime.now().isoformat(timespec="seconds"),
+                "url": page.url,
+                "options": options,
+            }
+            self.save()
+            get_logger().info(
+                f"Filter catalogue refreshed for {descriptor.name}: "
+                + ", ".join(f"{len(opts)} {dim}" for dim, opts in options.items())
+            )
+        return options
+    
+    def resolve_units(
+        self,
+        page: "Page",
+        descriptor: DatasetDescriptor,
+        period_ym: str,
+        units: List[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """Validate a run's units and period against the filter options.
+        
+        Cached options are used while fresh; they are read again from the page
+        when missing or expired, or when they do not know a unit or the period
+        (the site may have changed since the last refresh).
+        
+        Args:
+            page: Playwright page on the report (already opened)
+            descriptor: Dataset descriptor
+            period_ym: Period in YYYYMM format
+            units: List of unit dicts with value, text, code
+        
+        Returns:
+            Tuple of (units mapped to the page's labels, units not offered)
+        
+        Raises:
+            DatasetError: If the page does not offer the period
+        """
+        options = self.get(descriptor.name)
+        cached = options is not None
+        if options is None:
+            options = self.refresh(page, descriptor)
+        
+        matched, unknown = map_units(units, options.get("unit", []))
+        if cached and (unknown or not period_offered(options, period_ym)):
+            options = self.refresh(page, descriptor) or options
+            matched, unknown = map_units(units, options.get("unit", []))
+        
+        if not period_offered(options, period_ym):
+            raise DatasetError(f"{descriptor.title} does not offer period {period_ym}")
+        return matched, unknown
+    
+    def save(self) -> None:
+        """Write the catalogue atomically (temp file + rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"datasets": self.entries}, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def open_catalogue(config: Config) -> Optional[FilterCatalogue]:
+    """Filter catalogue from config (None if filter_catalogue.enabled is false).
+    
+    Args:
+        config: Configuration object
+    
+    Returns:
+        FilterCatalogue or None
+    """
+    if not config.get('filter_catalogue.enabled', True):
+        return None
+    
+    workspace_root = Path(config.get('workspace.root', './workspace'))
+    path = config.get('filter_catalogue.path') or workspace_root / 'state' / 'filter_catalogue.json'
+    # null = cached options never expire (read directly, Config.get treats null as missing)
+    ttl_hours = (config.data.get('filter_catalogue') or {}).get('ttl_hours', 24)
+    return FilterCatalogue(Path(path), ttl_hours=ttl_hours)
@@ -0,0 +1,89 @@
+"""Declarative description of an APKT-SS report page.
+
+A DatasetDescriptor holds everything the generic runner (runner.py) needs
+to export a report: its URL, the filters on the page and how to set them,
+the filter dimensions to iterate, the file name of each export, the parse
+step and the Google Sheets worksheet. Adding a report is a matter of
+writing its descriptor (see se004/descriptors.py).
+
+Only dataclasses live here, so descriptors can be imported without
+Playwright or pandas (e.g. by the offline parse workers).
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+# Filter kinds
+SELECT = "select"              # native <select>, waited for until visible
+HIDDEN_SELECT = "hidden_select"  # rich-select backed by a hidden <select>, dropdown click as fallback
+MENU = "menu"                  # button opening a list of role=option buttons
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """One filter on a report page."""
+    
+    dimension: str                 # "month", "year", "unit", "kelompok", "status", ...
+    selector: str                  # The <select> (SELECT, HIDDEN_SELECT) or menu button (MENU)
+    kind: str = SELECT
+    triggers: Tuple[str, ...] = ()  # Dropdown openers, first present wins (HIDDEN_SELECT fallback, MENU alternatives)
+    option: str = "text='{label}'"  # Option to click after opening the dropdown
+    timeout_ms: int = 10000
+    settle_ms: int = 1000          # Wait after selecting (cascading selects, data reload)
+    required: bool = True          # False: a failure is logged and the export goes on
+
+
+@dataclass(frozen=True)
+class SheetSink:
+    """Google Sheets worksheet a dataset's parsed CSV is uploaded to."""
+    
+    worksheet_default: str
+    worksheet_key: Optional[str] = None   # google_sheets.<key> overrides the default
+    period_column: str = "period_ym"
+    # Rows to upload (DataFrame -> DataFrame); set = the CSV is uploaded as a DataFrame
+    row_filter: Optional[Callable[[Any], Any]] = None
+    
+    def worksheet_name(self, gs_config: Dict[str, Any]) -> str:
+        if self.worksheet_key:
+            return gs_config.get(self.worksheet_key, self.worksheet_default)
+        return self.worksheet_default
+
+
+@dataclass(frozen=True)
+class DatasetDescriptor:
+    """Everything the generic runner needs to know about one report page."""
+    
+    name: str
+    title: str
+    url: str
+    # Filters in the order they are set; month/year come from the period
+    filters: Tuple[FilterSpec, ...]
+    # Values of filter dimensions other than month/year/unit (e.g. kelompok, status)
+    dimension_values: Dict[str, Tuple[str, ...]] = field(default_factory=dict)
+    # Export file name; fields: period_ym, unit (unit code) and each other dimension (lowercase)
+    filename_template: str = "{name}_{period_ym}_{unit}.xlsx"
+    # Parse step over a run directory: (ctx, options) -> result dict (see se004/parse_steps.parse_options)
+    parse: Optional[Callable[..., Dict[str, Any]]] = None
+    # Glob of the parsed CSV in parsed_dir ({period_ym} is filled in)
+    parsed_csv_pattern: Optional[str] = None
+    sink: Optional[SheetSink] = None
+    # Element that shows the page is rendered (default: the month filter)
+    ready_selector: Optional[str] = None
+    # Wait after the per-export filters are set, before exporting
+    data_wait_ms: int = 2000
+    
+    def filter(self, dimension: str) -> Optional[FilterSpec]:
+        for spec in self.filters:
+            if spec.dimension == dimension:
+                return spec
+        return None
+    
+    def dataset_url(self, config) -> str:
+        """URL from config (datasets.<name>.url), falling back to the descriptor's."""
+        return config.get(f'datasets.{self.name}.url', self.url)
+    
+    def target_filename(self, period_ym: str, unit_code: str, labels: Dict[str, str]) -> str:
+        fields = {dim: str(label).lower() for dim, label in labels.items()}
+        fields.update(name=self.name, period_ym=period_ym, unit=unit_code)
+        return self.filename_template.format(**fields)
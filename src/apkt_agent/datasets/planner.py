@@ -0,0 +1,160 @@
+"""Export job planning: which exports a run makes, and in which order.
+
+Every filter change on a report page costs a server round-trip plus the
+filter's settle wait (the report reloads). plan_jobs() takes the cartesian
+product of the filter dimensions (period x unit x kelompok x status) and
+walks it as a mixed-radix reflected Gray code: consecutive jobs differ in
+exactly one filter, and the filters that are slowest to change are placed
+outermost, so they change least often.
+
+For Detail Gangguan this keeps the kelompok when moving to the next unit
+(..., A/PEMBANGKIT, B/PEMBANGKIT, B/TRANSMISI, ...) instead of resetting it
+to DISTRIBUSI, one select less per unit. The runner additionally skips
+filters already showing the wanted option (see runner.apply_filters).
+"""
+
+from dataclasses import dataclass
+from itertools import permutations
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .descriptor import MENU, DatasetDescriptor, FilterSpec
+
+
+# Fixed cost of one filter change on top of its settle wait (select + server round-trip)
+SELECT_ROUND_TRIP_MS = 300
+
+# Extra cost of filters picked from a dropdown (open it, wait, click the option)
+DROPDOWN_OPEN_MS = 500
+
+
+@dataclass
+class DownloadJob:
+    """One export: a unit and a label for every filter dimension."""
+    
+    unit: Dict[str, Any]
+    labels: Dict[str, str]
+    target_filename: str
+    # Labels of the iterated non-unit dimensions (e.g. the kelompok), None if there are none
+    variant: Optional[str] = None
+    
+    @property
+    def unit_code(self) -> str:
+        return self.unit_code_of(self.unit)
+    
+    @staticmethod
+    def unit_code_of(unit: Dict[str, Any]) -> str:
+        return unit.get("code") or unit["text"].replace(" ", "_").upper()[:20]
+
+
+def period_labels(period_ym: str) -> Dict[str, str]:
+    """Month and year option labels of a YYYYMM period (e.g. Januari, 2025)."""
+    from .se004.schema import BULAN_INDONESIA_REVERSE
+    
+    month_name = BULAN_INDONESIA_REVERSE.get(period_ym[4:6])
+    if not month_name:
+        raise ValueError(f"Invalid period: {period_ym}")
+    return {"month": month_name, "year": period_ym[:4]}
+
+
+def gray_order(radices: Sequence[int]) -> Iterator[Tuple[int, ...]]:
+    """Index tuples of a mixed-radix reflected Gray code.
+    
+    Every tuple of range(radices[0]) x range(radices[1]) x ... is produced
+    once, and consecutive tuples differ in exactly one position. The last
+    position changes fastest.
+    
+    Args:
+        radices: Number of values per position
+    
+    Yields:
+        Index tuples
+    """
+    if not radices:
+        yield ()
+        return
+    tail = list(gray_order(radices[1:]))
+    for i in range(radices[0]):
+        for rest in (tail if i % 2 == 0 else reversed(tail)):
+            yield (i,) + rest
+
+
+def change_cost(spec: FilterSpec) -> int:
+    """Estimated milliseconds to change one filter."""
+    cost = SELECT_ROUND_TRIP_MS + spec.settle_ms
+    if spec.kind == MENU:
+        cost += DROPDOWN_OPEN_MS
+    return cost
+
+
+def order_dimensions(values: Dict[str, Sequence[str]], costs: Dict[str, int]) -> List[str]:
+    """Nesting order of the dimensions (outermost first) with the lowest total change cost.
+    
+    In a Gray-code walk the dimension at depth d is set
+    1 + (n_d - 1) * n_0 * ... * n_(d-1) times (n = number of values), so
+    expensive and many-valued dimensions belong outside.
+    
+    Args:
+        values: Values per dimension
+        costs: Change cost per dimension (ms)
+    
+    Returns:
+        Dimension names, outermost first (ties keep the given order)
+    """
+    best, best_cost = list(values), None
+    for order in permutations(values):
+        total, outer = 0, 1
+        for dim in order:
+            total += costs.get(dim, SELECT_ROUND_TRIP_MS) * (1 + (len(values[dim]) - 1) * outer)
+            outer *= len(values[dim])
+        if best_cost is None or total < best_cost:
+            best, best_cost = list(order), total
+    return best
+
+
+def count_changes(jobs: List[DownloadJob], initial: Optional[Dict[str, str]] = None) -> int:
+    """Filter changes needed to run jobs in order, starting from `initial` selections."""
+    selected = dict(initial or {})
+    changes = 0
+    for job in jobs:
+        for dim, label in job.labels.items():
+            if selected.get(dim) != label:
+                changes += 1
+                selected[dim] = label
+    return changes
+
+
+def plan_jobs(descriptor: DatasetDescriptor, period_ym: str, units: List[Dict[str, Any]]) -> List[DownloadJob]:
+    """One job per unit and combination of the other dimension values, in Gray-code order.
+    
+    Args:
+        descriptor: Dataset descriptor (filters, dimension_values, filename)
+        period_ym: Period in YYYYMM format
+        units: List of unit dicts with text and code
+    
+    Returns:
+        Jobs in export order
+    """
+    units_by_text = {unit["text"]: unit for unit in units}
+    values: Dict[str, Sequence[str]] = {dim: [label] for dim, label in period_labels(period_ym).items()}
+    values["unit"] = list(units_by_text)
+    for spec in descriptor.filters:
+        if spec.dimension in descriptor.dimension_values:
+            values[spec.dimension] = list(descriptor.dimension_values[spec.dimension])
+    
+    costs = {spec.dimension: change_cost(spec) for spec in descriptor.filters}
+    order = order_dimensions(values, costs)
+    other = [dim for dim in values if dim not in ("month", "year", "unit")]
+    iterated = [dim for dim in other if len(values[dim]) > 1]
+    
+    jobs = []
+    for indexes in gray_order([len(values[dim]) for dim in order]):
+        labels = {dim: values[dim][i] for dim, i in zip(order, indexes)}
+        unit = units_by_text[labels["unit"]]
+        other_labels = {dim: labels[dim] for dim in other}
+        jobs.append(DownloadJob(
+            unit=unit,
+            labels=labels,
+            target_filename=descriptor.target_filename(period_ym, DownloadJob.unit_code_of(unit), other_labels),
+            variant="/".join(labels[dim] for dim in iterated) or None,
+        ))
+    return jobs
@@ -1,15 +1,35 @@
-"""Dataset registry and management."""
+"""Dataset registry and management.
 
-from typing import Dict, Type, Optional
+Datasets are registered lazily: the registry stores an import path
+("module:Class") per name and imports the dataset module (and with it
+Playwright, pandas, ...) only when the dataset is first requested.
+Third-party datasets can be added through the "apkt_agent.datasets"
+entry point group.
+"""
+
+import importlib
+from typing import Dict, List, Type, Optional
 
 from ..logging_ import get_logger
 from .base import BaseDataset
 
 
+# Built-in datasets: name -> "module:Class"
+BUILTIN_DATASETS: Dict[str, str] = {
+    "se004_kumulatif": "apkt_agent.datasets.se004.kumulatif:SE004KumulatifDataset",
+    "se004_rolling": "apkt_agent.datasets.se004.rolling:SE004RollingDataset",
+    "se004_gangguan": "apkt_agent.datasets.se004.gangguan:SE004GangguanDataset",
+}
+
+ENTRY_POINT_GROUP = "apkt_agent.datasets"
+
+
 class DatasetRegistry:
     """Registry for all available datasets."""
     
     _datasets: Dict[str, Type[BaseDataset]] = {}
+    _lazy: Dict[str, str] = dict(BUILTIN_DATASETS)
+    _entry_points_loaded = False
     
     @classmethod
     def register(cls, name: str, dataset_class: Type[BaseDataset]) -> None:
@@ -22,6 +42,53 @@ class DatasetRegistry:
         logger = get_logger()
         logger.info(f"Registering dataset: {name}")
         cls._datasets[name] = dataset_class
+        cls._lazy.pop(name, None)
+    
+    @classmethod
+    def register_lazy(cls, name: str, import_path: str) -> None:
+        """Register a dataset by import path, imported on first use.
+        
+        Args:
+            name: Dataset name
+            import_path: "package.module:ClassName"
+        """
+        if name not in cls._datasets:
+            cls._lazy[name] = import_path
+    
+    @classmethod
+    def _load_entry_points(cls) -> None:
+        """Add datasets declared by installed packages (not imported yet)."""
+        if cls._entry_points_loaded:
+            return
+        cls._entry_points_loaded = True
+        try:
+            from importlib.metadata import entry_points
+            
+            for ep in entry_points(group=ENTRY_POINT_GROUP):
+                cls.register_lazy(ep.name, ep.value)
+        except Exception as e:
+            get_logger().warning(f"Failed to read dataset entry points: {e}")
+    
+    @classmethod
+    def _resolve(cls, name: str) -> Optional[Type[BaseDataset]]:
+        """Import a lazily registered dataset."""
+        import_path = cls._lazy.get(name)
+        if import_path is None:
+            return None
+        module_name, _, class_name = import_path.partition(":")
+        dataset_class = getattr(importlib.import_module(module_name), class_name)
+        cls.register(name, dataset_class)
+        return dataset_class
+    
+    @classmethod
+    def names(cls) -> List[str]:
+        """Names of all available datasets, without importing them.
+        
+        Returns:
+            Sorted list of dataset names
+        """
+        cls._load_entry_points()
+        return sorted(set(cls._datasets) | set(cls._lazy))
     
     @classmethod
     def get(cls, name: str) -> Optional[Type[BaseDataset]]:
@@ -33,15 +100,20 @@ class DatasetRegistry:
         Returns:
             Dataset class or None if not found
         """
-        return cls._datasets.get(name)
+        if name in cls._datasets:
+            return cls._datasets[name]
+        cls._load_entry_points()
+        return cls._resolve(name)
     
     @classmethod
     def list(cls) -> Dict[str, Type[BaseDataset]]:
-        """List all registered datasets.
+        """List all registered datasets (imports every dataset; see names()).
         
         Returns:
             Dictionary of dataset name -> class
         """
+        for name in cls.names():
+            cls.get(name)
         return cls._datasets.copy()
     
     @classmethod
@@ -80,15 +152,5 @@ class DatasetRegistry:
 
 
 def register_all_datasets():
-    """Register all available datasets."""
-    from .se004.kumulatif import SE004KumulatifDataset
-    from .se004.rolling import SE004RollingDataset
-    from .se004.gangguan import SE004GangguanDataset
-    
-    DatasetRegistry.register("se004_kumulatif", SE004KumulatifDataset)
-    DatasetRegistry.register("se004_rolling", SE004RollingDataset)
-    DatasetRegistry.register("se004_gangguan", SE004GangguanDataset)
-
-
-# Auto-register on module import
-register_all_datasets()
+    """Import and register all available datasets now (instead of on first use)."""
+    DatasetRegistry.list()
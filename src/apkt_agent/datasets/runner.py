@@ -0,0 +1,666 @@
+"""Generic download runner for APKT-SS report pages.
+
+run_dataset() exports one report page described by a DatasetDescriptor
+(see descriptor.py and se004/descriptors.py):
+
+1. Log in (or reuse the caller's page) and open APKT-SS and the report page
+2. Check the units against the page's filter options (catalogue.py) and
+   plan one job per unit and combination of the other filter dimensions,
+   ordered to change as few filters as possible (planner.py)
+3. For each job, set the filters that are not already in the wanted state,
+   reuse the last export if the report is unchanged (freshness.py) or
+   export it with download_excel; failures are classified and repeated
+   server trouble pauses the run or re-authenticates (browser/breaker.py)
+4. Parse with the descriptor's parse step, upload the parsed CSV to its
+   worksheet (upload.upload_parsed) and write the run manifest
+
+The menu runners (multi_download, bulanan, detail_gangguan,
+koreksi_cleansing) are thin wrappers around it, so download behaviour is
+changed here once for every report.
+"""
+
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from ..browser.auth import login_apkt
+from ..browser.breaker import AUTH, open_breaker
+from ..browser.download import download_excel
+from ..browser.driver import close_browser, open_browser
+from ..config import Config
+from ..errors import BrowserError, NoDataFoundError
+from ..freshness import open_freshness
+from ..latency import record_latency, save_latency, wait_ceiling_ms
+from ..logging_ import get_logger, get_tracer, span, traced
+from ..workspace import RunContext
+from .catalogue import open_catalogue
+from .descriptor import HIDDEN_SELECT, MENU, DatasetDescriptor, FilterSpec
+from .planner import DownloadJob, count_changes, period_labels, plan_jobs
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+
+APKTSS_HOST = "new-apktss.pln.co.id"
+
+# Filter dimensions filled in from the run's period
+PERIOD_DIMENSIONS = ("month", "year")
+
+# Bounds of the adaptive select timeouts (see latency.py)
+MIN_FILTER_TIMEOUT_MS = 3000
+MAX_FILTER_TIMEOUT_MS = 60000
+
+# Excel entry of the Eksport menu (first visible wins)
+EXCEL_OPTION_SELECTORS = [
+    "[role='menuitem']:has-text('Excel')",
+    "button:has-text('Excel')",
+    "a:has-text('Excel')",
+    "div[role='menu'] >> text=Excel",
+    "text='Excel'",
+]
+
+
+@traced("navigate.apktss")
+def navigate_to_apktss(page: "Page") -> None:
+    """Navigate from APKT home to the APKT-SS subdomain.
+    
+    Clicking the APKT-SS tile transfers the session token; the auth redirect
+    (/auth?token=...) is waited out before returning.
+    """
+    logger = get_logger()
+    
+    if APKTSS_HOST in page.url and "/login" not in page.url and "/auth" not in page.url:
+        logger.info("✓ Already on APKT-SS, skipping navigation")
+        return
+    
+    page.wait_for_timeout(2000)
+    
+    apktss_link = page.locator("p:has-text('APKT-SS')").first
+    if apktss_link.count() == 0:
+        logger.warning("APKT-SS link not found, trying direct navigation...")
+        page.goto(f"https://{APKTSS_HOST}/home")
+        page.wait_for_load_state("networkidle")
+        page.wait_for_timeout(2000)
+        return
+    
+    logger.info("✓ Found APKT-SS link, clicking...")
+    apktss_link.click()
+    page.wait_for_load_state("networkidle")
+    page.wait_for_timeout(3000)
+    
+    max_wait = 10
+    for i in range(max_wait):
+        current_url = page.url
+        if f"{APKTSS_HOST}/home" in current_url:
+            logger.info("✓ Successfully on APKT-SS home")
+            break
+        elif "/login" in current_url or "/auth" in current_url:
+            logger.info(f"Auth redirect in progress... ({i+1}/{max_wait})")
+            page.wait_for_timeout(1000)
+        else:
+            logger.info(f"✓ On APKT-SS page: {current_url[:60]}...")
+            break
+    
+    if "/login" in page.url:
+        raise BrowserError("Session expired during navigation to APKT-SS")
+
+
+@traced("navigate.dataset")
+def open_dataset_page(page: "Page", descriptor: DatasetDescriptor, url: str, max_retries: int = 3) -> None:
+    """Open the report page and wait until its filters are rendered.
+    
+    Args:
+        page: Playwright page on APKT-SS
+        descriptor: Dataset descriptor (ready_selector, filters)
+        url: Report page URL
+        max_retries: Navigation attempts
+    """
+    logger = get_logger()
+    
+    for attempt in range(1, max_retries + 1):
+        try:
+            page.goto(url, timeout=60000, wait_until="domcontentloaded")
+            try:
+                page.wait_for_load_state("networkidle", timeout=15000)
+            except Exception:
+                logger.warning("networkidle timeout, continuing anyway...")
+            break
+        except Exception as e:
+            logger.warning(f"⚠ Navigation attempt {attempt}/{max_retries} failed: {e}")
+            if attempt == max_retries:
+                raise
+            page.wait_for_timeout(2000)
+    
+    ready_selector = descriptor.ready_selector or descriptor.filters[0].selector
+    try:
+        page.wait_for_selector(ready_selector, state="attached", timeout=20000)
+        logger.info("✓ Page ready, filters available")
+    except Exception:
+        logger.warning("⚠ Filters not rendered, reloading page...")
+        page.reload()
+        page.wait_for_load_state("networkidle")
+        page.wait_for_timeout(3000)
+
+
+def _first_present(page: "Page", selectors: Tuple[str, ...]):
+    for selector in selectors:
+        locator = page.locator(selector).first
+        if locator.count() > 0:
+            return locator
+    return None
+
+
+def _pick_option(page: "Page", spec: FilterSpec, triggers: Tuple[str, ...], label: str) -> None:
+    """Open a dropdown (first present trigger) and click the option labelled `label`."""
+    trigger = _first_present(page, triggers)
+    if trigger is None:
+        raise BrowserError(f"No {spec.dimension} dropdown found")
+    trigger.wait_for(state="visible", timeout=10000)
+    trigger.click()
+    page.wait_for_timeout(500)
+    
+    option = page.locator(spec.option.format(label=label)).first
+    option.wait_for(state="visible", timeout=5000)
+    option.click()
+
+
+def set_filter(page: "Page", spec: FilterSpec, label: str, dataset: Optional[str] = None) -> bool:
+    """Select `label` in one filter and wait for the page to settle.
+    
+    With a dataset, the select timeout follows the filter's recent response
+    times on that page (see latency.py) instead of spec.timeout_ms.
+    
+    Args:
+        page: Playwright page on the report
+        spec: Filter to set
+        label: Option label
+        dataset: Dataset name, to time the filter and adapt its timeout
+    
+    Returns:
+        True if set; False if a non-required filter could not be set
+    
+    Raises:
+        Exception: If a required filter could not be set
+    """
+    logger = get_logger()
+    operation = f"filter.{spec.dimension}"
+    timeout_ms = spec.timeout_ms
+    if dataset:
+        timeout_ms = wait_ceiling_ms(dataset, operation, spec.timeout_ms, MIN_FILTER_TIMEOUT_MS, MAX_FILTER_TIMEOUT_MS)
+    started = time.monotonic()
+    
+    try:
+        if spec.kind == MENU:
+            _pick_option(page, spec, (spec.selector,) + spec.triggers, label)
+        elif spec.kind == HIDDEN_SELECT:
+            select = page.locator(spec.selector).first
+            try:
+                select.select_option(label=label, timeout=timeout_ms)
+            except Exception:
+                logger.info(f"Hidden {spec.dimension} select failed, trying dropdown...")
+                _pick_option(page, spec, spec.triggers, label)
+        else:
+            select = page.locator(spec.selector).first
+            select.wait_for(state="visible", timeout=timeout_ms)
+            select.select_option(label=label)
+        logger.info(f"✓ {spec.dimension.capitalize()} selected: {label}")
+        if dataset:
+            record_latency(dataset, operation, (time.monotonic() - started) * 1000)
+    except Exception as e:
+        elapsed_ms = (time.monotonic() - started) * 1000
+        if dataset and elapsed_ms >= timeout_ms:
+            record_latency(dataset, operation, elapsed_ms, timed_out=True)
+        if spec.required:
+            logger.error(f"✗ Failed to select {spec.dimension} '{label}': {e}")
+            raise
+        logger.warning(f"⚠ Could not set {spec.dimension} filter: {e}")
+        return False
+    
+    page.wait_for_timeout(spec.settle_ms)
+    return True
+
+
+# Selected option label of each <select> (null if missing or on its placeholder)
+_SELECTED_LABELS_JS = """
+(selectors) => selectors.map((selector) => {
+    let el = null;
+    try { el = document.querySelector(selector); } catch (e) { return null; }
+    if (!el || el.tagName !== 'SELECT' || el.selectedIndex < 0) return null;
+    const option = el.options[el.selectedIndex];
+    return option.disabled ? null : option.textContent.trim();
+})
+"""
+
+
+def read_selected(page: "Page", descriptor: DatasetDescriptor) -> Dict[str, str]:
+    """Labels the page's select filters currently show, read in one round-trip.
+    
+    Menu filters have no <select> and are left out (treated as unknown).
+    
+    Args:
+        page: Playwright page on the report
+        descriptor: Dataset descriptor
+    
+    Returns:
+        Dimension -> selected label, for the filters that show one
+    """
+    specs = [spec for spec in descriptor.filters if spec.kind != MENU]
+    try:
+        labels = page.evaluate(_SELECTED_LABELS_JS, [spec.selector for spec in specs])
+    except Exception as e:
+        get_logger().debug(f"Could not read selected filters: {e}")
+        return {}
+    return {spec.dimension: label for spec, label in zip(specs, labels) if label}
+
+
+def apply_filters(
+    page: "Page",
+    descriptor: DatasetDescriptor,
+    labels: Dict[str, str],
+    current: Optional[Dict[str, str]] = None,
+) -> int:
+    """Set the filters of a job, skipping those already in the wanted state.
+    
+    The period (month, year) is set first, then the other filters in
+    descriptor order.
+    
+    Args:
+        page: Playwright page on the report
+        descriptor: Dataset descriptor
+        labels: Wanted option label per dimension
+        current: Labels currently selected on the page, updated in place
+            (None = set every filter)
+    
+    Returns:
+        Number of filters set
+    """
+    current = {} if current is None else current
+    pending = [
+        spec for spec in descriptor.filters
+        if spec.dimension in labels and current.get(spec.dimension) != labels[spec.dimension]
+    ]
+    
+    period = [spec for spec in pending if spec.dimension in PERIOD_DIMENSIONS]
+    if period:
+        with span("filter.period"):
+            for spec in period:
+                set_filter(page, spec, labels[spec.dimension], dataset=descriptor.name)
+                current[spec.dimension] = labels[spec.dimension]
+    
+    for spec in pending:
+        if spec.dimension not in PERIOD_DIMENSIONS:
+            with span(f"filter.{spec.dimension}"):
+                set_filter(page, spec, labels[spec.dimension], dataset=descriptor.name)
+                # A non-required filter that failed is not retried for every job
+                current[spec.dimension] = labels[spec.dimension]
+    return len(pending)
+
+
+@traced("export_click")
+def click_export_excel(page: "Page") -> None:
+    """Open the Eksport menu and click its Excel entry."""
+    logger = get_logger()
+    
+    export_btn = page.locator("#headlessui-menu-button-v-2, button:has-text('Eksport')").first
+    export_btn.wait_for(state="visible", timeout=5000)
+    export_btn.click()
+    page.wait_for_timeout(500)
+    
+    for selector in EXCEL_OPTION_SELECTORS:
+        try:
+            excel_option = page.locator(selector).first
+            excel_option.wait_for(state="visible", timeout=2000)
+            excel_option.click()
+            logger.info(f"✓ Excel option clicked ({selector})")
+            return
+        except Exception:
+            continue
+    raise BrowserError("Excel option not found in Eksport menu")
+
+
+def _reauthenticate(page: "Page", ctx: RunContext, config: Config, descriptor: DatasetDescriptor, url: str) -> None:
+    """Log in again after the session expired and reopen the report page."""
+    get_logger().warning("Session expired during export, re-authenticating...")
+    login_apkt(page, ctx, config)
+    navigate_to_apktss(page)
+    open_dataset_page(page, descriptor, url)
+
+
+def _error(job: DownloadJob, descriptor: DatasetDescriptor, message: str) -> Dict[str, Any]:
+    error = {"unit": job.unit["text"]}
+    for dim, values in descriptor.dimension_values.items():
+        if len(values) > 1:
+            error[dim] = job.labels[dim]
+    error["error"] = message
+    return error
+
+
+def run_dataset(
+    descriptor: DatasetDescriptor,
+    config: Config,
+    ctx: RunContext,
+    period_ym: str,
+    units: List[Dict[str, Any]],
+    page: Optional["Page"] = None,
+) -> Tuple[Dict[str, Any], Optional["Page"]]:
+    """Download, parse and upload one report for the given units.
+    
+    Args:
+        descriptor: Dataset descriptor
+        config: Configuration object
+        ctx: Run context
+        period_ym: Period in YYYYMM format
+        units: List of unit dicts with value, text, code
+        page: Logged-in page to reuse (None = open a browser and log in;
+            it is closed again at the end)
+    
+    Returns:
+        Tuple of (results dict, page) for session reuse
+    """
+    logger = get_logger()
+    dataset_url = descriptor.dataset_url(config)
+    jobs = plan_jobs(descriptor, period_ym, units)
+    period = period_labels(period_ym)
+    
+    results: Dict[str, Any] = {
+        "total": len(jobs),
+        "success": 0,
+        "failed": 0,
+        "period": period_ym,
+        "files": [],
+        "errors": [],
+        "rows_parsed": 0,
+        "parsed_csv_path": None,
+        "filter_changes": 0,
+    }
+    
+    playwright = browser = context = None
+    breaker = None
+    
+    try:
+        print("\n" + "=" * 60)
+        print(f"{descriptor.title}: {period['month']} {period['year']} ({period_ym})")
+        print(f"Units: {len(units)} | Files: {len(jobs)}")
+        print("=" * 60)
+        
+        if page is None:
+            playwright, browser, context, page = open_browser(ctx, config)
+            print("Browser opened, starting authentication...")
+            login_apkt(page, ctx, config)
+            print("✓ Authentication successful\n")
+        else:
+            print("Using existing browser session...\n")
+        
+        print("Navigating to APKT-SS...")
+        navigate_to_apktss(page)
+        print(f"Navigating to {descriptor.title}...")
+        open_dataset_page(page, descriptor, dataset_url)
+        
+        # Units checked against the page's unit options (cached, see catalogue.py)
+        catalogue = open_catalogue(config)
+        if catalogue is not None:
+            offered, unknown = catalogue.resolve_units(page, descriptor, period_ym, units)
+            for unit in unknown:
+                print(f"⚠ Skipped {unit['text']}: not offered by the unit filter")
+                results["failed"] += len(plan_jobs(descriptor, period_ym, [unit]))
+                results["errors"].append({"unit": unit["text"], "error": "Unit not offered by the unit filter"})
+            jobs = plan_jobs(descriptor, period_ym, offered)
+        
+        # Filters already showing the wanted option (e.g. the current year) are not set
+        selected = read_selected(page, descriptor)
+        logger.info(
+            f"Plan: {len(jobs)} exports, {count_changes(jobs, selected)} filter changes "
+            f"(selected on page: {selected or 'none'})"
+        )
+        
+        # Units whose on-screen report is unchanged reuse their last export
+        freshness = open_freshness(config, ctx)
+        
+        # Failed exports are classified; repeated server trouble pauses the run (see breaker.py)
+        breaker = open_breaker(config)
+        breaker.watch(page)
+        
+        pending = deque(jobs)
+        session_expired = False
+        while pending:
+            job = pending.popleft()
+            if breaker.stopped or session_expired:
+                reason = "session expired" if session_expired else "APKT-SS not responding (circuit open)"
+                results["failed"] += 1
+                results["errors"].append(_error(job, descriptor, f"Skipped: {reason}"))
+                continue
+            
+            print("\n" + "-" * 60)
+            position = len(jobs) - len(pending)
+            print(f"[{position}/{len(jobs)}] {job.unit['text']}" + (f" / {job.variant}" if job.variant else ""))
+            print("-" * 60)
+            
+            if breaker.wait_if_open():
+                # Probe with a freshly loaded report page
+                selected.clear()
+                try:
+                    open_dataset_page(page, descriptor, dataset_url)
+                except Exception as e:
+                    logger.warning(f"Could not reload {descriptor.title}: {e}")
+            
+            with span("unit", unit=job.unit_code):
+                breaker.begin_job()
+                try:
+                    try:
+                        results["filter_changes"] += apply_filters(page, descriptor, job.labels, selected)
+                    except Exception:
+                        # Page state unknown: set every filter again for the next job
+                        selected.clear()
+                        raise
+                    page.wait_for_timeout(descriptor.data_wait_ms)
+                    
+                    reused_path = freshness.reuse_if_unchanged(
+                        page, job.unit_code, job.target_filename, kelompok=job.variant
+                    )
+                    if reused_path:
+                        print(f"✓ Unchanged since last run, reused: {job.target_filename}")
+                        breaker.record_success()
+                        results["success"] += 1
+                        results["unchanged"] = freshness.unchanged
+                        results["files"].append(str(reused_path))
+                        continue
+                    
+                    downloaded_path = download_excel(
+                        page=page,
+                        ctx=ctx,
+                        click_export_fn=lambda: click_export_excel(page),
+                        target_filename=job.target_filename,
+                        max_attempts=breaker.attempts(3),
+                    )
+                    breaker.record_success()
+                    freshness.record(job.unit_code, downloaded_path, kelompok=job.variant)
+                    print(f"✓ Downloaded: {job.target_filename}")
+                    results["success"] += 1
+                    results["files"].append(str(downloaded_path))
+                
+                except NoDataFoundError as e:
+                    breaker.record_failure(breaker.classify(e))
+                    print("⚠ Skipped (no data)")
+                    results["failed"] += 1
+                    results["errors"].append(_error(job, descriptor, "Data tidak ditemukan"))
+                
+                except Exception as e:
+                    kind = breaker.classify(e, page)
+                    if kind == AUTH and breaker.can_reauthenticate():
+                        print("⚠ Session expired, logging in again...")
+                        try:
+                            _reauthenticate(page, ctx, config, descriptor, dataset_url)
+                        except Exception as login_error:
+                            # Failed login (wrong OTP, IAM down): this unit fails below, the rest are skipped
+                            logger.error(f"Re-authentication failed: {login_error}")
+                            e = login_error
+                        else:
+                            selected.clear()
+                            pending.appendleft(job)
+                            continue
+                    if kind == AUTH:
+                        # No re-login left (or it failed): the remaining units are skipped, the downloaded files still parsed
+                        logger.error(f"Session expired during export: {e}")
+                        session_expired = True
+                    
+                    print(f"✗ Failed ({kind}): {e}")
+                    breaker.record_failure(kind)
+                    results["failed"] += 1
+                    error = _error(job, descriptor, str(e))
+                    error["failure"] = kind
+                    results["errors"].append(error)
+        
+        results["circuit_breaker"] = breaker.summary()
+        _parse_and_upload(descriptor, config, ctx, results)
+        _write_manifest(descriptor, ctx, period_ym, dataset_url, units, results)
+        return results, page
+    
+    except Exception as e:
+        logger.error(f"{descriptor.title} extraction failed: {e}")
+        raise
+    
+    finally:
+        save_latency()
+        if breaker is not None:
+            breaker.unwatch(page)
+        # Only close the browser if it was opened here
+        if playwright or browser or context:
+            close_browser(playwright, browser, context)
+
+
+def _parse_and_upload(
+    descriptor: DatasetDescriptor,
+    config: Config,
+    ctx: RunContext,
+    results: Dict[str, Any],
+    parse: Optional[Callable[..., Dict[str, Any]]] = None,
+) -> None:
+    """Parse the run's workbooks and upload the parsed CSV, recording both in results.
+    
+    Args:
+        descriptor: Dataset descriptor
+        config: Configuration object
+        ctx: Run context
+        results: Results dict of the run (updated in place)
+        parse: Parse step to use instead of descriptor.parse (same signature)
+    """
+    from .se004.parse_steps import parse_options
+    from .upload import upload_parsed
+    
+    logger = get_logger()
+    parse = parse or descriptor.parse
+    if parse is None or not results["files"]:
+        return
+    
+    print("\n" + "=" * 60)
+    print("PARSING DOWNLOADED FILES")
+    print("=" * 60)
+    try:
+        parsed = parse(ctx, parse_options(config))
+    except Exception as e:
+        logger.error(f"Parsing failed: {e}")
+        print(f"✗ Parsing failed: {e}")
+        return
+    
+    results["rows_parsed"] = parsed["rows_parsed"]
+    results["parsed_csv_path"] = parsed["parsed_csv_path"]
+    results["files_parsed"] = parsed.get("files_parsed", 0)
+    results["validation_report"] = parsed.get("validation_report")
+    results["validation_warnings"] = parsed.get("warnings", [])
+    if "reconciliation_drift" in parsed:
+        results["reconciliation_drift"] = parsed["reconciliation_drift"]
+    if "memory" in parsed:
+        results["memory"] = parsed["memory"]
+    print(f"✓ Parsed {results['rows_parsed']:,} rows from {results['files_parsed']} files")
+    print(f"✓ CSV saved: {Path(results['parsed_csv_path']).name}")
+    if results["validation_warnings"]:
+        print(f"\n⚠ Validation warnings: {len(results['validation_warnings'])}")
+        for w in results["validation_warnings"][:5]:
+            print(f"  - {w}")
+    
+    gs_config = config.data.get('google_sheets', {})
+    if descriptor.sink is None or not gs_config.get('enabled', False):
+        return
+    
+    print("\n" + "-" * 60)
+    print("UPLOADING TO GOOGLE SHEETS")
+    print("-" * 60)
+    try:
+        upload = upload_parsed(ctx, config, Path(results["parsed_csv_path"]))
+        results["sheet_uploaded"] = upload["success"]
+        results["sheet_worksheet"] = upload["worksheet_name"]
+        results["sheet_row_count"] = upload["row_count"]
+        if upload["success"]:
+            print(f"✓ Uploaded {upload['row_count']:,} rows to '{upload['worksheet_name']}'")
+        else:
+            results["sheet_error"] = upload.get("error")
+            print(f"⚠ Upload failed: {results['sheet_error']}")
+    except Exception as e:
+        logger.warning(f"Google Sheets upload failed: {e}")
+        print(f"⚠ Upload failed: {e}")
+        results["sheet_uploaded"] = False
+        results["sheet_error"] = str(e)
+
+
+def _write_manifest(
+    descriptor: DatasetDescriptor,
+    ctx: RunContext,
+    period_ym: str,
+    dataset_url: str,
+    units: List[Dict[str, Any]],
+    results: Dict[str, Any],
+) -> None:
+    period = period_labels(period_ym)
+    manifest = {
+        # Keys written by the former per-page runners, kept for existing readers
+        "type": descriptor.name,
+        "period": period_ym,
+        "month": period["month"],
+        "year": period["year"],
+        "download_date": ctx.snapshot_date,
+        "files_downloaded": len(results["files"]),
+        "rows_parsed": results["rows_parsed"],
+        "parsed_csv": results["parsed_csv_path"],
+        "run_id": ctx.run_id,
+        "dataset": descriptor.name,
+        "period_ym": period_ym,
+        "snapshot_date": ctx.snapshot_date,
+        "url": dataset_url,
+        "units_count": len(units),
+        "files_expected": results["total"],
+        "filter_changes": results["filter_changes"],
+        "circuit_breaker": results.get("circuit_breaker"),
+        "downloaded_files": [Path(f).name for f in results["files"]],
+        "unchanged_units": results.get("unchanged", 0),
+        "errors": results["errors"],
+        "parsed_csv_path": results["parsed_csv_path"],
+        "row_count": results["rows_parsed"],
+        "files_parsed": results.get("files_parsed", 0),
+        "validation_report": results.get("validation_report"),
+        "validation_warnings": len(results.get("validation_warnings", [])),
+        "timings": get_tracer().summary(),
+    }
+    # e.g. kelompok_count for Detail Gangguan
+    for dim, values in descriptor.dimension_values.items():
+        manifest[f"{dim}_count"] = len(values)
+    if "engine" in results:
+        manifest["engine"] = results["engine"]
+    if "reconciliation_drift" in results:
+        manifest["reconciliation_drift"] = results["reconciliation_drift"]
+    if "memory" in results:
+        manifest["memory"] = results["memory"]
+    if "sheet_uploaded" in results:
+        manifest["google_sheets"] = {
+            "enabled": True,
+            "uploaded": results["sheet_uploaded"],
+            "worksheet_name": results.get("sheet_worksheet"),
+            "row_count": results.get("sheet_row_count"),
+            "error": results.get("sheet_error"),
+        }
+    
+    manifest_path = ctx.run_dir / "manifest.json"
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    get_logger().info(f"Manifest saved: {manifest_path}")
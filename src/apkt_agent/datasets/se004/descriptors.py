@@ -0,0 +1,132 @@
+"""Descriptors of the APKT-SS report pages exported by the menu runners.
+
+Each descriptor feeds datasets/runner.py (download loop), offline.py
+(parse and upload of existing runs) and the download benchmark. Parse
+steps are in parse_steps.py. Selectors
+and waits are those the original per-page runners used.
+"""
+
+from typing import Dict, List, Optional
+
+from ..descriptor import HIDDEN_SELECT, MENU, DatasetDescriptor, FilterSpec, SheetSink
+from .parse_steps import parse_detail_gangguan, parse_koreksi_cleansing, parse_se004_kumulatif
+
+
+APKTSS_HOME = "https://new-apktss.pln.co.id/home"
+
+# Kelompok options for Detail Gangguan
+KELOMPOK = ("DISTRIBUSI", "TRANSMISI", "PEMBANGKIT")
+
+
+def _reported_jp(df):
+    """Detail gangguan rows uploaded to Sheets: no_laporan starting with J or P."""
+    return df[df['no_laporan'].astype(str).str.upper().str.match(r'^[JP]')]
+
+
+SE004_KUMULATIF = DatasetDescriptor(
+    name="se004_kumulatif",
+    title="SE004 Kumulatif",
+    url=f"{APKTSS_HOME}/laporan-saidi-saifi-kumulatif-se004",
+    filters=(
+        FilterSpec("month", "select[name='vc-component-4']", timeout_ms=15000, settle_ms=500),
+        FilterSpec("year", "select[name='vc-component-6']", settle_ms=500),
+        FilterSpec("unit", "select#unitInduk, select[name='unitInduk']"),
+    ),
+    filename_template="se004_kumulatif_{period_ym}_{unit}.xlsx",
+    parse=parse_se004_kumulatif,
+    parsed_csv_pattern="se004_kumulatif_{period_ym}_*.csv",
+    sink=SheetSink("se004_kumulatif", worksheet_key="worksheet_name"),
+)
+
+SE004_BULANAN = DatasetDescriptor(
+    name="se004_bulanan",
+    title="SE004 Monthly Report",
+    url=f"{APKTSS_HOME}/laporan-saidi-saifi-se004",
+    filters=(
+        FilterSpec("month", "select[name='vc-component-4']", timeout_ms=20000, settle_ms=500),
+        FilterSpec("year", "select[name='vc-component-6']", timeout_ms=20000, settle_ms=3000),
+        FilterSpec("unit", "select#unitInduk, select[name='unitInduk']"),
+    ),
+    filename_template="se004_bulanan_{period_ym}_{unit}.xlsx",
+    parse=parse_se004_kumulatif,
+    parsed_csv_pattern="se004_bulanan_{period_ym}.csv",
+    sink=SheetSink("se004_bulanan", worksheet_key="worksheet_name_bulanan"),
+)
+
+# Menu 3: rich selects backed by hidden <select>s, period on vc-component-9/11
+SE004_DETAIL_GANGGUAN = DatasetDescriptor(
+    name="se004_detail_gangguan",
+    title="SE004 Detail Kode Gangguan",
+    url=f"{APKTSS_HOME}/laporan-detil-kode-gangguan-se004",
+    filters=(
+        FilterSpec(
+            "month", "select[name='vc-component-9'], select#vc-component-9", kind=HIDDEN_SELECT,
+            triggers=("h3:has-text('Periode') >> xpath=.. >> div[data-rich-select-focusable] >> nth=0",),
+            timeout_ms=5000, settle_ms=500,
+        ),
+        FilterSpec(
+            "year", "select[name='vc-component-11'], select#vc-component-11", kind=HIDDEN_SELECT,
+            triggers=("h3:has-text('Periode') >> xpath=.. >> div[data-rich-select-focusable] >> nth=1",),
+            timeout_ms=5000, settle_ms=2000,
+        ),
+        FilterSpec(
+            "unit", "select#unitInduk, select[name='unitInduk']", kind=HIDDEN_SELECT,
+            triggers=(
+                "label[for='unitInduk'] >> xpath=.. >> div[data-rich-select-focusable]",
+                "span:has-text('Pilih Unit Induk')",
+            ),
+            timeout_ms=3000, settle_ms=1500,
+        ),
+        FilterSpec(
+            "kelompok", "select#kelompok, select[name='kelompok']", kind=HIDDEN_SELECT,
+            triggers=(
+                "label[for='kelompok'] >> xpath=.. >> div[data-rich-select-focusable]",
+                "span:has-text('Pilih Kelompok'), span:has-text('-- Pilih Kelompok')",
+            ),
+            timeout_ms=3000, required=False,
+        ),
+    ),
+    dimension_values={"kelompok": KELOMPOK},
+    filename_template="se004_detail_{period_ym}_{unit}_{kelompok}.xlsx",
+    parse=parse_detail_gangguan,
+    parsed_csv_pattern="se004_detail_gangguan_*_combined.csv",
+    sink=SheetSink("detilTM_komulatif", period_column="period", row_filter=_reported_jp),
+    ready_selector="select[name='vc-component-9']",
+)
+
+# Menu 4: unit picked from a button list, status on vc-component-8
+KOREKSI_CLEANSING = DatasetDescriptor(
+    name="koreksi_cleansing",
+    title="Koreksi Cleansing Report",
+    url=f"{APKTSS_HOME}/laporan-koreksi-dan-cleansing",
+    filters=(
+        FilterSpec("month", "select[name='vc-component-4']", timeout_ms=20000, settle_ms=500),
+        FilterSpec("year", "select[name='vc-component-6']", timeout_ms=20000, settle_ms=3000),
+        FilterSpec("status", "select[name='vc-component-8']", required=False),
+        FilterSpec(
+            "unit", "button:has-text('Pilih Unit Induk')", kind=MENU,
+            triggers=("label:has-text('Wilayah/Distribusi') + div button",),
+            option="button[role='option']:has-text('{label}')",
+        ),
+    ),
+    dimension_values={"status": ("Semua Data",)},
+    filename_template="koreksi_cleansing_{period_ym}_{unit}.xlsx",
+    parse=parse_koreksi_cleansing,
+    parsed_csv_pattern="koreksi_cleansing_{period_ym}.csv",
+    sink=SheetSink("koreksi_cleansing", worksheet_key="worksheet_name_koreksi_cleansing"),
+)
+
+DESCRIPTORS: Dict[str, DatasetDescriptor] = {
+    descriptor.name: descriptor
+    for descriptor in (SE004_KUMULATIF, SE004_BULANAN, SE004_DETAIL_GANGGUAN, KOREKSI_CLEANSING)
+}
+
+
+def get_descriptor(name: str) -> Optional[DatasetDescriptor]:
+    """Descriptor of a dataset by name (None if the dataset has none)."""
+    return DESCRIPTORS.get(name)
+
+
+def names() -> List[str]:
+    """Datasets with a descriptor."""
+    return sorted(DESCRIPTORS)
@@ -8,10 +8,13 @@ from ...browser.auth import login_apkt
 from ...browser.driver import open_browser, close_browser
 from ...workspace import RunContext
 from ...config import Config
+from ..catalogue import OPTIONS_JS, open_catalogue, read_options
+from ..runner import navigate_to_apktss, open_dataset_page
+from .descriptors import SE004_KUMULATIF
 
 
 def extract_select_options(page, selector: str) -> list[dict[str, str]]:
-    """Extract all options from a select element.
+    """Extract all options from a select element in one round-trip.
     
     Args:
         page: Playwright page object
@@ -20,34 +23,19 @@ def extract_select_options(page, selector: str) -> list[dict[str, str]]:
     Returns:
         List of dicts with 'value' and 'text' keys
     """
-    options = []
     try:
-        select_elem = page.locator(selector).first
-        if select_elem.count() == 0:
-            return options
-            
-        # Get all option elements
-        option_elems = select_elem.locator("option")
-        count = option_elems.count()
-        
-        for i in range(count):
-            opt = option_elems.nth(i)
-            value = opt.get_attribute("value") or ""
-            text = opt.inner_text().strip()
-            if text:  # Skip empty options
-                options.append({
-                    "value": value,
-                    "text": text,
-                })
+        return page.evaluate(OPTIONS_JS, [selector])[0] or []
     except Exception as e:
         print(f"Error extracting options from {selector}: {e}")
-    
-    return options
+        return []
 
 
 def extract_se004_filters(config: Config, ctx: RunContext) -> dict[str, Any]:
     """Extract all filter options from SE004 Kumulatif page.
     
+    The options are also stored in the filter catalogue (see
+    datasets/catalogue.py), so the next runs start with fresh options.
+    
     Args:
         config: Configuration object
         ctx: Run context
@@ -55,21 +43,12 @@ def extract_se004_filters(config: Config, ctx: RunContext) -> dict[str, Any]:
     Returns:
         Dict with all filter options
     """
-    dataset_url = config.get(
-        'datasets.se004_kumulatif.url',
-        'https://new-apktss.pln.co.id/home/laporan-saidi-saifi-kumulatif-se004'
-    )
+    dataset_url = SE004_KUMULATIF.dataset_url(config)
     
     playwright = None
     browser = None
     context = None
     
-    filters = {
-        "unit_induk": [],
-        "bulan": [],
-        "tahun": [],
-    }
-    
     try:
         # Step 1: Open browser
         playwright, browser, context, page = open_browser(ctx, config)
@@ -81,32 +60,28 @@ def extract_se004_filters(config: Config, ctx: RunContext) -> dict[str, Any]:
         
         # Step 3: Navigate to APKT-SS
         print("Navigating to APKT-SS...")
-        _navigate_to_apktss(page)
+        navigate_to_apktss(page)
         
         # Step 4: Navigate to SE004 Kumulatif page
         print(f"Navigating to: {dataset_url}")
-        page.goto(dataset_url)
-        page.wait_for_load_state("networkidle")
-        page.wait_for_timeout(3000)  # Wait for Angular/React to render
-        
+        open_dataset_page(page, SE004_KUMULATIF, dataset_url)
         print(f"Current URL: {page.url}")
         
-        # Step 5: Extract filter options
+        # Step 5: Extract all filter options at once
         print("\n=== EXTRACTING FILTER OPTIONS ===\n")
+        catalogue = open_catalogue(config)
+        if catalogue is not None:
+            options = catalogue.refresh(page, SE004_KUMULATIF)
+        else:
+            options = read_options(page, SE004_KUMULATIF)
         
-        # Unit Induk dropdown
-        print("Extracting Unit Induk options...")
-        filters["unit_induk"] = extract_select_options(page, "select#unitInduk")
+        filters = {
+            "unit_induk": options.get("unit", []),
+            "bulan": options.get("month", []),
+            "tahun": options.get("year", []),
+        }
         print(f"Found {len(filters['unit_induk'])} unit options")
-        
-        # Bulan (Month) dropdown
-        print("Extracting Bulan (Month) options...")
-        filters["bulan"] = extract_select_options(page, "select[name='vc-component-4']")
         print(f"Found {len(filters['bulan'])} month options")
-        
-        # Tahun (Year) dropdown
-        print("Extracting Tahun (Year) options...")
-        filters["tahun"] = extract_select_options(page, "select[name='vc-component-6']")
         print(f"Found {len(filters['tahun'])} year options")
         
         return filters
@@ -120,27 +95,6 @@ def extract_se004_filters(config: Config, ctx: RunContext) -> dict[str, Any]:
             close_browser(playwright, browser, context)
 
 
-def _navigate_to_apktss(page) -> None:
-    """Navigate from APKT home to APKT-SS subdomain."""
-    if "new-apktss.pln.co.id" in page.url:
-        return
-    
-    page.wait_for_timeout(2000)
-    
-    # Click APKT-SS card
-    apktss = page.locator("p:has-text('APKT-SS')").first
-    if apktss:
-        apktss.click()
-        try:
-            page.wait_for_url("**/new-apktss.pln.co.id/**", timeout=15000)
-        except Exception:
-            page.wait_for_load_state("networkidle")
-            page.wait_for_timeout(2000)
-    
-    if "new-apktss.pln.co.id" not in page.url:
-        raise Exception(f"Failed to navigate to APKT-SS. Current URL: {page.url}")
-
-
 def save_filters_to_json(filters: dict, output_path: Path) -> None:
     """Save filter options to JSON file.
     
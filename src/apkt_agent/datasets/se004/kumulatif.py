@@ -1,17 +1,22 @@
 """SE004 Kumulatif dataset implementation."""
 
-import json
+import asyncio
+import functools
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from ...browser.auth import login_apkt
-from ...browser.download import download_excel
-from ...browser.driver import open_browser, close_browser
+from ...logging_ import span
 from ...models import DownloadedFile, ParsedData
 from ...workspace import RunContext
 from ..base import BaseDataset, RunResult
-from .parser import list_excel_files, parse_all_excel_files, save_csv_indonesian_format
-from ...transform.validate import validate_se004_kumulatif
+from .descriptors import SE004_KUMULATIF
+from .parser import parse_se004_kumulatif_xlsx
+
+if TYPE_CHECKING:
+    from ...browser.async_engine import ExportJob, ExportOutcome
 
 
 # Indonesian month names for period conversion
@@ -53,7 +58,7 @@ class SE004KumulatifDataset(BaseDataset):
     description = "SAIDI/SAIFI Kumulatif Report"
     
     def run(self, ctx: RunContext) -> RunResult:
-        """Run SE004 Kumulatif extraction.
+        """Run SE004 Kumulatif extraction for the default unit.
         
         Args:
             ctx: Run context
@@ -61,153 +66,17 @@ class SE004KumulatifDataset(BaseDataset):
         Returns:
             RunResult with status
         """
-        self.logger.info(f"Running SE004 Kumulatif for period {ctx.period_ym}")
+        from ..runner import run_dataset
         
-        # Get config values
         unit_text = self.config.get(
             'datasets.se004_kumulatif.unit_text_default',
             '11 - WILAYAH ACEH'
         )
-        dataset_url = self.config.get(
-            'datasets.se004_kumulatif.url',
-            'https://new-apktss.pln.co.id/home/laporan-saidi-saifi-kumulatif-se004'
-        )
-        
-        # Parse period to month name and year
         month_name, year = parse_period_ym(ctx.period_ym)
-        
-        self.logger.info(f"Unit: {unit_text}")
-        self.logger.info(f"Period: {month_name} {year}")
-        
-        playwright = None
-        browser = None
-        context = None
+        self.logger.info(f"Running SE004 Kumulatif for {unit_text}, {month_name} {year}")
         
         try:
-            # Step 1: Open browser
-            playwright, browser, context, page = open_browser(ctx, self.config)
-            self.logger.info("Browser opened, starting authentication...")
-            
-            # Step 2: Login to APKT via SSO/IAM
-            login_apkt(page, ctx, self.config)
-            self.logger.info("Authentication successful")
-            
-            # Step 3: Navigate to APKT-SS subdomain
-            # After login, we're at https://new-apkt.pln.co.id/
-            # Need to click APKT-SS to go to https://new-apktss.pln.co.id/
-            self.logger.info("Step 3: Looking for APKT-SS menu...")
-            self._navigate_to_apktss(page)
-            
-            # Step 4: Navigate to dataset page
-            self.logger.info(f"Step 4: Navigating to SE004 Kumulatif page: {dataset_url}")
-            page.goto(dataset_url)
-            page.wait_for_load_state("networkidle")
-            
-            # Wait for main content to be ready
-            self.logger.info("Waiting for page to be ready...")
-            page.wait_for_timeout(3000)  # Give time for Angular/React to render
-            
-            self.logger.info(f"Current URL: {page.url}")
-            
-            # Step 5: Set Unit filter
-            self.logger.info(f"Step 5: Setting Unit filter to: {unit_text}")
-            self._set_unit_filter(page, unit_text)
-            
-            # Step 6: Set Period filter (month and year)
-            self.logger.info(f"Step 6: Setting Period filter to: {month_name} {year}")
-            self._set_period_filter(page, month_name, year)
-            
-            # Step 7: Click Export and download Excel
-            self.logger.info("Step 7: Exporting data to Excel...")
-            
-            # Generate target filename
-            unit_code = "WIL_ACEH"  # Hardcoded for now
-            target_filename = f"se004_kumulatif_{ctx.period_ym}_{unit_code}.xlsx"
-            
-            # Define click export function
-            def click_export():
-                self._click_export_excel(page)
-            
-            # Download the Excel file
-            downloaded_path = download_excel(
-                page=page,
-                ctx=ctx,
-                click_export_fn=click_export,
-                target_filename=target_filename,
-                max_attempts=3,
-            )
-            
-            self.logger.info(f"Excel downloaded: {downloaded_path}")
-            
-            # === PARSING PHASE ===
-            self.logger.info("Starting parsing phase...")
-            
-            # Find all Excel files in raw/excel directory
-            excel_files = list_excel_files(ctx.excel_dir)
-            self.logger.info(f"Found {len(excel_files)} Excel files to parse")
-            
-            parsed_csv_path = None
-            rows_parsed = 0
-            validation_warnings = []
-            
-            if excel_files:
-                # Parse all files into combined DataFrame
-                combined_df = parse_all_excel_files(ctx.excel_dir)
-                rows_parsed = len(combined_df)
-                
-                # Validate
-                validation = validate_se004_kumulatif(combined_df)
-                validation_warnings = validation.warnings
-                
-                if validation.warnings:
-                    self.logger.warning(f"Validation warnings: {len(validation.warnings)}")
-                    for w in validation.warnings[:5]:
-                        self.logger.warning(f"  - {w}")
-                
-                # Ensure parsed directory exists
-                ctx.parsed_dir.mkdir(parents=True, exist_ok=True)
-                
-                # Generate CSV filename
-                csv_filename = f"se004_kumulatif_{ctx.period_ym}_{ctx.run_id}.csv"
-                csv_path = ctx.parsed_dir / csv_filename
-                
-                # Save with Indonesian format (semicolon delimiter, . ribuan, , desimal)
-                save_csv_indonesian_format(combined_df, csv_path)
-                parsed_csv_path = str(csv_path)
-                
-                self.logger.info(f"Parsed {rows_parsed} rows from {len(excel_files)} files")
-                self.logger.info(f"CSV saved: {csv_path}")
-            
-            # Update manifest.json
-            manifest = {
-                "run_id": ctx.run_id,
-                "period_ym": ctx.period_ym,
-                "timestamp": str(ctx.snapshot_date),
-                "downloaded_files": [downloaded_path.name],
-                "parsed_csv_path": parsed_csv_path,
-                "row_count": rows_parsed,
-                "files_parsed": len(excel_files),
-                "validation": {
-                    "is_valid": len(validation_warnings) == 0,
-                    "warnings": validation_warnings,
-                },
-            }
-            
-            manifest_path = ctx.run_dir / "manifest.json"
-            with open(manifest_path, "w", encoding="utf-8") as f:
-                json.dump(manifest, f, indent=2, ensure_ascii=False)
-            
-            self.logger.info(f"Manifest saved: {manifest_path}")
-            
-            return RunResult(
-                success=True,
-                message=f"Download+Parse OK - {month_name} {year} - {rows_parsed} rows",
-                files_downloaded=[str(downloaded_path)],
-                rows_parsed=rows_parsed,
-                parsed_csv_path=parsed_csv_path,
-                validation_warnings=validation_warnings,
-            )
-            
+            results, _ = run_dataset(SE004_KUMULATIF, self.config, ctx, ctx.period_ym, self._units(unit_text))
         except Exception as e:
             self.logger.error(f"Extraction failed: {e}")
             return RunResult(
@@ -216,194 +85,203 @@ class SE004KumulatifDataset(BaseDataset):
                 files_downloaded=[],
                 rows_parsed=0,
             )
-            
-        finally:
-            # Always close browser
-            if playwright or browser or context:
-                close_browser(playwright, browser, context)
-    
-    def _navigate_to_apktss(self, page) -> None:
-        """Navigate from APKT home to APKT-SS subdomain.
-        
-        After login, user lands on https://new-apkt.pln.co.id/
-        Need to click APKT-SS tile/card to go to https://new-apktss.pln.co.id/
         
-        Args:
-            page: Playwright page object
-        """
-        self.logger.info(f"Current URL before APKT-SS navigation: {page.url}")
+        if results["failed"]:
+            return RunResult(
+                success=False,
+                message=f"Extraction failed: {results['errors'][0]['error']}",
+                files_downloaded=results["files"],
+            )
+        return RunResult(
+            success=True,
+            message=f"Download+Parse OK - {month_name} {year} - {results['rows_parsed']} rows",
+            files_downloaded=results["files"],
+            rows_parsed=results["rows_parsed"],
+            parsed_csv_path=results["parsed_csv_path"],
+            validation_warnings=results.get("validation_warnings", []),
+        )
+    
+    # === ASYNC ENGINE (runtime.engine: async) ===
+    
+    def _dataset_url(self) -> str:
+        return SE004_KUMULATIF.dataset_url(self.config)
+    
+    def _export_jobs(self, period_ym: str, units: List[Dict[str, str]]) -> List["ExportJob"]:
+        """One export job per planned unit (the period is set once per page by _prepare_page)."""
+        from ...browser.async_engine import ExportJob, select_label
+        from ..planner import plan_jobs
         
-        # Check if already on APKT-SS
-        if "new-apktss.pln.co.id" in page.url:
-            self.logger.info("Already on APKT-SS subdomain")
-            return
+        unit_filter = SE004_KUMULATIF.filter("unit")
         
-        # Wait for home page to fully load
-        page.wait_for_timeout(2000)
+        def apply_unit(unit_text):
+            async def apply(page):
+                await select_label(page, unit_filter.selector, unit_text, timeout_ms=unit_filter.timeout_ms)
+            return apply
         
-        # Based on analysis: there's a <p> element with text "APKT-SS" inside a clickable div
-        # Try to find and click the APKT-SS card/tile
-        apktss_selectors = [
-            # The <p> tag with APKT-SS text - click its parent div
-            "p:has-text('APKT-SS')",
-            "div:has-text('APKT-SS'):not(:has(div:has-text('APKT-SS')))",  # Most specific div
-            "*:has-text('APKT-SS') >> nth=0",
-            "text=APKT-SS",
+        return [
+            ExportJob(
+                unit=job.unit_code,
+                target_filename=job.target_filename,
+                apply_filters=apply_unit(job.labels["unit"]),
+            )
+            for job in plan_jobs(SE004_KUMULATIF, period_ym, units)
         ]
+    
+    @staticmethod
+    def _prepare_page(period_ym: str):
+        from ...browser.async_engine import select_label
         
-        apktss_element = None
-        for selector in apktss_selectors:
-            try:
-                locator = page.locator(selector)
-                if locator.count() > 0:
-                    apktss_element = locator.first
-                    self.logger.info(f"Found APKT-SS element with selector: {selector}")
-                    break
-            except Exception as e:
-                self.logger.debug(f"Selector {selector} failed: {e}")
-                continue
+        month_name, year = parse_period_ym(period_ym)
+        month_filter, year_filter = SE004_KUMULATIF.filter("month"), SE004_KUMULATIF.filter("year")
         
-        if apktss_element:
-            self.logger.info("Clicking APKT-SS card...")
-            apktss_element.click()
-            
-            # Wait for navigation to APKT-SS subdomain
-            try:
-                page.wait_for_url("**/new-apktss.pln.co.id/**", timeout=15000)
-                self.logger.info(f"Successfully navigated to APKT-SS: {page.url}")
-            except Exception:
-                page.wait_for_load_state("networkidle")
-                page.wait_for_timeout(2000)
-                self.logger.info(f"After APKT-SS click, URL: {page.url}")
-        else:
-            self.logger.error("Could not find APKT-SS card/tile on home page")
-            raise Exception("APKT-SS card not found on home page")
+        async def prepare(page):
+            with span("filter.period"):
+                await select_label(page, month_filter.selector, month_name, timeout_ms=month_filter.timeout_ms)
+                await select_label(page, year_filter.selector, year, timeout_ms=year_filter.timeout_ms)
+        return prepare
+    
+    def _units(self, unit_text: Optional[str] = None) -> List[Dict[str, str]]:
+        """Units from units_selection.yaml, or the single unit_text."""
+        from .multi_download import load_units_selection
         
-        # Verify we're on APKT-SS
-        if "new-apktss.pln.co.id" not in page.url:
-            self.logger.error(f"Failed to navigate to APKT-SS. Current URL: {page.url}")
-            raise Exception(f"Failed to navigate to APKT-SS. Current URL: {page.url}")
+        units = []
+        for path in (Path("credentials/units_selection.yaml"), Path("units_selection.yaml")):
+            if path.exists():
+                units = load_units_selection(path)
+                break
+        if unit_text is None:
+            return units
+        for unit in units:
+            if unit["text"] == unit_text:
+                return [unit]
+        code = re.sub(r"[^A-Za-z0-9]+", "_", unit_text).strip("_").upper()
+        return [{"text": unit_text, "code": code, "value": ""}]
     
-    def _set_unit_filter(self, page, unit_text: str) -> None:
-        """Set the Unit Induk/Regional/Pusat filter.
+    async def _export(
+        self,
+        ctx: RunContext,
+        period_ym: str,
+        units: List[Dict[str, str]],
+        storage_state: Optional[Dict[str, Any]] = None,
+        on_file=None,
+    ) -> "ExportOutcome":
+        from ...browser.async_engine import AsyncBrowserSession, capture_storage_state
         
-        Args:
-            page: Playwright page object
-            unit_text: Unit text to select (e.g., "11 - WILAYAH ACEH")
-        """
-        # Based on analysis: select#unitInduk with name='unitInduk'
-        try:
-            unit_select = page.locator("select#unitInduk, select[name='unitInduk']").first
-            unit_select.select_option(label=unit_text)
-            self.logger.info(f"Selected unit: {unit_text}")
-            page.wait_for_timeout(1000)  # Wait for cascading dropdowns to update
-        except Exception as e:
-            self.logger.error(f"Failed to set unit filter: {e}")
-            raise
+        if storage_state is None:
+            # Interactive sync login in a worker thread, off the event loop
+            storage_state = await asyncio.to_thread(capture_storage_state, ctx, self.config)
+        
+        async with AsyncBrowserSession(ctx, self.config, storage_state) as session:
+            return await session.export(
+                self._dataset_url(),
+                self._export_jobs(period_ym, units),
+                prepare=self._prepare_page(period_ym),
+                on_file=on_file,
+            )
     
-    def _set_period_filter(self, page, month_name: str, year: str) -> None:
-        """Set the Period filter (month and year).
+    def run_concurrent(self, ctx: RunContext, units: List[Dict[str, str]], page=None) -> Dict[str, Any]:
+        """Download, parse and upload `units` with the async engine.
+        
+        Same results dict as multi_download.run_multi_unit_download.
         
         Args:
-            page: Playwright page object
-            month_name: Indonesian month name (e.g., "Desember")
-            year: Year string (e.g., "2025")
-        """
-        # Based on analysis:
-        # - Month: select[name='vc-component-4'] with options Januari, Februari, etc.
-        # - Year: select[name='vc-component-6'] with options 2026, 2025, etc.
+            ctx: Run context
+            units: List of unit dicts with value, text, code
+            page: Logged-in sync page whose session is reused (None = log in)
         
-        # Set month
-        try:
-            month_select = page.locator("select[name='vc-component-4']").first
-            month_select.select_option(label=month_name)
-            self.logger.info(f"Selected month: {month_name}")
-            page.wait_for_timeout(500)
-        except Exception as e:
-            self.logger.error(f"Failed to set month filter: {e}")
-            raise
+        Returns:
+            Results dict
+        """
+        from ...browser.async_engine import capture_storage_state
         
-        # Set year
-        try:
-            year_select = page.locator("select[name='vc-component-6']").first
-            year_select.select_option(label=year)
-            self.logger.info(f"Selected year: {year}")
-            page.wait_for_timeout(500)
-        except Exception as e:
-            self.logger.error(f"Failed to set year filter: {e}")
-            raise
+        storage_state = capture_storage_state(ctx, self.config, page)
+        # Own thread: the sync Playwright session of the CLI keeps its loop in this one
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, self.run_async(ctx, units, storage_state)).result()
     
-    def _click_export_excel(self, page) -> None:
-        """Click Export button and select Excel format.
+    async def run_async(
+        self,
+        ctx: RunContext,
+        units: List[Dict[str, str]],
+        storage_state: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Export all units concurrently, then parse, upload and record the run like run_dataset.
         
-        The page has an "Eksport" dropdown button with Excel option.
+        Each downloaded workbook is parsed in a worker process
+        (runtime.parse_workers) while the pages keep exporting. Once the
+        exports are done, the frames go through the sync runner's parse step,
+        upload gate and manifest (runner._parse_and_upload with
+        parse_steps.parse_se004_kumulatif, runner._write_manifest). The filter
+        catalogue, freshness check and circuit breaker need the sync page and
+        are not applied to async exports.
         
         Args:
-            page: Playwright page object
+            ctx: Run context
+            units: List of unit dicts with value, text, code
+            storage_state: Logged-in session (None = log in)
+        
+        Returns:
+            Results dict (see run_concurrent)
         """
-        self.logger.info("Looking for Export button...")
+        from ..runner import _parse_and_upload, _write_manifest
+        from .parse_steps import parse_se004_kumulatif
         
-        # Based on analysis: Button 26 has text='Eksport' (Indonesian spelling)
-        export_selectors = [
-            "button:has-text('Eksport')",  # Indonesian spelling
-            "button:has-text('Export')",
-            "button:has-text('Excel')",
-            "button:has-text('Download')",
-            "button:has-text('Unduh')",
-        ]
+        unit_texts = {unit["code"]: unit["text"] for unit in units}
+        results: Dict[str, Any] = {
+            "total": len(units),
+            "success": 0,
+            "failed": 0,
+            "period": ctx.period_ym,
+            "files": [],
+            "errors": [],
+            "rows_parsed": 0,
+            "parsed_csv_path": None,
+            "filter_changes": 0,
+            "engine": "async",
+        }
         
-        export_button = None
-        for selector in export_selectors:
+        loop = asyncio.get_running_loop()
+        parsing: Dict[str, asyncio.Future] = {}
+        parse_workers = max(1, int(self.config.get('runtime.parse_workers', 2)))
+        # Spawned workers: forking a process with live Playwright driver threads is unsafe
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=parse_workers, mp_context=spawn) as executor:
+            def on_file(downloaded: DownloadedFile) -> None:
+                parsing[downloaded.path] = loop.run_in_executor(
+                    executor, parse_se004_kumulatif_xlsx, Path(downloaded.path)
+                )
+            
             try:
-                locator = page.locator(selector)
-                if locator.count() > 0:
-                    btn = locator.first
-                    if btn.is_visible():
-                        export_button = btn
-                        self.logger.info(f"Found export button with selector: {selector}")
-                        break
+                outcome = await self._export(ctx, ctx.period_ym, units, storage_state, on_file=on_file)
             except Exception as e:
-                self.logger.debug(f"Selector {selector} failed: {e}")
-                continue
-        
-        if not export_button:
-            raise Exception("Could not find Export button")
-        
-        # Click export button to open dropdown
-        self.logger.info("Clicking Eksport button...")
-        export_button.click()
-        page.wait_for_timeout(1000)
+                results["errors"].append({"unit": "GLOBAL", "error": str(e)})
+                return results
+            
+            # Same order as parse_all_excel_files (file name)
+            paths = sorted(parsing, key=lambda path: Path(path).name)
+            parsed = await asyncio.gather(*(parsing[path] for path in paths), return_exceptions=True)
         
-        # Look for Excel option in dropdown menu
-        excel_selectors = [
-            "button:has-text('Excel')",
-            "a:has-text('Excel')",
-            "li:has-text('Excel')",
-            ".dropdown-item:has-text('Excel')",
-            "[role='menuitem']:has-text('Excel')",
-            "div:has-text('Excel'):visible",
-        ]
+        frames = []
+        for path, frame in zip(paths, parsed):
+            if isinstance(frame, Exception):
+                self.logger.error(f"Error parsing {Path(path).name}: {frame}")
+            else:
+                frames.append(frame)
         
-        excel_option = None
-        for selector in excel_selectors:
-            try:
-                locator = page.locator(selector)
-                if locator.count() > 0:
-                    opt = locator.first
-                    if opt.is_visible():
-                        excel_option = opt
-                        self.logger.info(f"Found Excel option with selector: {selector}")
-                        break
-            except Exception as e:
-                self.logger.debug(f"Excel selector {selector} failed: {e}")
-                continue
+        results["success"] = len(outcome.files)
+        results["files"] = [f.path for f in outcome.files]
+        results["errors"] = [
+            {**error, "unit": unit_texts.get(error["unit"], error["unit"])} for error in outcome.errors
+        ] + [{"unit": unit_texts.get(unit, unit), "error": "Data tidak ditemukan"} for unit in outcome.no_data]
+        results["failed"] = len(results["errors"])
         
-        if excel_option:
-            self.logger.info("Clicking Excel option...")
-            excel_option.click()
-        else:
-            # Maybe the button directly triggers download without dropdown
-            self.logger.info("No Excel dropdown option found, export might trigger directly")
+        dataset_url = self._dataset_url()
+        await asyncio.to_thread(
+            _parse_and_upload, SE004_KUMULATIF, self.config, ctx, results,
+            functools.partial(parse_se004_kumulatif, frames=frames),
+        )
+        await asyncio.to_thread(_write_manifest, SE004_KUMULATIF, ctx, ctx.period_ym, dataset_url, units, results)
+        return results
     
     async def extract(
         self,
@@ -411,25 +289,27 @@ class SE004KumulatifDataset(BaseDataset):
         period_ym: str,
         unit_text: Optional[str] = None,
     ) -> List[DownloadedFile]:
-        """Extract SE004 Kumulatif data.
+        """Extract SE004 Kumulatif data with the async engine.
         
         Args:
             ctx: Run context
             period_ym: Period in YYYYMM format
-            unit_text: Optional unit text
+            unit_text: Optional unit text (default: all units of units_selection.yaml)
             
         Returns:
             List of downloaded files
         """
-        # TODO: Implement extraction logic
-        return []
+        outcome = await self._export(ctx, period_ym, self._units(unit_text))
+        for error in outcome.errors:
+            self.logger.warning(f"{error['unit']}: {error['error']}")
+        return outcome.files
     
     async def parse(
         self,
         files: List[DownloadedFile],
         ctx: RunContext,
     ) -> ParsedData:
-        """Parse SE004 Kumulatif files.
+        """Parse SE004 Kumulatif files (in parallel, in worker processes).
         
         Args:
             files: List of files to parse
@@ -438,10 +318,30 @@ class SE004KumulatifDataset(BaseDataset):
         Returns:
             Parsed data
         """
-        # TODO: Implement parsing logic
+        import pandas as pd
+        
+        loop = asyncio.get_running_loop()
+        parse_workers = max(1, int(self.config.get('runtime.parse_workers', 2)))
+        # Spawned workers: forking a process with live Playwright driver threads is unsafe
+        spawn = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=parse_workers, mp_context=spawn) as executor:
+            frames = await asyncio.gather(
+                *(loop.run_in_executor(executor, parse_se004_kumulatif_xlsx, Path(f.path)) for f in files),
+                return_exceptions=True,
+            )
+        
+        parsed = []
+        for downloaded, frame in zip(files, frames):
+            if isinstance(frame, Exception):
+                self.logger.error(f"Error parsing {downloaded.filename}: {frame}")
+            else:
+                parsed.append(frame)
+        combined_df = pd.concat(parsed, ignore_index=True) if parsed else pd.DataFrame()
+        
         return ParsedData(
             dataset=self.name,
             period_ym=ctx.period_ym,
-            data=[],
-            row_count=0,
+            data=combined_df.to_dict("records"),
+            row_count=len(combined_df),
+            columns=list(combined_df.columns),
         )
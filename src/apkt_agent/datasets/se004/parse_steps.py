@@ -0,0 +1,242 @@
+"""Parse steps of the SE004 descriptors (DatasetDescriptor.parse).
+
+Each step parses the workbooks of one run directory into its parsed CSV,
+validates and reconciles the rows and writes validation_report.json. The
+download runners (datasets/runner.py) and the offline commands
+(offline.py) both call them through the descriptor, with options from
+parse_options(). Steps only take plain arguments so they can run in
+worker processes.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from ...config import Config
+from ...logging_ import get_logger
+from ...workspace import RunContext, load_run
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+def parse_options(config: Config) -> Dict[str, Any]:
+    """Config values used while parsing (plain dict, safe to send to worker processes)."""
+    return {
+        "streaming": config.get('output.streaming', False),
+        "rel_tol": config.get('reconciliation.rel_tol', 0.01),
+        "abs_tol": config.get('reconciliation.abs_tol', 0.01),
+        "detail_rel_tol": config.get('reconciliation.detail_rel_tol', 0.05),
+        "detail_abs_tol": config.get('reconciliation.detail_abs_tol', 1.0),
+        "detail_kelompok": config.get('reconciliation.detail_kelompok'),
+    }
+
+
+def se004_csv_path(ctx: RunContext) -> Path:
+    """Parsed CSV of a kumulatif or bulanan run (bulanan has one per period)."""
+    if ctx.dataset == "se004_bulanan":
+        return ctx.parsed_dir / f"se004_bulanan_{ctx.period_ym}.csv"
+    run_id_short = ctx.run_id.split("_")[-1] if "_" in ctx.run_id else ctx.run_id[:8]
+    return ctx.parsed_dir / f"se004_kumulatif_{ctx.period_ym}_{run_id_short}.csv"
+
+
+def parse_se004_kumulatif(
+    ctx: RunContext,
+    options: Dict[str, Any],
+    frames: Optional[List["pd.DataFrame"]] = None,
+) -> Dict[str, Any]:
+    """Parse kumulatif/bulanan workbooks (same layout), validate and reconcile.
+    
+    Args:
+        ctx: Run context
+        options: See parse_options()
+        frames: Workbooks already parsed, in file name order (the async
+            engine parses each export while the others download); the
+            workbooks are not read again and output.streaming is ignored
+    """
+    import pandas as pd
+    
+    from ...transform.reconcile import ReconciliationResult, reconcile_se004_kumulatif
+    from ...transform.rules import SE004_KUMULATIF_RULES
+    from ...transform.validate import ValidationResult, validate_se004_kumulatif, write_validation_report
+    from .parser import (
+        SE004_KUMULATIF_COLUMNS,
+        list_excel_files,
+        parse_all_excel_files,
+        save_csv_indonesian_format,
+        stream_all_excel_files,
+    )
+    
+    excel_files = list_excel_files(ctx.excel_dir)
+    if not excel_files:
+        raise FileNotFoundError(f"No Excel files in {ctx.excel_dir}")
+    
+    csv_path = se004_csv_path(ctx)
+    ctx.parsed_dir.mkdir(parents=True, exist_ok=True)
+    
+    tolerances = {"rel_tol": options["rel_tol"], "abs_tol": options["abs_tol"]}
+    validation = ValidationResult()
+    rule_evaluator = SE004_KUMULATIF_RULES.evaluator()
+    reconciliation = ReconciliationResult(**tolerances)
+    
+    def _validate_frame(df):
+        validation.merge(validate_se004_kumulatif(df))
+        rule_evaluator.update(df)
+        reconciliation.merge(reconcile_se004_kumulatif(df, **tolerances))
+    
+    if frames is None and options["streaming"]:
+        rows_parsed = stream_all_excel_files(ctx.excel_dir, csv_path, on_frame=_validate_frame)["rows"]
+    else:
+        if frames is None:
+            combined_df = parse_all_excel_files(ctx.excel_dir)
+        elif frames:
+            combined_df = pd.concat(frames, ignore_index=True)
+        else:
+            combined_df = pd.DataFrame(columns=SE004_KUMULATIF_COLUMNS)
+        rows_parsed = len(combined_df)
+        _validate_frame(combined_df)
+        save_csv_indonesian_format(combined_df, csv_path)
+    
+    validation.merge(rule_evaluator.finish())
+    report_path = write_validation_report(
+        validation, ctx.run_dir, dataset=ctx.dataset, rows=rows_parsed,
+        sections={"reconciliation": reconciliation.to_dict()},
+    )
+    return {
+        "files_parsed": len(excel_files),
+        "rows_parsed": rows_parsed,
+        "parsed_csv_path": str(csv_path),
+        "validation_report": str(report_path),
+        "validation_warnings": len(validation.warnings),
+        "warnings": validation.warnings,
+        "reconciliation_drift": reconciliation.drift_count,
+    }
+
+
+def find_se004_bulanan_csv(ctx: RunContext) -> Optional[Path]:
+    """Parsed CSV of the newest SE004 Bulanan run of the same period in the workspace."""
+    for run_dir in sorted(ctx.run_dir.parent.glob(f"*_se004_bulanan_{ctx.period_ym}_*"), reverse=True):
+        try:
+            csv_path = se004_csv_path(load_run(run_dir))
+        except (OSError, ValueError):
+            continue
+        if csv_path.exists():
+            return csv_path
+    return None
+
+
+def reconcile_detail_gangguan(ctx: RunContext, detail_csv: Path, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Reconcile a parsed detail gangguan CSV with the SE004 Bulanan totals of its month.
+    
+    Returns:
+        Reconciliation section of validation_report.json (skipped without an SE004 Bulanan run)
+    """
+    import pandas as pd
+    
+    from ...transform.reconcile import DETAIL_TO_SE004_COLUMNS, reconcile_detail_with_se004
+    from .schema import parse_indonesian_number
+    
+    se004_csv = find_se004_bulanan_csv(ctx)
+    if se004_csv is None:
+        get_logger().info(f"No parsed SE004 Bulanan run for {ctx.period_ym}: detail reconciliation skipped")
+        return {"skipped": f"no parsed se004_bulanan run for {ctx.period_ym}", "drift_count": 0}
+    
+    detail_df = pd.read_csv(
+        detail_csv,
+        usecols=["period", "unit_code", "kelompok", *DETAIL_TO_SE004_COLUMNS],
+        dtype={"period": str, "unit_code": str, "kelompok": str},
+    )
+    # The SE004 CSV is written in Indonesian number format (see save_csv_indonesian_format)
+    se004_columns = list(DETAIL_TO_SE004_COLUMNS.values())
+    se004_df = pd.read_csv(
+        se004_csv,
+        sep=";",
+        encoding="utf-8-sig",
+        dtype=str,
+        keep_default_na=False,
+        usecols=["unit_induk", "period_ym", "penyebab_gangguan", *se004_columns],
+    )
+    for col in se004_columns:
+        se004_df[col] = se004_df[col].map(parse_indonesian_number)
+    
+    kelompok = options.get("detail_kelompok")
+    result = reconcile_detail_with_se004(
+        detail_df,
+        se004_df,
+        kelompok=[str(k).lower() for k in kelompok] if kelompok else None,
+        rel_tol=options["detail_rel_tol"],
+        abs_tol=options["detail_abs_tol"],
+    )
+    if result.has_drift:
+        get_logger().warning(
+            f"Detail vs SE004 reconciliation: {result.drift_count} of {len(result.checks)} checks drifted"
+        )
+    return {**result.to_dict(), "se004_csv": str(se004_csv)}
+
+
+def parse_detail_gangguan(ctx: RunContext, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse detail gangguan workbooks with the runner's parse_all_files and reconcile them."""
+    from ...transform.validate import write_validation_report
+    from .parser_detail_gangguan import parse_all_files
+    
+    parse_results = parse_all_files(ctx.excel_dir, ctx.parsed_dir, streaming=options["streaming"])
+    if not parse_results.get("success"):
+        raise ValueError(f"Parsing failed: {parse_results.get('error')}")
+    
+    validation = parse_results["validation"]
+    reconciliation = reconcile_detail_gangguan(ctx, Path(parse_results["output_path"]), options)
+    report_path = write_validation_report(
+        validation, ctx.run_dir, dataset=ctx.dataset, rows=parse_results["total_rows"],
+        sections={"reconciliation": reconciliation},
+    )
+    return {
+        "files_parsed": parse_results["files_parsed"],
+        "rows_parsed": parse_results["total_rows"],
+        "parsed_csv_path": parse_results["output_path"],
+        "validation_report": str(report_path),
+        "validation_warnings": len(validation.warnings),
+        "warnings": validation.warnings,
+        "errors": parse_results.get("errors", []),
+        "memory": parse_results.get("memory", {}),
+        "reconciliation_drift": reconciliation["drift_count"],
+    }
+
+
+def parse_koreksi_cleansing(ctx: RunContext, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Parse koreksi cleansing workbooks and evaluate their rule set."""
+    from ...transform.rules import KOREKSI_CLEANSING_RULES
+    from ...transform.validate import write_validation_report
+    from .parser_koreksi_cleansing import (
+        list_excel_files,
+        parse_all_excel_files,
+        save_csv_indonesian_format,
+        stream_all_excel_files,
+    )
+    
+    excel_files = list_excel_files(ctx.excel_dir)
+    if not excel_files:
+        raise FileNotFoundError(f"No Excel files in {ctx.excel_dir}")
+    
+    csv_path = ctx.parsed_dir / f"koreksi_cleansing_{ctx.period_ym}.csv"
+    ctx.parsed_dir.mkdir(parents=True, exist_ok=True)
+    rule_evaluator = KOREKSI_CLEANSING_RULES.evaluator()
+    
+    if options["streaming"]:
+        rows_parsed = stream_all_excel_files(ctx.excel_dir, csv_path, on_frame=rule_evaluator.update)["rows"]
+    else:
+        parsed_data = parse_all_excel_files(ctx.excel_dir)
+        rows_parsed = len(parsed_data)
+        if rows_parsed == 0:
+            raise ValueError("No data parsed from Excel files")
+        save_csv_indonesian_format(parsed_data, csv_path)
+        rule_evaluator.update(parsed_data)
+    
+    validation = rule_evaluator.finish()
+    report_path = write_validation_report(validation, ctx.run_dir, dataset=ctx.dataset, rows=rows_parsed)
+    return {
+        "files_parsed": len(excel_files),
+        "rows_parsed": rows_parsed,
+        "parsed_csv_path": str(csv_path),
+        "validation_report": str(report_path),
+        "validation_warnings": len(validation.warnings),
+        "warnings": validation.warnings,
+    }
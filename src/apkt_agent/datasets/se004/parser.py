@@ -2,7 +2,7 @@
 
 import re
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 
 import pandas as pd
 from openpyxl import load_workbook
@@ -14,7 +14,8 @@ from .schema import (
     format_indonesian_number,
     parse_tanggal_to_ddmmyyyy,
 )
-from ...logging_ import get_logger
+from ...logging_ import annotate_span, get_logger, traced
+from ...output.incremental_writer import IncrementalFrameWriter
 
 
 def list_excel_files(raw_excel_dir: Path) -> List[Path]:
@@ -187,6 +188,7 @@ def _determine_row_type(kode: Any, penyebab: str, numeric_values: List[Any]) ->
     return "detail"
 
 
+@traced("parse.file")
 def parse_se004_kumulatif_xlsx(file_path: Path) -> pd.DataFrame:
     """Parse a single SE004 Kumulatif Excel file.
     
@@ -462,10 +464,13 @@ def parse_se004_kumulatif_xlsx(file_path: Path) -> pd.DataFrame:
     df = df[SE004_KUMULATIF_COLUMNS]
     
     logger.info(f"Parsed {len(df)} rows from {file_path.name}")
+    unit_code = re.search(r"_\d{6}_(.+)$", file_path.stem)
+    annotate_span(unit=unit_code.group(1) if unit_code else metadata.get("unit_induk"), rows=len(df))
     
     return df
 
 
+@traced("parse")
 def parse_all_excel_files(raw_excel_dir: Path) -> pd.DataFrame:
     """Parse all Excel files in directory and combine into one DataFrame.
     
@@ -503,36 +508,33 @@ def parse_all_excel_files(raw_excel_dir: Path) -> pd.DataFrame:
     return combined_df
 
 
-def save_csv_indonesian_format(df: pd.DataFrame, output_path: Path) -> Path:
-    """Save DataFrame to CSV with Indonesian number format.
+# Numeric columns formatted to Indonesian number format in CSV output
+NUMERIC_COLUMNS = [
+    "jumlah_pelanggan",
+    "saidi_total",
+    "saidi_total_menit",
+    "saifi_total",
+    "jml_plg_padam",
+    "jam_x_jml_plg_padam",
+    "saidi_jam",
+    "saifi_kali",
+    "jumlah_gangguan_kali",
+    "lama_padam_jam",
+    "kwh_tak_tersalurkan",
+]
+
+
+def format_indonesian_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of the DataFrame formatted for Indonesian CSV output.
     
-    Uses semicolon (;) as delimiter because comma is used as decimal separator.
     Numbers are formatted with dot (.) for thousands, comma (,) for decimals.
     
     Args:
-        df: DataFrame to save
-        output_path: Path to save CSV file
+        df: Parsed DataFrame
         
     Returns:
-        Path to saved CSV file
+        Formatted copy of the DataFrame
     """
-    logger = get_logger()
-    
-    # Define numeric columns that need formatting
-    numeric_columns = [
-        "jumlah_pelanggan",
-        "saidi_total",
-        "saidi_total_menit",
-        "saifi_total",
-        "jml_plg_padam",
-        "jam_x_jml_plg_padam",
-        "saidi_jam",
-        "saifi_kali",
-        "jumlah_gangguan_kali",
-        "lama_padam_jam",
-        "kwh_tak_tersalurkan",
-    ]
-    
     # Create a copy to avoid modifying original
     df_out = df.copy()
     
@@ -543,12 +545,33 @@ def save_csv_indonesian_format(df: pd.DataFrame, output_path: Path) -> Path:
         )
     
     # Format numeric columns to Indonesian format
-    for col in numeric_columns:
+    for col in NUMERIC_COLUMNS:
         if col in df_out.columns:
             df_out[col] = df_out[col].apply(
                 lambda x: format_indonesian_number(x, decimals=4) if pd.notna(x) else ""
             )
     
+    return df_out
+
+
+@traced("csv_write")
+def save_csv_indonesian_format(df: pd.DataFrame, output_path: Path) -> Path:
+    """Save DataFrame to CSV with Indonesian number format.
+    
+    Uses semicolon (;) as delimiter because comma is used as decimal separator.
+    Numbers are formatted with dot (.) for thousands, comma (,) for decimals.
+    
+    Args:
+        df: DataFrame to save
+        output_path: Path to save CSV file
+        
+    Returns:
+        Path to saved CSV file
+    """
+    logger = get_logger()
+    
+    df_out = format_indonesian_frame(df)
+    
     # Ensure output directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
@@ -560,6 +583,67 @@ def save_csv_indonesian_format(df: pd.DataFrame, output_path: Path) -> Path:
     return output_path
 
 
+@traced("parse")
+def stream_all_excel_files(
+    raw_excel_dir: Path,
+    output_path: Path,
+    fmt: str = "csv",
+    on_frame: Optional[Callable[[pd.DataFrame], None]] = None,
+) -> Dict[str, Any]:
+    """Parse all Excel files and append each one to the combined output as it is parsed.
+    
+    Streaming alternative to parse_all_excel_files + save_csv_indonesian_format:
+    only one workbook's DataFrame is held in memory at a time. The CSV output is
+    identical to save_csv_indonesian_format on the concatenated DataFrame.
+    
+    Args:
+        raw_excel_dir: Path to directory containing Excel files
+        output_path: Path of the combined CSV (or Parquet) file
+        fmt: Output format, "csv" or "parquet"
+        on_frame: Optional callback called with each parsed (unformatted) DataFrame,
+                  e.g. for per-file validation
+        
+    Returns:
+        Dict with files, files_parsed, rows and output_path
+    """
+    logger = get_logger()
+    files = list_excel_files(raw_excel_dir)
+    
+    logger.info(f"Found {len(files)} Excel files to parse (streaming)")
+    
+    writer = IncrementalFrameWriter(
+        output_path,
+        columns=SE004_KUMULATIF_COLUMNS,
+        fmt=fmt,
+        sep=";",
+        encoding="utf-8-sig",
+        formatter=format_indonesian_frame if fmt == "csv" else None,
+    )
+    
+    files_parsed = 0
+    with writer:
+        for file_path in files:
+            try:
+                df = parse_se004_kumulatif_xlsx(file_path)
+            except Exception as e:
+                logger.error(f"Error parsing {file_path.name}: {e}")
+                continue
+            
+            if on_frame is not None:
+                on_frame(df)
+            writer.append(df)
+            files_parsed += 1
+    
+    logger.info(f"Streamed {writer.rows_written} total rows from {files_parsed} files")
+    
+    return {
+        "files": len(files),
+        "files_parsed": files_parsed,
+        "rows": writer.rows_written,
+        "output_path": str(output_path) if files_parsed else None,
+    }
+
+
 # Legacy class for backward compatibility
 class SE004Parser:
     """Parser for SE004 Excel files (legacy)."""
@@ -5,8 +5,11 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional
 
 import pandas as pd
+from pandas.api.types import union_categoricals
 
-from ...logging_ import get_logger
+from ...logging_ import annotate_span, get_logger, traced
+from ...output.incremental_writer import IncrementalFrameWriter, format_whole_numbers
+from ...transform.rules import SE004_DETAIL_GANGGUAN_RULES
 
 
 # Column mapping for SE004 Detail Gangguan
@@ -46,6 +49,58 @@ COLUMN_NAMES = [
 ]
 
 
+# Repeated text columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = [
+    "ulp",
+    "penyulang",
+    "waktu_padam_tanggal",
+    "waktu_padam_jam",
+    "waktu_nyala_sementara_tanggal",
+    "waktu_nyala_sementara_jam",
+    "waktu_nyala_tanggal",
+    "waktu_nyala_jam",
+    "kelompok_gangguan_fasilitas",
+    "kelompok_gangguan_sub_fasilitas",
+    "kelompok_gangguan_equipment",
+    "event_damage",
+    "cause",
+    "group_cause",
+    "weather",
+    "penyebab_padam",
+    "rele_proteksi",
+    # Metadata columns (constant per file)
+    "period",
+    "unit_code",
+    "kelompok",
+    "source_file",
+]
+
+# Numeric columns, downcast to the smallest lossless dtype
+NUMERIC_COLUMNS = [
+    "no",
+    "jumlah_pelanggan_padam",
+    "lama_padam_jam",
+    "jam_x_pelanggan_padam",
+    "ens",
+    "ampere",
+    "besar_arus_ampere",
+]
+
+# Derived datetime64 columns: name -> (tanggal column, jam column)
+DATETIME_COLUMN_PAIRS = {
+    "waktu_padam": ("waktu_padam_tanggal", "waktu_padam_jam"),
+    "waktu_nyala_sementara": ("waktu_nyala_sementara_tanggal", "waktu_nyala_sementara_jam"),
+    "waktu_nyala": ("waktu_nyala_tanggal", "waktu_nyala_jam"),
+}
+
+# Derived columns are kept in memory only, not written to the CSV output
+DERIVED_COLUMNS = list(DATETIME_COLUMN_PAIRS)
+
+# Column order of the combined CSV (derived columns are not written)
+METADATA_COLUMNS = ["period", "unit_code", "kelompok", "source_file"]
+OUTPUT_COLUMNS = COLUMN_NAMES + METADATA_COLUMNS
+
+
 def extract_metadata_from_filename(filename: str) -> Dict[str, str]:
     """Extract metadata from filename.
     
@@ -65,6 +120,119 @@ def extract_metadata_from_filename(filename: str) -> Dict[str, str]:
     return {}
 
 
+def _combine_date_time(tanggal: pd.Series, jam: pd.Series) -> pd.Series:
+    """Combine a tanggal column and a jam column into one datetime64 column.
+    
+    Args:
+        tanggal: Date values (datetime objects or dd-mm-yyyy / dd/mm/yyyy strings)
+        jam: Time values (time objects or HH:MM[:SS] strings)
+        
+    Returns:
+        datetime64 Series, NaT where either part is missing or invalid
+    """
+    dates = pd.to_datetime(tanggal, errors="coerce", dayfirst=True, format="mixed")
+    
+    # Accept "10:05", "10:05:00", "10.05" and datetime-like "1900-01-01 10:05:00"
+    parts = jam.astype("string").str.strip().str.extract(
+        r"(\d{1,2})[:.](\d{2})(?:[:.](\d{2}))?$"
+    )
+    hours = pd.to_numeric(parts[0], errors="coerce")
+    minutes = pd.to_numeric(parts[1], errors="coerce")
+    seconds = pd.to_numeric(parts[2], errors="coerce").fillna(0)
+    times = pd.to_timedelta(hours * 3600 + minutes * 60 + seconds, unit="s")
+    
+    return dates.dt.normalize() + times
+
+
+def _downcast_numeric(series: pd.Series) -> pd.Series:
+    """Downcast a numeric column to the smallest dtype that loses no information.
+    
+    Integer columns are downcast to the smallest integer type. Float columns are
+    only converted to float32 when every value round-trips exactly, so the CSV
+    output stays byte-identical.
+    
+    Args:
+        series: Numeric Series
+        
+    Returns:
+        Downcast Series
+    """
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    
+    if pd.api.types.is_float_dtype(series):
+        as_float32 = series.astype("float32")
+        if (as_float32.astype("float64") == series).where(series.notna(), True).all():
+            return as_float32
+    
+    return series
+
+
+def apply_detail_gangguan_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Apply the compact, schema-driven dtypes to a Detail Gangguan DataFrame.
+    
+    - Combines each tanggal + jam pair into a datetime64 column (DATETIME_COLUMN_PAIRS)
+    - Stores repeated text columns as categoricals (CATEGORICAL_COLUMNS)
+    - Downcasts numeric columns without loss (NUMERIC_COLUMNS)
+    
+    Args:
+        df: DataFrame with raw (mostly object) columns
+        
+    Returns:
+        DataFrame with compact dtypes
+    """
+    df = df.copy()
+    
+    for target, (tanggal_col, jam_col) in DATETIME_COLUMN_PAIRS.items():
+        if tanggal_col in df.columns and jam_col in df.columns:
+            df[target] = _combine_date_time(df[tanggal_col], df[jam_col])
+    
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = _downcast_numeric(pd.to_numeric(df[col], errors="coerce"))
+    
+    return df
+
+
+def concat_detail_gangguan_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate typed frames while keeping categorical columns categorical.
+    
+    pd.concat falls back to object dtype when categories differ between
+    frames, so categories are unified first.
+    
+    Args:
+        frames: DataFrames returned by parse_single_file
+        
+    Returns:
+        Combined DataFrame
+    """
+    for col in CATEGORICAL_COLUMNS:
+        columns = [f[col] for f in frames if col in f.columns]
+        if len(columns) != len(frames) or not all(
+            isinstance(c.dtype, pd.CategoricalDtype) for c in columns
+        ):
+            continue
+        try:
+            categories = union_categoricals(columns, ignore_order=True).categories
+        except TypeError:
+            # Categories of different dtypes (e.g. dates vs strings) - let concat upcast
+            continue
+        for f in frames:
+            f[col] = f[col].cat.set_categories(categories)
+    
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_usage_bytes(df: pd.DataFrame) -> int:
+    """Return deep memory usage of a DataFrame in bytes."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+@traced("parse.file")
 def parse_single_file(filepath: Path) -> pd.DataFrame:
     """Parse a single SE004 Detail Gangguan Excel file.
     
@@ -104,23 +272,111 @@ def parse_single_file(filepath: Path) -> pd.DataFrame:
     df['kelompok'] = metadata.get('kelompok', '')
     df['source_file'] = filepath.name
     
-    # Convert numeric columns
-    numeric_cols = ['no', 'jumlah_pelanggan_padam', 'lama_padam_jam', 
-                    'jam_x_pelanggan_padam', 'ens', 'ampere', 'besar_arus_ampere']
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Apply compact dtypes (categoricals, datetime64, downcast numerics)
+    memory_before = memory_usage_bytes(df)
+    df = apply_detail_gangguan_dtypes(df)
+    memory_after = memory_usage_bytes(df)
+    df.attrs["memory_bytes"] = {"before": memory_before, "after": memory_after}
     
-    logger.info(f"Parsed {len(df)} rows from {filepath.name}")
+    logger.info(
+        f"Parsed {len(df)} rows from {filepath.name} "
+        f"(memory {memory_before / 1024:,.0f} KB -> {memory_after / 1024:,.0f} KB)"
+    )
+    annotate_span(unit=metadata.get('unit_code'), kelompok=metadata.get('kelompok'), rows=len(df))
     return df
 
 
-def parse_all_files(excel_dir: Path, output_dir: Path) -> Dict[str, Any]:
+def _stream_all_files(excel_files: List[Path], output_dir: Path) -> Dict[str, Any]:
+    """Parse files one at a time, appending each to the combined CSV.
+    
+    Only one file's DataFrame is held in memory at a time. The summary,
+    memory figures and validation rules are accumulated per file.
+    """
+    logger = get_logger()
+    
+    writer = None
+    errors = []
+    files_parsed = 0
+    rule_evaluator = SE004_DETAIL_GANGGUAN_RULES.evaluator()
+    row_counts: Dict[tuple, int] = {}
+    memory = {"before_bytes": 0, "after_bytes": 0, "peak_frame_bytes": 0}
+    
+    try:
+        for filepath in excel_files:
+            try:
+                df = parse_single_file(filepath)
+            except Exception as e:
+                logger.error(f"Error parsing {filepath.name}: {e}")
+                errors.append({"file": filepath.name, "error": str(e)})
+                continue
+            
+            if df.empty:
+                continue
+            
+            if writer is None:
+                # Period of the first parsed file names the combined output
+                period = df['period'].iloc[0] if 'period' in df.columns else 'unknown'
+                writer = IncrementalFrameWriter(
+                    output_dir / f"se004_detail_gangguan_{period}_combined.csv",
+                    columns=OUTPUT_COLUMNS,
+                    formatter=lambda frame: format_whole_numbers(
+                        frame.drop(columns=DERIVED_COLUMNS, errors='ignore'), NUMERIC_COLUMNS
+                    ),
+                )
+            
+            writer.append(df)
+            rule_evaluator.update(df)
+            files_parsed += 1
+            
+            frame_memory = df.attrs.get("memory_bytes", {})
+            memory["before_bytes"] += frame_memory.get("before", 0)
+            memory["after_bytes"] += frame_memory.get("after", 0)
+            memory["peak_frame_bytes"] = max(memory["peak_frame_bytes"], frame_memory.get("after", 0))
+            
+            counts = df.groupby(['unit_code', 'kelompok'], observed=True).size()
+            for key, count in counts.items():
+                row_counts[key] = row_counts.get(key, 0) + int(count)
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    if writer is None:
+        return {"success": False, "error": "All files failed to parse", "rows": 0}
+    
+    logger.info(
+        f"Memory: {memory['before_bytes'] / 1024**2:,.1f} MB untyped -> "
+        f"{memory['after_bytes'] / 1024**2:,.1f} MB typed "
+        f"(largest file {memory['peak_frame_bytes'] / 1024**2:,.1f} MB)"
+    )
+    logger.info(f"Saved combined CSV: {writer.output_path} ({writer.rows_written} rows)")
+    
+    summary = [
+        {"unit_code": unit_code, "kelompok": kelompok, "row_count": count}
+        for (unit_code, kelompok), count in sorted(row_counts.items())
+    ]
+    
+    return {
+        "success": True,
+        "total_files": len(excel_files),
+        "files_parsed": files_parsed,
+        "total_rows": writer.rows_written,
+        "output_path": str(writer.output_path),
+        "summary": summary,
+        "memory": memory,
+        "validation": rule_evaluator.finish(),
+        "errors": errors,
+    }
+
+
+@traced("parse")
+def parse_all_files(excel_dir: Path, output_dir: Path, streaming: bool = False) -> Dict[str, Any]:
     """Parse all SE004 Detail Gangguan Excel files in a directory.
     
     Args:
         excel_dir: Directory containing Excel files
         output_dir: Directory to save parsed CSV
+        streaming: Append each file to the combined CSV as it is parsed
+                   instead of concatenating all files in memory first
         
     Returns:
         Dictionary with parsing results
@@ -136,6 +392,9 @@ def parse_all_files(excel_dir: Path, output_dir: Path) -> Dict[str, Any]:
     
     logger.info(f"Found {len(excel_files)} SE004 detail files to parse")
     
+    if streaming:
+        return _stream_all_files(sorted(excel_files), output_dir)
+    
     # Parse all files
     all_dfs = []
     errors = []
@@ -152,8 +411,20 @@ def parse_all_files(excel_dir: Path, output_dir: Path) -> Dict[str, Any]:
     if not all_dfs:
         return {"success": False, "error": "All files failed to parse", "rows": 0}
     
+    # Memory before/after dtype optimization, summed over all files
+    memory = {
+        "before_bytes": sum(df.attrs.get("memory_bytes", {}).get("before", 0) for df in all_dfs),
+        "after_bytes": sum(df.attrs.get("memory_bytes", {}).get("after", 0) for df in all_dfs),
+    }
+    
     # Combine all DataFrames
-    combined_df = pd.concat(all_dfs, ignore_index=True)
+    combined_df = concat_detail_gangguan_frames(all_dfs)
+    memory["combined_bytes"] = memory_usage_bytes(combined_df)
+    logger.info(
+        f"Memory: {memory['before_bytes'] / 1024**2:,.1f} MB untyped -> "
+        f"{memory['after_bytes'] / 1024**2:,.1f} MB typed "
+        f"(combined {memory['combined_bytes'] / 1024**2:,.1f} MB)"
+    )
     
     # Save to CSV
     output_dir.mkdir(parents=True, exist_ok=True)
@@ -162,11 +433,14 @@ def parse_all_files(excel_dir: Path, output_dir: Path) -> Dict[str, Any]:
     period = combined_df['period'].iloc[0] if 'period' in combined_df.columns else 'unknown'
     output_path = output_dir / f"se004_detail_gangguan_{period}_combined.csv"
     
-    combined_df.to_csv(output_path, index=False, encoding='utf-8')
+    # Whole numbers are written as "5", not "5.0", so the CSV matches the streaming output
+    format_whole_numbers(combined_df.drop(columns=DERIVED_COLUMNS, errors='ignore'), NUMERIC_COLUMNS).to_csv(
+        output_path, index=False, encoding='utf-8'
+    )
     logger.info(f"Saved combined CSV: {output_path} ({len(combined_df)} rows)")
     
     # Summary by unit and kelompok
-    summary = combined_df.groupby(['unit_code', 'kelompok']).size().reset_index(name='row_count')
+    summary = combined_df.groupby(['unit_code', 'kelompok'], observed=True).size().reset_index(name='row_count')
     
     return {
         "success": True,
@@ -175,15 +449,18 @@ def parse_all_files(excel_dir: Path, output_dir: Path) -> Dict[str, Any]:
         "total_rows": len(combined_df),
         "output_path": str(output_path),
         "summary": summary.to_dict('records'),
+        "memory": memory,
+        "validation": SE004_DETAIL_GANGGUAN_RULES.validate(combined_df),
         "errors": errors,
     }
 
 
-def parse_run_directory(run_dir: Path) -> Dict[str, Any]:
+def parse_run_directory(run_dir: Path, streaming: bool = False) -> Dict[str, Any]:
     """Parse all Excel files in a run directory.
     
     Args:
         run_dir: Run directory (contains raw/excel and parsed subdirs)
+        streaming: Write the combined CSV incrementally (see parse_all_files)
         
     Returns:
         Parsing results dictionary
@@ -191,7 +468,7 @@ def parse_run_directory(run_dir: Path) -> Dict[str, Any]:
     excel_dir = run_dir / "raw" / "excel"
     output_dir = run_dir / "parsed"
     
-    return parse_all_files(excel_dir, output_dir)
+    return parse_all_files(excel_dir, output_dir, streaming=streaming)
 
 
 if __name__ == "__main__":
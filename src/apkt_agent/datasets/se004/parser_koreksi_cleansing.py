@@ -4,14 +4,19 @@ This parser handles Excel files from the Koreksi Cleansing report.
 The structure may differ from SE004 reports.
 """
 
+import os
 import re
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.io.parsers import TextParser
 
-from ...logging_ import get_logger
+from ...logging_ import annotate_span, get_logger, traced
+from ...output.incremental_writer import IncrementalFrameWriter, format_whole_numbers
 
 
 # Unit code to name mapping for fallback extraction
@@ -95,42 +100,114 @@ def _extract_period_from_filename(filename: str) -> Optional[str]:
     return None
 
 
-def _find_header_row(ws) -> Optional[int]:
-    """Find the header row in the worksheet.
+# Header cell patterns used to detect the table header row
+HEADER_PATTERNS = [
+    "No",
+    "NO",
+    "Nomor",
+    "Unit",
+    "Tanggal",
+    "Kode Gangguan",
+]
+
+# Header row must appear within the first N rows of the sheet
+HEADER_SEARCH_ROWS = 20
+
+
+def _is_header_row(values: List[Any]) -> bool:
+    """Check whether a row of cell values looks like the table header.
     
     Args:
-        ws: openpyxl worksheet
+        values: Converted cell values of a single row
         
     Returns:
-        Row number (1-indexed) of header row, or None if not found
+        True if any cell exactly matches one of HEADER_PATTERNS (case-insensitive)
     """
-    # Look for common header patterns
-    header_patterns = [
-        "No",
-        "NO",
-        "Nomor",
-        "Unit",
-        "Tanggal",
-        "Kode Gangguan",
-    ]
-    
-    for row_idx, row in enumerate(ws.iter_rows(min_row=1, max_row=20), start=1):
-        for cell in row:
-            if cell.value:
-                cell_str = str(cell.value).strip()
-                for pattern in header_patterns:
-                    if pattern.lower() == cell_str.lower():
-                        return row_idx
+    patterns = {pattern.lower() for pattern in HEADER_PATTERNS}
+    for value in values:
+        if value is None or value == "":
+            continue
+        if str(value).strip().lower() in patterns:
+            return True
+    return False
+
+
+def _convert_cell(cell) -> Any:
+    """Convert an openpyxl cell the same way pandas.read_excel does.
     
-    return None
+    Empty cells become "", error cells become NaN and integral numbers
+    become int, so the resulting DataFrame matches pd.read_excel output.
+    
+    Args:
+        cell: openpyxl (read-only) cell
+        
+    Returns:
+        Converted cell value
+    """
+    if cell.value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        val = int(cell.value)
+        if val == cell.value:
+            return val
+        return float(cell.value)
+    return cell.value
+
+
+def _read_sheet_rows(filepath: Path) -> Tuple[List[List[Any]], Optional[int]]:
+    """Read all rows of the active sheet in a single read-only pass.
+    
+    The header row is detected on the fly while rows are streamed, so the
+    workbook is decompressed and parsed only once.
+    
+    Args:
+        filepath: Path to Excel file
+        
+    Returns:
+        Tuple of (rows padded to equal width, 0-indexed header row or None)
+    """
+    wb = load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb.active
+        ws.reset_dimensions()  # Read-only dimensions are often wrong
+        
+        rows: List[List[Any]] = []
+        header_idx: Optional[int] = None
+        last_row_with_data = -1
+        
+        for row_idx, row in enumerate(ws.iter_rows()):
+            values = [_convert_cell(cell) for cell in row]
+            # Trim trailing empty cells
+            while values and values[-1] == "":
+                values.pop()
+            if values:
+                last_row_with_data = row_idx
+            if header_idx is None and row_idx < HEADER_SEARCH_ROWS and _is_header_row(values):
+                header_idx = row_idx
+            rows.append(values)
+    finally:
+        wb.close()
+    
+    # Trim trailing empty rows
+    rows = rows[: last_row_with_data + 1]
+    
+    # Extend rows to max width
+    if rows:
+        max_width = max(len(values) for values in rows)
+        rows = [values + [""] * (max_width - len(values)) for values in rows]
+    
+    return rows, header_idx
 
 
+@traced("parse.file")
 def parse_excel_file(filepath: Path) -> pd.DataFrame:
     """Parse a single Koreksi Cleansing Excel file to DataFrame.
     
     This function uses a flexible approach:
-    1. First tries to find header row
-    2. If not found, reads from row 1
+    1. Streams rows read-only, detecting the header row on the fly
+    2. If not found, uses row 1 as header
     3. Adds metadata columns (unit_induk, period_ym, source_file)
     
     Args:
@@ -147,24 +224,18 @@ def parse_excel_file(filepath: Path) -> pd.DataFrame:
     period_ym = _extract_period_from_filename(filepath.name)
     
     try:
-        # Load workbook to find header row
-        wb = load_workbook(filepath, data_only=True)
-        ws = wb.active
-        
-        # Find header row
-        header_row = _find_header_row(ws)
-        if header_row is None:
-            header_row = 1  # Default to first row
+        # Single read-only pass: detect header row while streaming rows
+        rows, header_idx = _read_sheet_rows(filepath)
+        if header_idx is None:
+            header_idx = 0  # Default to first row
             logger.warning(f"Header row not found, using row 1")
         
-        wb.close()
+        if len(rows) <= header_idx:
+            logger.warning(f"No data in file: {filepath.name}")
+            return pd.DataFrame()
         
-        # Read with pandas, using found header row
-        df = pd.read_excel(
-            filepath,
-            header=header_row - 1,  # pandas uses 0-indexed
-            engine='openpyxl'
-        )
+        # Build DataFrame from the same rows (same type inference as pd.read_excel)
+        df = TextParser(rows, header=header_idx).read()
         
         # Remove empty rows
         df = df.dropna(how='all')
@@ -175,6 +246,8 @@ def parse_excel_file(filepath: Path) -> pd.DataFrame:
         df['source_file'] = filepath.name
         
         logger.info(f"Parsed {len(df)} rows from {filepath.name}")
+        unit_code = re.search(r"_\d{6}_(.+)$", filepath.stem)
+        annotate_span(unit=unit_code.group(1) if unit_code else unit_induk, rows=len(df))
         return df
         
     except Exception as e:
@@ -182,6 +255,7 @@ def parse_excel_file(filepath: Path) -> pd.DataFrame:
         raise
 
 
+@traced("parse")
 def parse_all_excel_files(excel_dir: Path) -> pd.DataFrame:
     """Parse all Excel files in directory and combine into single DataFrame.
     
@@ -221,6 +295,7 @@ def parse_all_excel_files(excel_dir: Path) -> pd.DataFrame:
     return combined
 
 
+@traced("csv_write")
 def save_csv_indonesian_format(df: pd.DataFrame, output_path: Path) -> Path:
     """Save DataFrame to CSV with Indonesian format (semicolon separator).
     
@@ -236,8 +311,9 @@ def save_csv_indonesian_format(df: pd.DataFrame, output_path: Path) -> Path:
     # Ensure output directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Save with semicolon separator (common in Indonesian Excel)
-    df.to_csv(
+    # Save with semicolon separator (common in Indonesian Excel). Whole numbers
+    # are written as "5" even where pd.concat upcast the column to float
+    format_whole_numbers(df).to_csv(
         output_path,
         sep=';',
         index=False,
@@ -246,3 +322,80 @@ def save_csv_indonesian_format(df: pd.DataFrame, output_path: Path) -> Path:
     
     logger.info(f"Saved CSV with Indonesian format to: {output_path}")
     return output_path
+
+
+@traced("parse")
+def stream_all_excel_files(
+    excel_dir: Path,
+    output_path: Path,
+    fmt: str = "csv",
+    on_frame: Optional[Callable[[pd.DataFrame], Any]] = None,
+) -> Dict[str, Any]:
+    """Parse all Excel files and append each one to the combined output as it is parsed.
+    
+    Streaming alternative to parse_all_excel_files + save_csv_indonesian_format.
+    Column order is taken from the first parsed file. Koreksi workbooks have
+    no fixed schema, and pd.concat would keep the union of columns, so a
+    later file with columns the first one lacks raises ParseError instead of
+    silently losing them (parse with output.streaming off in that case).
+    
+    Args:
+        excel_dir: Path to directory containing Excel files
+        output_path: Path of the combined CSV (or Parquet) file
+        fmt: Output format, "csv" or "parquet"
+    
+    Returns:
+        Dict with files, files_parsed, rows and output_path
+    
+    Raises:
+        ParseError: If a file has columns the first parsed file does not have
+                    (output_path is then left untouched)
+    """
+    logger = get_logger()
+    
+    excel_files = list_excel_files(excel_dir)
+    logger.info(f"Found {len(excel_files)} Excel files to parse (streaming)")
+    
+    # Written to a temporary file and moved into place only when every file
+    # was appended, so a ParseError never leaves a half-written combined CSV
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    writer = IncrementalFrameWriter(
+        tmp_path,
+        fmt=fmt,
+        sep=';',
+        encoding='utf-8-sig',
+        formatter=format_whole_numbers if fmt == "csv" else None,
+        strict=True,
+    )
+    
+    files_parsed = 0
+    try:
+        with writer:
+            for filepath in excel_files:
+                try:
+                    df = parse_excel_file(filepath)
+                except Exception as e:
+                    logger.error(f"Skipping {filepath.name}: {e}")
+                    continue
+                
+                if len(df) > 0:
+                    if on_frame is not None:
+                        on_frame(df)
+                    writer.append(df)
+                    files_parsed += 1
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    
+    if files_parsed:
+        os.replace(tmp_path, output_path)
+        logger.info(f"Saved combined output: {output_path}")
+    else:
+        logger.warning("No data parsed from any file")
+    
+    return {
+        "files": len(excel_files),
+        "files_parsed": files_parsed,
+        "rows": writer.rows_written,
+        "output_path": str(output_path) if files_parsed else None,
+    }
@@ -0,0 +1,109 @@
+"""Upload of a run's parsed CSV to the worksheet of its dataset.
+
+The download runners (runner.py) upload right after parsing; the offline
+`apkt-agent upload` command (offline.py) re-uploads existing runs. Both
+find the CSV and the worksheet through the dataset's descriptor.
+"""
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from ..config import Config
+from ..logging_ import get_logger
+from ..workspace import RunContext
+
+if TYPE_CHECKING:
+    from .descriptor import DatasetDescriptor
+
+
+def _descriptor(dataset: str) -> Optional["DatasetDescriptor"]:
+    """Descriptor of a dataset (parse step, parsed CSV name, worksheet), if any."""
+    from .se004.descriptors import get_descriptor
+    
+    return get_descriptor(dataset)
+
+
+def find_parsed_csv(ctx: RunContext) -> Optional[Path]:
+    """Newest parsed CSV of a run (named as the dataset's runner names it)."""
+    descriptor = _descriptor(ctx.dataset)
+    pattern = descriptor.parsed_csv_pattern if descriptor else None
+    if pattern is None or not ctx.parsed_dir.exists():
+        return None
+    candidates = sorted(
+        ctx.parsed_dir.glob(pattern.format(period_ym=ctx.period_ym)),
+        key=lambda path: path.stat().st_mtime,
+    )
+    return candidates[-1] if candidates else None
+
+
+def upload_parsed(ctx: RunContext, config: Config, csv_path: Path, force: bool = False) -> Dict[str, Any]:
+    """Upload a run's parsed CSV to the worksheet of its dataset's descriptor.
+    
+    Args:
+        ctx: Run context
+        config: Configuration object (google_sheets section)
+        csv_path: Parsed CSV
+        force: Upload even if the run's reconciliation drifted and
+            reconciliation.block_upload_on_drift is set
+    
+    Returns:
+        Upload result (success, worksheet_name, row_count[, error])
+    
+    Raises:
+        ValueError: If uploads are disabled, the dataset has no worksheet or
+            the run's totals do not reconcile
+    """
+    gs_config = config.data.get('google_sheets', {})
+    if not gs_config.get('enabled', False):
+        raise ValueError("Google Sheets upload is disabled in config (google_sheets.enabled)")
+    
+    descriptor = _descriptor(ctx.dataset)
+    if descriptor is None or descriptor.sink is None:
+        raise ValueError(f"No upload for dataset '{ctx.dataset}'")
+    sink = descriptor.sink
+    
+    report_path = ctx.run_dir / "validation_report.json"
+    if not force and config.get('reconciliation.block_upload_on_drift', False) and report_path.exists():
+        with open(report_path, "r", encoding="utf-8") as f:
+            drift = json.load(f).get("reconciliation", {}).get("drift_count", 0)
+        if drift:
+            raise ValueError(f"Totals do not reconcile ({drift} checks drifted); use --force to upload anyway")
+    
+    get_logger().info(f"Uploading {Path(csv_path).name} ({ctx.dataset} {ctx.period_ym})")
+    if sink.row_filter is not None:
+        import pandas as pd
+        
+        from ..sinks.sheets import upload_dataframe_to_worksheet
+        
+        df = sink.row_filter(pd.read_csv(csv_path, low_memory=False).fillna(''))
+        upload_result = upload_dataframe_to_worksheet(
+            df=df,
+            spreadsheet_id=gs_config.get('spreadsheet_id'),
+            worksheet_name=sink.worksheet_name(gs_config),
+            credentials_json_path=gs_config.get('credentials_json_path'),
+            mode=gs_config.get('sheets_mode', 'smart'),
+            period_column=sink.period_column,
+            period_value=ctx.period_ym,
+        )
+    else:
+        from ..sinks.sheets import upload_csv_to_worksheet
+        
+        upload_result = upload_csv_to_worksheet(
+            csv_path=csv_path,
+            spreadsheet_id=gs_config['spreadsheet_id'],
+            worksheet_name=sink.worksheet_name(gs_config),
+            credentials_json_path=gs_config['credentials_json_path'],
+            mode=gs_config.get('sheets_mode', 'smart'),
+            period_column=sink.period_column,
+            period_value=ctx.period_ym,
+        )
+    
+    result = {
+        "success": bool(upload_result.get("success", True)),
+        "worksheet_name": upload_result.get("worksheet_name", sink.worksheet_name(gs_config)),
+        "row_count": upload_result.get("row_count", 0),
+    }
+    if not result["success"]:
+        result["error"] = upload_result.get("error", "upload failed")
+    return result
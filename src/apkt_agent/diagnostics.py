@@ -0,0 +1,254 @@
+"""Page captures for failed downloads and logins, within a per-run budget.
+
+Every failed download attempt used to take a PNG screenshot synchronously,
+blocking the page for hundreds of ms, and saved it as
+download_fail_attempt_<N>.png, so each unit overwrote the previous unit's
+captures. A degraded APKT-SS made the run slower still with its own
+diagnostics. Captures now go through DiagnosticsCapture:
+
+- at most `budget` captures per run and `per_job` per export (later
+  attempts of the same export look the same);
+- unique names: logs/diagnostics/<seq>_<export or step>_<attempt>.<ext>;
+- the page only renders the capture; writing the file happens on a
+  background thread;
+- cheaper formats than a PNG screenshot:
+
+    diagnostics:
+      mode: "jpeg"      # png | jpeg | html | trace | off
+      budget: 20
+      per_job: 1
+      jpeg_quality: 60
+
+"html" saves the page's DOM (no rendering at all). "trace" records a
+Playwright trace of the browser context (DOM snapshots, network, console)
+and saves the chunk since the previous capture as a .zip for
+`playwright show-trace`. The trace is stopped when the context is closed;
+after a captured failure the rest of it is saved as <capture>_after.zip.
+"""
+
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .config import Config
+from .logging_ import get_logger
+from .workspace import RunContext
+
+
+# Capture modes
+PNG = "png"
+JPEG = "jpeg"
+HTML = "html"
+TRACE = "trace"
+OFF = "off"
+
+EXTENSIONS = {PNG: ".png", JPEG: ".jpg", HTML: ".html", TRACE: ".zip"}
+
+# A capture never waits longer than this for the page
+CAPTURE_TIMEOUT_MS = 5000
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# One writer thread for every run in the process
+_writer: Optional[ThreadPoolExecutor] = None
+_writer_lock = threading.Lock()
+
+# Trace contexts with a captured failure: id(context) -> path for the rest of the trace
+_trace_tails: Dict[int, Path] = {}
+
+
+def _write_in_background(path: Path, data: bytes) -> None:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diagnostics")
+    _writer.submit(_write, path, data)
+
+
+def _write(path: Path, data: bytes) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    except OSError as e:
+        get_logger().warning(f"Could not write diagnostics {path}: {e}")
+
+
+class DiagnosticsCapture:
+    """Failure captures of one run."""
+    
+    def __init__(
+        self,
+        directory: Path,
+        mode: str = JPEG,
+        budget: int = 20,
+        per_job: int = 1,
+        jpeg_quality: int = 60,
+    ):
+        """Initialize capture.
+        
+        Args:
+            directory: Directory the captures are written to
+            mode: png, jpeg, html, trace or off
+            budget: Captures per run
+            per_job: Captures per export or step label
+            jpeg_quality: JPEG quality (jpeg mode)
+        """
+        self.directory = Path(directory)
+        self.mode = mode if mode in EXTENSIONS else OFF
+        self.budget = budget
+        self.per_job = per_job
+        self.jpeg_quality = jpeg_quality
+        self.taken = 0
+        self.skipped = 0
+        self._per_label: Dict[str, int] = {}
+        self._budget_logged = False
+        self._lock = threading.Lock()
+    
+    def _reserve(self, label: str, attempt: Optional[int]) -> Optional[Path]:
+        """Take a slot of the budget and name the capture (None if over budget)."""
+        label = _UNSAFE.sub("_", label).strip("_") or "page"
+        with self._lock:
+            if self.mode == OFF or self.taken >= self.budget or self._per_label.get(label, 0) >= self.per_job:
+                if self.mode != OFF and self.taken >= self.budget and not self._budget_logged:
+                    get_logger().info(f"Diagnostics budget of {self.budget} captures used up, no more captures this run")
+                    self._budget_logged = True
+                self.skipped += 1
+                return None
+            self.taken += 1
+            self._per_label[label] = self._per_label.get(label, 0) + 1
+            seq = self.taken
+        suffix = f"_{attempt}" if attempt is not None else ""
+        return self.directory / f"{seq:03d}_{label}{suffix}{EXTENSIONS[self.mode]}"
+    
+    def _screenshot_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {"type": self.mode, "timeout": CAPTURE_TIMEOUT_MS}
+        if self.mode == JPEG:
+            options["quality"] = self.jpeg_quality
+        return options
+    
+    def capture(self, page: Any, label: str, attempt: Optional[int] = None) -> Optional[Path]:
+        """Capture the page state after a failure (sync API).
+        
+        Args:
+            page: Playwright page
+            label: Export (target file stem) or step ("auth_fail")
+            attempt: Attempt number, part of the file name
+        
+        Returns:
+            Path the capture is written to, or None if not captured
+        """
+        path = self._reserve(label, attempt)
+        if path is None:
+            return None
+        try:
+            if self.mode == TRACE:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                page.context.tracing.stop_chunk(path=str(path))
+                page.context.tracing.start_chunk()
+                _trace_tails[id(page.context)] = path.with_name(f"{path.stem}_after{path.suffix}")
+            elif self.mode == HTML:
+                _write_in_background(path, page.content().encode("utf-8"))
+            else:
+                _write_in_background(path, page.screenshot(**self._screenshot_options()))
+        except Exception as e:
+            get_logger().warning(f"Failed to capture diagnostics: {e}")
+            return None
+        get_logger().info(f"Diagnostics saved: {path}")
+        return path
+    
+    async def capture_async(self, page: Any, label: str, attempt: Optional[int] = None) -> Optional[Path]:
+        """Async counterpart of capture (async Playwright page)."""
+        path = self._reserve(label, attempt)
+        if path is None:
+            return None
+        try:
+            if self.mode == TRACE:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                await page.context.tracing.stop_chunk(path=str(path))
+                await page.context.tracing.start_chunk()
+                _trace_tails[id(page.context)] = path.with_name(f"{path.stem}_after{path.suffix}")
+            elif self.mode == HTML:
+                _write_in_background(path, (await page.content()).encode("utf-8"))
+            else:
+                _write_in_background(path, await page.screenshot(**self._screenshot_options()))
+        except Exception as e:
+            get_logger().warning(f"Failed to capture diagnostics: {e}")
+            return None
+        get_logger().info(f"Diagnostics saved: {path}")
+        return path
+
+
+_settings: Dict[str, Any] = {}
+_captures: Dict[str, DiagnosticsCapture] = {}
+
+
+def setup_diagnostics(config: Config) -> None:
+    """Read the diagnostics section of the config (defaults apply without it).
+    
+    Args:
+        config: Configuration object
+    """
+    _settings.clear()
+    _settings.update(
+        mode=config.get('diagnostics.mode', JPEG),
+        budget=config.get('diagnostics.budget', 20),
+        per_job=config.get('diagnostics.per_job', 1),
+        jpeg_quality=config.get('diagnostics.jpeg_quality', 60),
+    )
+
+
+def trace_enabled() -> bool:
+    """Whether browser contexts should record a Playwright trace (mode trace)."""
+    return _settings.get('mode') == TRACE
+
+
+def stop_trace(context: Any) -> None:
+    """Stop the trace of a browser context before it is closed (sync API).
+    
+    The trace is only saved when a failure of this context was captured;
+    otherwise nothing after the last capture is worth keeping.
+    
+    Args:
+        context: Playwright browser context
+    """
+    if not trace_enabled():
+        return
+    path = _trace_tails.pop(id(context), None)
+    try:
+        context.tracing.stop(path=str(path) if path else None)
+    except Exception as e:
+        get_logger().warning(f"Failed to stop trace: {e}")
+        return
+    if path:
+        get_logger().info(f"Diagnostics saved: {path}")
+
+
+async def stop_trace_async(context: Any) -> None:
+    """Async counterpart of stop_trace (async browser context)."""
+    if not trace_enabled():
+        return
+    path = _trace_tails.pop(id(context), None)
+    try:
+        await context.tracing.stop(path=str(path) if path else None)
+    except Exception as e:
+        get_logger().warning(f"Failed to stop trace: {e}")
+        return
+    if path:
+        get_logger().info(f"Diagnostics saved: {path}")
+
+
+def get_diagnostics(ctx: RunContext) -> DiagnosticsCapture:
+    """The DiagnosticsCapture of a run (created on first use).
+    
+    Args:
+        ctx: Run context (captures go to logs_dir/diagnostics)
+    
+    Returns:
+        DiagnosticsCapture
+    """
+    capture = _captures.get(ctx.run_id)
+    if capture is None:
+        capture = _captures[ctx.run_id] = DiagnosticsCapture(ctx.logs_dir / "diagnostics", **_settings)
+    return capture
@@ -0,0 +1,312 @@
+"""Skip re-exporting units whose report has not changed since the last run.
+
+Historical months rarely change, yet every run re-exports every unit. With
+freshness enabled, the runners render the report on screen ("Lihat Laporan")
+after setting the filters and hash its summary values (SAIDI/SAIFI totals,
+customer counts, ...). When the hash matches the one recorded for the same
+(dataset, unit, period) and the previously exported workbook still exists, that
+workbook is linked into the new run instead of exporting it again:
+
+    freshness:
+      enabled: true
+      state_path: "./workspace/state/freshness.json"
+      max_age_days: 7
+
+The state file also keeps the content hash and tanggal_cetak of the last
+export, so logs show whether a fresh export actually brought new data.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from .config import Config
+from .logging_ import annotate_span, get_logger, span
+from .workspace import RunContext
+
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+
+# Report button that renders the selected filters on screen (no export)
+VIEW_REPORT_SELECTOR = "button:has-text('Lihat Laporan')"
+
+# Print/extraction date lines change on every render and export
+_PRINT_DATE = re.compile(r"tanggal\s+(cetak|penarikan)", re.IGNORECASE)
+
+
+class FreshnessStore:
+    """Last seen fingerprint and export per (dataset, unit, period), kept as JSON."""
+    
+    def __init__(self, path: Path):
+        """Initialize store.
+        
+        Args:
+            path: State file (created on first save)
+        """
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("entries", {})
+            except (OSError, ValueError) as e:
+                get_logger().warning(f"Ignoring unreadable freshness state {self.path}: {e}")
+    
+    @staticmethod
+    def key(dataset: str, unit: str, period_ym: str) -> str:
+        return f"{dataset}/{unit}/{period_ym}"
+    
+    def get(self, dataset: str, unit: str, period_ym: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(self.key(dataset, unit, period_ym))
+    
+    def update(self, dataset: str, unit: str, period_ym: str, **fields: Any) -> Dict[str, Any]:
+        """Merge fields into an entry and save the store."""
+        entry = self.entries.setdefault(self.key(dataset, unit, period_ym), {})
+        entry.update(fields)
+        self.save()
+        return entry
+    
+    def save(self) -> None:
+        """Write the state file atomically (temp file + rename)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self.entries}, f, indent=2, ensure_ascii=False, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def _digest(lines) -> str:
+    sha = hashlib.sha256()
+    for line in lines:
+        sha.update(line.encode("utf-8"))
+        sha.update(b"\n")
+    return sha.hexdigest()
+
+
+def page_fingerprint(page: "Page", selector: str = "table", timeout_ms: int = 15000) -> Optional[str]:
+    """Hash the report rendered on screen for the current filters.
+    
+    Args:
+        page: Playwright page with the filters already set
+        selector: Elements holding the summary values
+        timeout_ms: Time to wait for the report to render
+    
+    Returns:
+        SHA-256 of the normalized report text (print date lines excluded),
+        or None if no report could be read
+    """
+    logger = get_logger()
+    try:
+        view_button = page.locator(VIEW_REPORT_SELECTOR).first
+        if view_button.count() and view_button.is_visible():
+            view_button.click()
+            page.wait_for_load_state("networkidle")
+        
+        report = page.locator(selector)
+        report.first.wait_for(state="visible", timeout=timeout_ms)
+        text = "\n".join(report.all_inner_texts())
+    except Exception as e:
+        logger.debug(f"Report summary not readable for freshness check: {e}")
+        return None
+    
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    lines = [line for line in lines if line and not _PRINT_DATE.search(line)]
+    return _digest(lines) if lines else None
+
+
+def workbook_fingerprint(path: Path) -> Tuple[str, Optional[str]]:
+    """Hash the cell values of an exported workbook.
+    
+    The xlsx bytes differ on every export (zip timestamps, print date), so
+    the values are hashed instead, skipping the tanggal_cetak line.
+    
+    Args:
+        path: Excel file
+    
+    Returns:
+        Tuple of (content hash, raw tanggal_cetak text or None)
+    """
+    import openpyxl
+    
+    lines = []
+    tanggal_cetak = None
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            lines.append(f"#{ws.title}")
+            for row in ws.iter_rows(values_only=True):
+                cells = ["" if value is None else str(value) for value in row]
+                joined = "\t".join(cells).rstrip()
+                if _PRINT_DATE.search(joined):
+                    tanggal_cetak = tanggal_cetak or joined.split(":", 1)[-1].strip()
+                    continue
+                if joined:
+                    lines.append(joined)
+    finally:
+        wb.close()
+    return _digest(lines), tanggal_cetak
+
+
+class FreshnessGuard:
+    """Per-run helper used by the runners around each unit's export."""
+    
+    def __init__(
+        self,
+        store: Optional[FreshnessStore],
+        ctx: RunContext,
+        max_age_days: Optional[float] = 7,
+        selector: str = "table",
+    ):
+        """Initialize guard.
+        
+        Args:
+            store: Freshness state (None = disabled, every unit is exported)
+            ctx: Run context (dataset, period and excel_dir)
+            max_age_days: Export again after this many days even if unchanged (None = never)
+            selector: Elements holding the report summary values
+        """
+        self.store = store
+        self.ctx = ctx
+        self.max_age_days = max_age_days
+        self.selector = selector
+        self.unchanged = 0
+        self._pending: Dict[str, Optional[str]] = {}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.store is not None
+    
+    def _expired(self, entry: Dict[str, Any]) -> bool:
+        if self.max_age_days is None:
+            return False
+        try:
+            exported_at = datetime.fromisoformat(entry["exported_at"])
+        except (KeyError, TypeError, ValueError):
+            return True
+        return datetime.now() - exported_at > timedelta(days=self.max_age_days)
+    
+    def reuse_if_unchanged(
+        self,
+        page: "Page",
+        unit: str,
+        target_filename: str,
+        kelompok: Optional[str] = None,
+    ) -> Optional[Path]:
+        """Check the rendered report and reuse the last export if it is unchanged.
+        
+        Args:
+            page: Playwright page with the unit/period (and kelompok) filters set
+            unit: Unit code
+            target_filename: File name the export would be saved as
+            kelompok: Kelompok filter, for runners that export per kelompok
+        
+        Returns:
+            Path of the reused workbook in this run's excel_dir, or None if the
+            unit has to be exported
+        """
+        if not self.enabled:
+            return None
+        
+        logger = get_logger()
+        unit = f"{unit}/{kelompok.lower()}" if kelompok else unit
+        with span("freshness.check"):
+            fingerprint = page_fingerprint(page, self.selector)
+            self._pending[unit] = fingerprint
+            entry = self.store.get(self.ctx.dataset, unit, self.ctx.period_ym)
+            
+            if fingerprint is None or not entry or entry.get("fingerprint") != fingerprint:
+                annotate_span(unchanged=False)
+                return None
+            if self._expired(entry):
+                logger.info(f"Freshness: {unit} unchanged but last export is older than {self.max_age_days} days")
+                annotate_span(unchanged=False)
+                return None
+            
+            previous = Path(entry.get("file", ""))
+            if not previous.is_file():
+                logger.info(f"Freshness: {unit} unchanged but {previous} no longer exists")
+                annotate_span(unchanged=False)
+                return None
+            
+            target_path = self.ctx.excel_dir / target_filename
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(previous, target_path)
+            except OSError:
+                shutil.copy2(previous, target_path)
+            
+            self.store.update(self.ctx.dataset, unit, self.ctx.period_ym, checked_at=datetime.now().isoformat(timespec="seconds"))
+            self.unchanged += 1
+            annotate_span(unchanged=True)
+            logger.info(f"Freshness: {unit} unchanged since {entry.get('exported_at')}, reused {previous.name}")
+            return target_path
+    
+    def record(self, unit: str, path: Path, kelompok: Optional[str] = None) -> None:
+        """Remember a fresh export and the fingerprint seen before it.
+        
+        Args:
+            unit: Unit code passed to reuse_if_unchanged
+            path: Downloaded workbook
+            kelompok: Kelompok passed to reuse_if_unchanged
+        """
+        if not self.enabled:
+            return
+        
+        unit = f"{unit}/{kelompok.lower()}" if kelompok else unit
+        
+        logger = get_logger()
+        previous = self.store.get(self.ctx.dataset, unit, self.ctx.period_ym) or {}
+        try:
+            content_hash, tanggal_cetak = workbook_fingerprint(path)
+        except Exception as e:
+            logger.debug(f"Could not fingerprint {path}: {e}")
+            content_hash, tanggal_cetak = None, None
+        
+        now = datetime.now().isoformat(timespec="seconds")
+        if content_hash and content_hash == previous.get("content_hash"):
+            logger.info(f"Freshness: export of {unit} has the same data as {previous.get('exported_at')}")
+            changed_at = previous.get("changed_at", now)
+        else:
+            changed_at = now
+        
+        self.store.update(
+            self.ctx.dataset, unit, self.ctx.period_ym,
+            fingerprint=self._pending.pop(unit, None),
+            content_hash=content_hash,
+            tanggal_cetak=tanggal_cetak,
+            file=str(Path(path).resolve()),
+            bytes=Path(path).stat().st_size,
+            run_id=self.ctx.run_id,
+            exported_at=now,
+            checked_at=now,
+            changed_at=changed_at,
+        )
+
+
+def open_freshness(config: Config, ctx: RunContext) -> FreshnessGuard:
+    """Create the freshness guard of a run from config (disabled unless freshness.enabled).
+    
+    Args:
+        config: Configuration object
+        ctx: Run context
+    
+    Returns:
+        FreshnessGuard (a disabled guard exports every unit)
+    """
+    if not config.get('freshness.enabled', False):
+        return FreshnessGuard(None, ctx)
+    
+    workspace_root = Path(config.get('workspace.root', './workspace'))
+    state_path = config.get('freshness.state_path') or workspace_root / 'state' / 'freshness.json'
+    return FreshnessGuard(
+        FreshnessStore(Path(state_path)),
+        ctx,
+        max_age_days=config.get('freshness.max_age_days', 7),
+        selector=config.get('freshness.summary_selector', 'table'),
+    )
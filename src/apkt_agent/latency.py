@@ -0,0 +1,263 @@
+"""Adaptive waits from the response times recently seen on each report page.
+
+APKT-SS answers an export in a few seconds most of the month, but takes
+far longer around month-end closing. Fixed waits (60 s for a download,
+2/5/10 s between retries, 5-20 s per filter) are too long in the first
+case and too short in the second, where every unit burned its retries on
+timeouts. The latency model keeps, per dataset page and operation
+("download", "filter.unit", ...), an EWMA of the response time and of its
+deviation (as TCP does for its retransmission timeout) plus a window of
+recent samples, and derives from them:
+
+- wait ceilings: max(mean + 4 x deviation, p95) x ceiling_factor, within
+  the operation's bounds;
+- retry backoffs: the mean response time, doubled on every attempt, so a
+  slow server is given time to recover instead of being retried at once.
+
+Timeouts are recorded as samples of the time waited, which pushes the
+ceilings up for the next units. Until an operation has min_samples samples,
+the fixed defaults apply. State survives runs in the workspace:
+
+    latency:
+      enabled: true
+      state_path: "./workspace/state/latency.json"
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Optional, Sequence
+
+from .config import Config
+from .logging_ import get_logger
+
+
+# EWMA gains for the mean and the deviation (RFC 6298)
+ALPHA = 0.125
+BETA = 0.25
+
+# Recent samples kept per operation for percentiles
+WINDOW = 50
+
+# A timed out wait counts as this multiple of the time waited
+TIMEOUT_INFLATION = 1.5
+
+
+class LatencyStats:
+    """Response times of one operation on one report page."""
+    
+    def __init__(self, mean_ms: float = 0.0, dev_ms: float = 0.0, samples: Sequence[float] = (), count: int = 0):
+        self.mean_ms = mean_ms
+        self.dev_ms = dev_ms
+        self.samples: Deque[float] = deque(samples, maxlen=WINDOW)
+        self.count = count
+    
+    def add(self, ms: float) -> None:
+        if self.count == 0:
+            self.mean_ms, self.dev_ms = ms, ms / 2
+        else:
+            self.dev_ms = (1 - BETA) * self.dev_ms + BETA * abs(self.mean_ms - ms)
+            self.mean_ms = (1 - ALPHA) * self.mean_ms + ALPHA * ms
+        self.samples.append(ms)
+        self.count += 1
+    
+    def percentile(self, q: float) -> float:
+        """q-th percentile (0-100) of the recent samples (nearest rank)."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+        return ordered[index]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mean_ms": round(self.mean_ms, 1),
+            "dev_ms": round(self.dev_ms, 1),
+            "p50_ms": round(self.percentile(50), 1),
+            "p95_ms": round(self.percentile(95), 1),
+            "count": self.count,
+            "samples": [round(ms, 1) for ms in self.samples],
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyStats":
+        return cls(
+            mean_ms=float(data.get("mean_ms", 0.0)),
+            dev_ms=float(data.get("dev_ms", 0.0)),
+            samples=[float(ms) for ms in data.get("samples", [])],
+            count=int(data.get("count", 0)),
+        )
+
+
+class LatencyModel:
+    """Response time statistics per (dataset, operation), kept as JSON."""
+    
+    def __init__(
+        self,
+        path: Path,
+        min_samples: int = 3,
+        ceiling_factor: float = 1.5,
+        max_backoff_s: float = 120.0,
+    ):
+        """Initialize model.
+        
+        Args:
+            path: State file (created on first save)
+            min_samples: Samples needed before an operation's defaults are replaced
+            ceiling_factor: Margin applied to the expected worst response time
+            max_backoff_s: Longest wait between retries
+        """
+        self.path = Path(path)
+        self.min_samples = min_samples
+        self.ceiling_factor = ceiling_factor
+        self.max_backoff_s = max_backoff_s
+        self.stats: Dict[str, LatencyStats] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entries = json.load(f).get("operations", {})
+                self.stats = {key: LatencyStats.from_dict(entry) for key, entry in entries.items()}
+            except (OSError, ValueError, TypeError) as e:
+                get_logger().warning(f"Ignoring unreadable latency state {self.path}: {e}")
+    
+    @staticmethod
+    def key(dataset: str, operation: str) -> str:
+        return f"{dataset}/{operation}"
+    
+    def _known(self, dataset: str, operation: str) -> Optional[LatencyStats]:
+        stats = self.stats.get(self.key(dataset, operation))
+        if stats is None or stats.count < self.min_samples:
+            return None
+        return stats
+    
+    def record(self, dataset: str, operation: str, ms: float, timed_out: bool = False, save: bool = False) -> None:
+        """Add a response time.
+        
+        Args:
+            dataset: Dataset (report page) name
+            operation: Operation name ("download", "filter.unit", ...)
+            ms: Response time, or time waited before giving up
+            timed_out: The response did not come within `ms`
+            save: Write the state file afterwards
+        """
+        if timed_out:
+            ms *= TIMEOUT_INFLATION
+        with self._lock:
+            self.stats.setdefault(self.key(dataset, operation), LatencyStats()).add(ms)
+        if save:
+            self.save()
+    
+    def ceiling_ms(self, dataset: str, operation: str, default_ms: float, floor_ms: float, cap_ms: float) -> int:
+        """Time to wait for a response before giving up.
+        
+        Args:
+            dataset: Dataset (report page) name
+            operation: Operation name
+            default_ms: Wait while the operation has too few samples
+            floor_ms: Shortest wait
+            cap_ms: Longest wait
+        
+        Returns:
+            Wait in milliseconds
+        """
+        stats = self._known(dataset, operation)
+        if stats is None:
+            return int(default_ms)
+        expected = max(stats.mean_ms + 4 * stats.dev_ms, stats.percentile(95))
+        return int(min(cap_ms, max(floor_ms, expected * self.ceiling_factor)))
+    
+    def backoff_s(self, dataset: str, operation: str, attempt: int, defaults: Sequence[float]) -> float:
+        """Wait before retry number `attempt` (1 = after the first failure).
+        
+        Args:
+            dataset: Dataset (report page) name
+            operation: Operation name
+            attempt: Failed attempt number
+            defaults: Fixed delays used while the operation has too few samples
+        
+        Returns:
+            Delay in seconds
+        """
+        stats = self._known(dataset, operation)
+        if stats is None:
+            return defaults[min(attempt - 1, len(defaults) - 1)]
+        delay = stats.mean_ms / 1000 * 2 ** (attempt - 1)
+        return min(self.max_backoff_s, max(1.0, delay))
+    
+    def save(self) -> None:
+        """Write the state file atomically (temp file + rename)."""
+        with self._lock:
+            data = {
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+                "operations": {key: stats.to_dict() for key, stats in self.stats.items()},
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            get_logger().warning(f"Could not save latency state {self.path}: {e}")
+
+
+_model: Optional[LatencyModel] = None
+
+
+def setup_latency(config: Config) -> Optional[LatencyModel]:
+    """Enable adaptive waits (latency.enabled, default on).
+    
+    Args:
+        config: Configuration object
+    
+    Returns:
+        The LatencyModel, or None if disabled
+    """
+    global _model
+    if not config.get('latency.enabled', True):
+        _model = None
+        return None
+    workspace_root = Path(config.get('workspace.root', './workspace'))
+    state_path = config.get('latency.state_path') or workspace_root / 'state' / 'latency.json'
+    _model = LatencyModel(
+        Path(state_path),
+        min_samples=config.get('latency.min_samples', 3),
+        ceiling_factor=config.get('latency.ceiling_factor', 1.5),
+        max_backoff_s=config.get('latency.max_backoff_s', 120.0),
+    )
+    return _model
+
+
+def get_latency_model() -> Optional[LatencyModel]:
+    """The LatencyModel set up by setup_latency (None if disabled)."""
+    return _model
+
+
+def wait_ceiling_ms(dataset: str, operation: str, default_ms: float, floor_ms: float, cap_ms: float) -> int:
+    """LatencyModel.ceiling_ms of the set-up model, `default_ms` without one."""
+    if _model is None:
+        return int(default_ms)
+    return _model.ceiling_ms(dataset, operation, default_ms, floor_ms, cap_ms)
+
+
+def retry_backoff_s(dataset: str, operation: str, attempt: int, defaults: Sequence[float]) -> float:
+    """LatencyModel.backoff_s of the set-up model, the fixed delays without one."""
+    if _model is None:
+        return defaults[min(attempt - 1, len(defaults) - 1)]
+    return _model.backoff_s(dataset, operation, attempt, defaults)
+
+
+def record_latency(dataset: str, operation: str, ms: float, timed_out: bool = False, save: bool = False) -> None:
+    """LatencyModel.record on the set-up model (no-op without one)."""
+    if _model is not None:
+        _model.record(dataset, operation, ms, timed_out=timed_out, save=save)
+
+
+def save_latency() -> None:
+    """Write the set-up model's state file (no-op without one)."""
+    if _model is not None:
+        _model.save()
@@ -1,9 +1,17 @@
 """Logging configuration for APKT Agent."""
 
+import contextvars
+import functools
+import inspect
+import json
 import logging
 import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 from .workspace import RunContext
 
@@ -82,6 +90,9 @@ def setup_logger(
             logger.addHandler(file_handler)
         except IOError as e:
             logger.warning(f"Failed to create file handler for {log_file}: {e}")
+        
+        # Stage timings of this run go to logs/trace.jsonl
+        start_trace(ctx)
     
     return logger
 
@@ -96,3 +107,220 @@ def get_logger(name: str = 'apkt_agent') -> logging.Logger:
         Logger instance
     """
     return logging.getLogger(name)
+
+
+# Span attributes inherited by nested spans (e.g. a download inside a unit)
+TRACE_CONTEXT_KEYS = ("unit", "kelompok")
+
+
+class Tracer:
+    """Collects timed spans of a run and appends each one to a JSONL trace.
+    
+    Usage:
+        with span("download", unit="WIL_ACEH"):
+            ...
+        
+        @traced("login")
+        def login_apkt(...):
+            ...
+    """
+    
+    def __init__(self, trace_path: Optional[Path] = None, dataset: Optional[str] = None):
+        """Initialize tracer.
+        
+        Args:
+            trace_path: JSONL file to append finished spans to (None = memory only)
+            dataset: Dataset of the run, passed to span listeners
+        """
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.dataset = dataset
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # Open spans per thread and per asyncio task (tasks copy the context)
+        self._open: contextvars.ContextVar = contextvars.ContextVar(f"spans_{id(self)}", default=())
+        self._started = time.perf_counter()
+    
+    def _stack(self) -> tuple:
+        return self._open.get()
+    
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block of code.
+        
+        Args:
+            name: Stage name (e.g. "login", "filter.unit", "download")
+            **attrs: Extra attributes; unit/kelompok are inherited by nested spans
+        
+        Yields:
+            The span record (attributes may be added while it runs)
+        """
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        record: Dict[str, Any] = {"name": name}
+        if parent is not None:
+            record["parent"] = parent["name"]
+            for key in TRACE_CONTEXT_KEYS:
+                if key in parent and key not in attrs:
+                    record[key] = parent[key]
+        record.update(attrs)
+        record["start"] = datetime.now().isoformat(timespec="milliseconds")
+        
+        self._open.set(stack + (record,))
+        start = time.perf_counter()
+        try:
+            with ExitStack() as hooks:
+                for hook in list(_span_hooks):
+                    wrapper = hook(record)
+                    if wrapper is not None:
+                        hooks.enter_context(wrapper)
+                yield record
+            record.setdefault("status", "ok")
+        except BaseException as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"[:200]
+            raise
+        finally:
+            record["duration_s"] = round(time.perf_counter() - start, 4)
+            self._open.set(stack)
+            self._record(record)
+    
+    def annotate(self, **attrs: Any) -> None:
+        """Add attributes to the innermost open span of this thread/task (no-op outside a span)."""
+        stack = self._stack()
+        if stack:
+            stack[-1].update(attrs)
+    
+    def _record(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(record)
+            if self.trace_path is not None:
+                try:
+                    with open(self.trace_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                except OSError as e:
+                    get_logger().warning(f"Failed to write trace {self.trace_path}: {e}")
+                    self.trace_path = None
+        
+        for listener in list(_span_listeners):
+            try:
+                listener(record, self.dataset)
+            except Exception as e:
+                get_logger().debug(f"Span listener {listener!r} failed: {e}")
+    
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate spans for the run manifest.
+        
+        Returns:
+            Dict with elapsed time, per-stage totals and per-unit(/kelompok) totals.
+            Nested stages are included in their parent's time as well.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        
+        stages: Dict[str, Dict[str, Any]] = {}
+        units: Dict[str, Dict[str, float]] = {}
+        for record in spans:
+            name = record["name"]
+            duration = record["duration_s"]
+            
+            stage = stages.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "errors": 0})
+            stage["count"] += 1
+            stage["total_s"] = round(stage["total_s"] + duration, 4)
+            stage["max_s"] = max(stage["max_s"], duration)
+            if record.get("status") == "error":
+                stage["errors"] += 1
+            
+            if record.get("unit"):
+                key = str(record["unit"])
+                if record.get("kelompok"):
+                    key = f"{key}/{record['kelompok']}"
+                per_unit = units.setdefault(key, {})
+                per_unit[name] = round(per_unit.get(name, 0.0) + duration, 4)
+        
+        return {
+            "elapsed_s": round(time.perf_counter() - self._started, 3),
+            "trace": str(self.trace_path) if self.trace_path else None,
+            "stages": dict(sorted(stages.items(), key=lambda item: -item[1]["total_s"])),
+            "units": units,
+        }
+
+
+_tracer = Tracer()
+
+# Callbacks receiving (span record, dataset) for every finished span, across runs
+_span_listeners: List[Callable[[Dict[str, Any], Optional[str]], None]] = []
+
+# Callbacks receiving a starting span's record; may return a context manager
+# entered around the span body (e.g. a profiler)
+_span_hooks: List[Callable[[Dict[str, Any]], Any]] = []
+
+
+def start_trace(ctx: Optional[RunContext] = None) -> Tracer:
+    """Start a new trace (one per run), written to ctx.logs_dir/trace.jsonl.
+    
+    Args:
+        ctx: RunContext of the run (None = keep spans in memory only)
+        
+    Returns:
+        The new current Tracer
+    """
+    global _tracer
+    if ctx:
+        _tracer = Tracer(ctx.logs_dir / "trace.jsonl", dataset=ctx.dataset)
+    else:
+        _tracer = Tracer()
+    return _tracer
+
+
+def get_tracer() -> Tracer:
+    """Get the tracer of the current run."""
+    return _tracer
+
+
+def span(name: str, **attrs: Any):
+    """Time a block of code on the current run's tracer (see Tracer.span)."""
+    return _tracer.span(name, **attrs)
+
+
+def annotate_span(**attrs: Any) -> None:
+    """Add attributes to the innermost open span (see Tracer.annotate)."""
+    _tracer.annotate(**attrs)
+
+
+def add_span_listener(listener: Callable[[Dict[str, Any], Optional[str]], None]) -> None:
+    """Register a callback for finished spans (e.g. the metrics exporter).
+    
+    Args:
+        listener: Called with (span record, dataset) after each span ends
+    """
+    if listener not in _span_listeners:
+        _span_listeners.append(listener)
+
+
+def add_span_hook(hook: Callable[[Dict[str, Any]], Any]) -> None:
+    """Register a callback wrapping span bodies (e.g. the profiler).
+    
+    Args:
+        hook: Called with the span record when a span starts; returns a
+            context manager to run the span body in, or None
+    """
+    if hook not in _span_hooks:
+        _span_hooks.append(hook)
+
+
+def traced(name: str) -> Callable:
+    """Decorator timing every call of a function (or coroutine) as a span named `name`."""
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with _tracer.span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,398 @@
+"""Prometheus-style metrics for scheduled runs.
+
+Metrics are derived from the tracer's spans (see logging_.Tracer): every
+finished download, freshness.check, parse.file and sheets_upload span
+updates the counters and histograms below, labelled by dataset and unit.
+They can be exposed as a node_exporter textfile-collector file, written
+after each run, and/or a local HTTP endpoint:
+
+    metrics:
+      enabled: true
+      textfile_path: "./workspace/metrics/apkt_agent.prom"
+      http_port: 9108
+
+Only the standard library is used (text exposition format 0.0.4).
+"""
+
+import math
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from .logging_ import add_span_listener, get_logger
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+LABELS = ("dataset", "unit")
+
+# Seconds; downloads and parses take from under a second to a few minutes
+DEFAULT_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base class: a named metric family with a fixed set of label names."""
+    
+    kind = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = LABELS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        unknown = set(labels) - set(self.labelnames)
+        if unknown:
+            raise ValueError(f"Unknown labels for {self.name}: {sorted(unknown)}")
+        return tuple(str(labels.get(name) or "") for name in self.labelnames)
+    
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        """Render the family in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        return "\n".join(lines + self.samples())
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = LABELS):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Increase the counter.
+        
+        Args:
+            amount: Non-negative increment
+            **labels: Label values (missing labels are empty)
+        """
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def value(self, **labels: Any) -> float:
+        """Current value for a label set (0 if never incremented)."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets per label set."""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = LABELS,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+    
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record one observation.
+        
+        Args:
+            value: Observed value (seconds for latency histograms)
+            **labels: Label values (missing labels are empty)
+        """
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+    
+    def count(self, **labels: Any) -> int:
+        """Number of observations for a label set."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+        return int(state[-1]) if state else 0
+    
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            for bound, count in zip(self.buckets, state):
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(count)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(state[-2], 6))}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = LABELS) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = LABELS,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self) -> str:
+        """Render all families in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+DOWNLOADS_ATTEMPTED = REGISTRY.counter(
+    "apkt_downloads_attempted_total", "Excel exports requested (one per download_excel call)."
+)
+DOWNLOADS_SUCCEEDED = REGISTRY.counter(
+    "apkt_downloads_succeeded_total", "Excel exports saved to the run directory."
+)
+DOWNLOADS_FAILED = REGISTRY.counter(
+    "apkt_downloads_failed_total", "Excel exports that failed after all attempts."
+)
+DOWNLOAD_RETRIES = REGISTRY.counter(
+    "apkt_download_retries_total", "Extra download_excel attempts after a failed one."
+)
+NO_DATA_SKIPS = REGISTRY.counter(
+    "apkt_no_data_skips_total", "Exports skipped because APKT reported 'Data tidak ditemukan'."
+)
+UNCHANGED_SKIPS = REGISTRY.counter(
+    "apkt_unchanged_skips_total", "Exports skipped because the on-screen report matched the last export (freshness)."
+)
+DOWNLOADED_BYTES = REGISTRY.counter(
+    "apkt_downloaded_bytes_total", "Size of the downloaded Excel files in bytes."
+)
+DOWNLOAD_SECONDS = REGISTRY.histogram(
+    "apkt_download_seconds", "Time spent in download_excel, including retries."
+)
+ROWS_PARSED = REGISTRY.counter(
+    "apkt_rows_parsed_total", "Rows parsed from downloaded Excel files."
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "apkt_parse_seconds", "Time to parse one downloaded Excel file."
+)
+UPLOAD_SECONDS = REGISTRY.histogram(
+    "apkt_sheets_upload_seconds", "Time to upload one CSV/DataFrame to Google Sheets."
+)
+SHEETS_API_ERRORS = REGISTRY.counter(
+    "apkt_sheets_api_errors_total", "Google Sheets uploads that raised an error."
+)
+
+
+def observe_span(record: Dict[str, Any], dataset: Optional[str]) -> None:
+    """Span listener updating the metrics from a finished span.
+    
+    Args:
+        record: Span record (see Tracer.span)
+        dataset: Dataset of the run the span belongs to
+    """
+    name = record.get("name")
+    labels = {"dataset": dataset, "unit": record.get("unit")}
+    failed = record.get("status") == "error"
+    duration = record.get("duration_s", 0.0)
+    
+    if name == "download":
+        DOWNLOADS_ATTEMPTED.inc(**labels)
+        DOWNLOAD_SECONDS.observe(duration, **labels)
+        DOWNLOAD_RETRIES.inc(max(record.get("attempts", 1) - 1, 0), **labels)
+        if not failed:
+            DOWNLOADS_SUCCEEDED.inc(**labels)
+            DOWNLOADED_BYTES.inc(record.get("bytes", 0), **labels)
+        elif str(record.get("error", "")).startswith("NoDataFoundError"):
+            NO_DATA_SKIPS.inc(**labels)
+        else:
+            DOWNLOADS_FAILED.inc(**labels)
+    
+    elif name == "freshness.check" and record.get("unchanged"):
+        UNCHANGED_SKIPS.inc(**labels)
+    
+    elif name == "parse.file" and not failed:
+        PARSE_SECONDS.observe(duration, **labels)
+        ROWS_PARSED.inc(record.get("rows", 0), **labels)
+    
+    elif name == "sheets_upload":
+        UPLOAD_SECONDS.observe(duration, **labels)
+        if failed:
+            SHEETS_API_ERRORS.inc(**labels)
+
+
+def write_textfile(path: Path, registry: MetricsRegistry = REGISTRY) -> Path:
+    """Write the metrics for node_exporter's textfile collector.
+    
+    The file is written next to the target and renamed into place, so the
+    collector never reads a partial file.
+    
+    Args:
+        path: Target .prom file
+        registry: Registry to render
+    
+    Returns:
+        Path of the written file
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(registry.render(), encoding="utf-8")
+    os.replace(tmp_path, path)
+    return path
+
+
+def start_http_server(port: int, host: str = "127.0.0.1", registry: MetricsRegistry = REGISTRY) -> "ThreadingHTTPServer":
+    """Serve /metrics from a daemon thread.
+    
+    Args:
+        port: Port to listen on (0 = any free port)
+        host: Interface to bind (default: localhost only)
+        registry: Registry to expose
+    
+    Returns:
+        The running server (call shutdown() to stop it)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            get_logger().debug(f"metrics: {format % args}")
+    
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="apkt-metrics", daemon=True).start()
+    get_logger().info(f"Metrics endpoint: http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+class MetricsExporter:
+    """Exports the metrics as configured in the `metrics` config section."""
+    
+    def __init__(self, textfile_path: Optional[Path] = None, http_port: Optional[int] = None, http_host: str = "127.0.0.1"):
+        """Initialize exporter and start collecting.
+        
+        Args:
+            textfile_path: .prom file rewritten by flush() (None = no textfile)
+            http_port: Port of the /metrics endpoint (None = no endpoint)
+            http_host: Interface of the endpoint
+        """
+        self.textfile_path = Path(textfile_path) if textfile_path else None
+        self.server = start_http_server(int(http_port), http_host) if http_port is not None else None
+        add_span_listener(observe_span)
+    
+    def flush(self) -> None:
+        """Write the textfile (call after each run)."""
+        if self.textfile_path is None:
+            return
+        try:
+            write_textfile(self.textfile_path)
+        except OSError as e:
+            get_logger().warning(f"Failed to write metrics textfile {self.textfile_path}: {e}")
+    
+    def close(self) -> None:
+        """Write the final textfile and stop the endpoint."""
+        self.flush()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+_exporter: Optional[MetricsExporter] = None
+
+
+def setup_metrics(config) -> Optional[MetricsExporter]:
+    """Start the metrics exporter if `metrics.enabled` is set.
+    
+    Args:
+        config: Configuration object
+    
+    Returns:
+        MetricsExporter, or None if metrics are disabled
+    """
+    global _exporter
+    if not config.get("metrics.enabled", False) or _exporter is not None:
+        return _exporter
+    
+    textfile_path = config.get("metrics.textfile_path", "./workspace/metrics/apkt_agent.prom")
+    try:
+        _exporter = MetricsExporter(
+            textfile_path=textfile_path,
+            http_port=config.get("metrics.http_port"),
+            http_host=config.get("metrics.http_host", "127.0.0.1"),
+        )
+    except OSError as e:
+        # Port in use: keep the textfile export
+        get_logger().warning(f"Metrics endpoint not started: {e}")
+        _exporter = MetricsExporter(textfile_path=textfile_path)
+    return _exporter
+
+
+def flush_metrics() -> None:
+    """Write the metrics textfile if the exporter is running."""
+    if _exporter is not None:
+        _exporter.flush()
@@ -0,0 +1,137 @@
+"""Offline commands over existing run directories (no browser).
+
+Re-parse downloaded Excel files after a parser fix, or re-upload parsed
+output after a Google Sheets failure, using the RunContext layout that the
+download runners created:
+
+    apkt-agent parse workspace/runs/<run_id> [<run_id> ...] --workers 4
+    apkt-agent upload workspace/runs/<run_id> [...]
+
+Parsing and uploading follow the same steps, file names and worksheet
+settings as the corresponding runner: both come from the dataset's
+descriptor (see datasets/se004/descriptors.py), and the runner calls the
+same parse step (datasets/se004/parse_steps.py) and upload_parsed()
+(datasets/upload.py). Results are recorded in the run's manifest.json
+under "offline".
+"""
+
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .config import Config
+from .datasets.se004.descriptors import get_descriptor
+from .datasets.se004.parse_steps import parse_options
+from .datasets.upload import find_parsed_csv, upload_parsed
+from .logging_ import get_logger, get_tracer, setup_logger
+from .workspace import RunContext, load_run
+
+
+def _record_offline(ctx: RunContext, step: str, result: Dict[str, Any]) -> None:
+    """Add the result of an offline step to manifest.json (keeping existing fields)."""
+    manifest: Dict[str, Any] = {}
+    if ctx.manifest_path.exists():
+        try:
+            with open(ctx.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            manifest = {}
+    
+    manifest.setdefault("offline", {})[step] = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        **result,
+        "timings": get_tracer().summary(),
+    }
+    with open(ctx.manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, default=str)
+
+
+def reparse_run(run_dir: Path, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-parse the downloaded Excel files of one run directory.
+    
+    Runs in a worker process when called from reparse_runs, so it only takes
+    plain arguments and never raises.
+    
+    Args:
+        run_dir: Run directory
+        options: See parse_options()
+    
+    Returns:
+        Dict with run_dir, dataset, success and the parse results or error
+    """
+    result: Dict[str, Any] = {"run_dir": str(run_dir), "success": False}
+    try:
+        ctx = load_run(Path(run_dir))
+        result["dataset"] = ctx.dataset
+        descriptor = get_descriptor(ctx.dataset)
+        parse = descriptor.parse if descriptor else None
+        if parse is None:
+            raise ValueError(f"No offline parser for dataset '{ctx.dataset}'")
+        
+        # Log and trace into the run's own logs dir, like the original run
+        logger = setup_logger(level=options.get("log_level", logging.INFO), ctx=ctx)
+        logger.info(f"Re-parsing {ctx.run_id} ({ctx.dataset} {ctx.period_ym})")
+        
+        result.update(parse(ctx, options))
+        result["success"] = True
+        _record_offline(ctx, "parse", {k: v for k, v in result.items() if k not in ("run_dir", "warnings")})
+    except Exception as e:
+        get_logger().error(f"Re-parse of {run_dir} failed: {e}")
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def reparse_runs(run_dirs: List[Path], config: Config, workers: int = 1) -> List[Dict[str, Any]]:
+    """Re-parse several run directories, in parallel worker processes.
+    
+    Args:
+        run_dirs: Run directories
+        config: Configuration object
+        workers: Number of worker processes (1 = parse in this process)
+    
+    Returns:
+        One result dict per run directory (same order as run_dirs)
+    """
+    options = parse_options(config)
+    options["log_level"] = get_logger().level or logging.INFO
+    
+    if workers <= 1 or len(run_dirs) <= 1:
+        return [reparse_run(run_dir, options) for run_dir in run_dirs]
+    
+    with ProcessPoolExecutor(max_workers=min(workers, len(run_dirs))) as pool:
+        return list(pool.map(reparse_run, run_dirs, [options] * len(run_dirs)))
+
+
+def upload_run(run_dir: Path, config: Config, force: bool = False) -> Dict[str, Any]:
+    """Upload the parsed output of one run directory to Google Sheets.
+    
+    Args:
+        run_dir: Run directory
+        config: Configuration object (google_sheets section)
+        force: Upload even if the run's reconciliation drifted and
+            reconciliation.block_upload_on_drift is set
+    
+    Returns:
+        Dict with run_dir, dataset, success and the upload results or error
+    """
+    result: Dict[str, Any] = {"run_dir": str(run_dir), "success": False}
+    logger = get_logger()
+    try:
+        ctx = load_run(Path(run_dir))
+        result["dataset"] = ctx.dataset
+        setup_logger(level=logger.level or logging.INFO, ctx=ctx)
+        
+        csv_path = find_parsed_csv(ctx)
+        if csv_path is None:
+            raise FileNotFoundError(f"No parsed CSV in {ctx.parsed_dir} (run 'apkt-agent parse' first)")
+        result["parsed_csv_path"] = str(csv_path)
+        
+        result.update(upload_parsed(ctx, config, csv_path, force=force))
+        _record_offline(ctx, "upload", {k: v for k, v in result.items() if k != "run_dir"})
+    except Exception as e:
+        logger.error(f"Upload of {run_dir} failed: {e}")
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
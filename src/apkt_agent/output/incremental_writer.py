@@ -0,0 +1,203 @@
+"""Incremental writer for combined parser output (CSV or Parquet)."""
+
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..errors import ParseError
+from ..logging_ import get_logger, traced
+
+
+# Whole floats up to this magnitude are written as integers (exact in float64)
+_MAX_EXACT_INT = 2 ** 53
+
+
+def _whole(value) -> bool:
+    return isinstance(value, float) and value.is_integer() and abs(value) < _MAX_EXACT_INT
+
+
+def format_whole_numbers(df: pd.DataFrame, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Copy of df whose whole float values are written as integers in a CSV.
+    
+    A numeric column is int in a workbook without blanks and float in one
+    with blanks. pd.concat upcasts the combined column to float ("5.0"),
+    while a streamed frame keeps its own dtype ("5"), so the same column
+    came out differently per file and per mode. Formatting each value on
+    its own (5.0 -> "5", 5.5 -> "5.5", NaN -> "") gives the same CSV in
+    both modes, whatever the other files contain.
+    
+    Args:
+        df: Frame about to be written
+        columns: Columns to format (default: all float and object columns)
+    
+    Returns:
+        Formatted copy (float columns become object columns)
+    """
+    out = df.copy(deep=False)
+    for col in (df.columns if columns is None else columns):
+        if col not in df.columns:
+            continue
+        series = df[col]
+        if pd.api.types.is_float_dtype(series):
+            values = series.to_numpy(dtype="float64")
+            with np.errstate(invalid="ignore"):
+                whole = (np.abs(values) < _MAX_EXACT_INT) & (values == np.floor(values))
+            formatted = values.astype(object)
+            formatted[whole] = values[whole].astype("int64").tolist()
+            out[col] = pd.Series(formatted, index=series.index, dtype=object)
+        elif series.dtype == object:
+            out[col] = series.map(lambda value: int(value) if _whole(value) else value)
+    return out
+
+
+class IncrementalFrameWriter:
+    """Appends DataFrames to a single combined output file as they are parsed.
+    
+    The header (CSV) or schema (Parquet) is written once, from the first frame,
+    and every later frame is reindexed to the same column order. Peak memory
+    stays near the size of one frame instead of all frames plus their concat.
+    
+    Usage:
+        with IncrementalFrameWriter(path, columns=SCHEMA, sep=";") as writer:
+            for file in files:
+                writer.append(parse(file))
+    """
+    
+    FORMATS = ("csv", "parquet")
+    
+    def __init__(
+        self,
+        output_path: Path,
+        columns: Optional[List[str]] = None,
+        fmt: str = "csv",
+        sep: str = ",",
+        encoding: str = "utf-8",
+        formatter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+        strict: bool = False,
+    ):
+        """Initialize writer. The output file is created on the first append.
+        
+        Args:
+            output_path: Path of the combined output file
+            columns: Column order to enforce (default: columns of the first frame)
+            fmt: Output format, "csv" or "parquet"
+            sep: CSV delimiter
+            encoding: CSV encoding (a BOM from "utf-8-sig" is written only once)
+            formatter: Optional function applied to each frame before writing
+            strict: Raise ParseError on columns not in the schema instead of dropping them
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported output format: {fmt}. Expected one of {self.FORMATS}")
+        
+        self.logger = get_logger()
+        self.output_path = Path(output_path)
+        self.columns = list(columns) if columns else None
+        self.fmt = fmt
+        self.sep = sep
+        self.encoding = encoding
+        self.formatter = formatter
+        self.strict = strict
+        
+        self.rows_written = 0
+        self.frames_written = 0
+        self._file = None
+        self._parquet_writer = None
+        self._parquet_schema = None
+    
+    def __enter__(self) -> "IncrementalFrameWriter":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+    
+    def _conform(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Apply formatter and enforce column order."""
+        if self.formatter is not None:
+            df = self.formatter(df)
+        
+        if self.columns is None:
+            self.columns = list(df.columns)
+        else:
+            extra = [col for col in df.columns if col not in self.columns]
+            if extra and self.strict:
+                raise ParseError(
+                    f"Columns {extra} are not in the output schema of {self.output_path.name} "
+                    f"(columns of the first frame: {self.columns})"
+                )
+            if extra:
+                self.logger.warning(f"Dropping columns not in output schema: {extra}")
+        
+        return df.reindex(columns=self.columns)
+    
+    @traced("csv_write")
+    def append(self, df: pd.DataFrame) -> int:
+        """Append one frame to the combined output.
+        
+        Args:
+            df: DataFrame to append
+        
+        Returns:
+            Number of rows written
+        """
+        df = self._conform(df)
+        
+        if self.fmt == "csv":
+            self._append_csv(df)
+        else:
+            self._append_parquet(df)
+        
+        self.rows_written += len(df)
+        self.frames_written += 1
+        return len(df)
+    
+    def _append_csv(self, df: pd.DataFrame) -> None:
+        write_header = self._file is None
+        if write_header:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.output_path, "w", encoding=self.encoding, newline="")
+        
+        df.to_csv(self._file, sep=self.sep, index=False, header=write_header)
+    
+    def _append_parquet(self, df: pd.DataFrame) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                "Parquet output requires pyarrow. Install with: pip install pyarrow"
+            ) from e
+        
+        if self._parquet_writer is None:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._parquet_schema = table.schema
+            self._parquet_writer = pq.ParquetWriter(str(self.output_path), self._parquet_schema)
+        else:
+            table = pa.Table.from_pandas(df, schema=self._parquet_schema, preserve_index=False)
+        
+        # Each appended frame becomes one row group
+        self._parquet_writer.write_table(table)
+    
+    def close(self) -> Path:
+        """Flush and close the output file.
+        
+        Returns:
+            Path to the combined output file
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        
+        if self.frames_written:
+            self.logger.info(
+                f"Combined output written: {self.output_path} "
+                f"({self.rows_written} rows from {self.frames_written} frames)"
+            )
+        
+        return self.output_path
@@ -0,0 +1,227 @@
+"""Opt-in profiling of pipeline stages (apkt-agent --profile).
+
+Stage profiles hook into the tracer's spans (see logging_.add_span_hook), so
+the parse, CSV write and Google Sheets upload stages of a real run are
+profiled without changing any code on the server:
+
+    apkt-agent --profile          # parse / csv_write / sheets_upload stages
+    apkt-agent --profile=run      # each whole menu run instead
+
+Reports are written to the run's logs/profile/ directory:
+
+- cProfile (default): <n>_<stage>.prof (snakeviz, pstats), <n>_<stage>.txt
+  (top functions by cumulative time) and <n>_<stage>.collapsed (sampled
+  stacks for flamegraph.pl / speedscope)
+- pyinstrument (if installed): <n>_<stage>.html
+"""
+
+import io
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .logging_ import add_span_hook, get_logger, get_tracer
+
+
+# Span names profiled in "stages" mode (see @traced in parsers, writers and sinks)
+PROFILED_STAGES = ("parse", "csv_write", "sheets_upload")
+
+PROFILE_MODES = ("stages", "run")
+
+
+class StackSampler:
+    """Samples the call stack of one thread at a fixed interval.
+
+    Produces collapsed stacks ("outer;inner;leaf count" per line), the input
+    format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id: int, interval_s: float = 0.005):
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="apkt-profile-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Render the samples in collapsed-stack format."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class StageProfiler:
+    """Profiles traced stages (or whole runs) and writes reports to the run's logs."""
+
+    def __init__(self, mode: str = "stages", engine: Optional[str] = None):
+        """Initialize profiler.
+
+        Args:
+            mode: "stages" (parse/csv_write/sheets_upload spans) or "run" (whole runs)
+            engine: "cprofile" or "pyinstrument" (default: pyinstrument if installed)
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Invalid profile mode '{mode}'. Expected one of {PROFILE_MODES}")
+        self.mode = mode
+        self.engine = engine or ("pyinstrument" if _has_pyinstrument() else "cprofile")
+        self.reports = []
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def install(self) -> "StageProfiler":
+        """Start profiling stage spans (no-op in "run" mode)."""
+        if self.mode == "stages":
+            add_span_hook(self._span_hook)
+        return self
+
+    def _span_hook(self, record: Dict[str, Any]):
+        if record["name"] not in PROFILED_STAGES:
+            return None
+        return self.profile(record["name"])
+
+    @contextmanager
+    def profile(self, label: str, output_dir: Optional[Path] = None) -> Iterator[None]:
+        """Profile a block and write its reports.
+
+        Nested calls on the same thread (e.g. csv_write inside a streaming
+        parse) are part of the outer profile and are not profiled again.
+
+        Args:
+            label: Report name (stage or run)
+            output_dir: Report directory (default: logs/profile of the current run)
+        """
+        if getattr(self._local, "active", False):
+            yield
+            return
+
+        self._local.active = True
+        start = time.perf_counter()
+        try:
+            if self.engine == "pyinstrument":
+                from pyinstrument import Profiler
+
+                profiler = Profiler()
+                profiler.start()
+                try:
+                    yield
+                finally:
+                    profiler.stop()
+                    self._write(label, output_dir, start, html=profiler.output_html())
+            else:
+                import cProfile
+
+                sampler = StackSampler(threading.get_ident()).start()
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    yield
+                finally:
+                    profiler.disable()
+                    sampler.stop()
+                    self._write(label, output_dir, start, cprofile=profiler, sampler=sampler)
+        finally:
+            self._local.active = False
+
+    def _output_dir(self, output_dir: Optional[Path]) -> Optional[Path]:
+        if output_dir is None:
+            trace_path = get_tracer().trace_path
+            if trace_path is None:
+                return None
+            output_dir = trace_path.parent / "profile"
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        return output_dir
+
+    def _write(self, label: str, output_dir: Optional[Path], start: float, html: Optional[str] = None,
+               cprofile=None, sampler: Optional[StackSampler] = None) -> None:
+        logger = get_logger()
+        elapsed = time.perf_counter() - start
+        try:
+            directory = self._output_dir(output_dir)
+            if directory is None:
+                logger.warning(f"Profile of '{label}' not saved: no run directory")
+                return
+
+            with self._lock:
+                self._counter += 1
+                base = directory / f"{self._counter:02d}_{label}"
+
+            if html is not None:
+                base.with_suffix(".html").write_text(html, encoding="utf-8")
+            if cprofile is not None:
+                import pstats
+
+                cprofile.dump_stats(str(base.with_suffix(".prof")))
+                text = io.StringIO()
+                stats = pstats.Stats(cprofile, stream=text)
+                stats.sort_stats("cumulative").print_stats(40)
+                base.with_suffix(".txt").write_text(text.getvalue(), encoding="utf-8")
+            if sampler is not None:
+                base.with_suffix(".collapsed").write_text(sampler.collapsed(), encoding="utf-8")
+
+            self.reports.append(base)
+            logger.info(f"Profile of '{label}' ({elapsed:.2f}s) saved: {base}.*")
+        except OSError as e:
+            logger.warning(f"Failed to save profile of '{label}': {e}")
+
+
+def _has_pyinstrument() -> bool:
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_profiler: Optional[StageProfiler] = None
+
+
+def enable_profiling(mode: str = "stages", engine: Optional[str] = None) -> StageProfiler:
+    """Enable profiling for the rest of the process.
+
+    Args:
+        mode: "stages" or "run"
+        engine: "cprofile" or "pyinstrument" (default: pyinstrument if installed)
+
+    Returns:
+        The installed StageProfiler
+    """
+    global _profiler
+    _profiler = StageProfiler(mode, engine).install()
+    get_logger().info(f"Profiling enabled (mode={mode}, engine={_profiler.engine})")
+    return _profiler
+
+
+@contextmanager
+def profile_run(label: str = "run") -> Iterator[None]:
+    """Profile a whole run when profiling is enabled in "run" mode (otherwise no-op).
+
+    Reports go to the logs of the last run started inside the block.
+    """
+    if _profiler is None or _profiler.mode != "run":
+        yield
+        return
+    with _profiler.profile(label):
+        yield
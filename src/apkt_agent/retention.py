@@ -0,0 +1,293 @@
+"""Retention and compaction of the workspace/runs directory.
+
+Every run creates a new runs/<run_id> tree (raw Excel, parsed CSV, logs and
+screenshots) and nothing removed them. apply_retention() applies the
+retention policy from config, per dataset and period:
+
+    retention:
+      keep_last: 5              # newest runs kept untouched
+      raw_max_age_days: 30      # older runs lose raw/ (parsed CSV, manifest, logs kept)
+      compress_after_days: 90   # older runs are packed into archive/<dataset>/<run_id>.tar.gz
+      delete_after_days: null   # older runs are removed entirely
+      dedupe: true              # hardlink identical raw workbooks across runs
+
+Run it with `apkt-agent prune [--dry-run]`, or after every run with
+retention.auto: true.
+"""
+
+import hashlib
+import os
+import shutil
+import tarfile
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .blobstore import BlobStore
+from .config import Config
+from .logging_ import get_logger
+from .workspace import _RUN_ID_PATTERN
+
+
+@dataclass
+class RetentionPolicy:
+    """What to keep of old runs (ages in days, None = never)."""
+    
+    keep_last: int = 5
+    raw_max_age_days: Optional[float] = 30
+    compress_after_days: Optional[float] = 90
+    delete_after_days: Optional[float] = None
+    dedupe: bool = True
+    
+    def __post_init__(self):
+        if self.keep_last < 1:
+            raise ValueError(f"retention.keep_last must be at least 1, got {self.keep_last}")
+    
+    @classmethod
+    def from_config(cls, config: Config) -> "RetentionPolicy":
+        # Read the section directly: null is meaningful here ("never")
+        section = config.data.get('retention') or {}
+        defaults = cls()
+        return cls(
+            keep_last=int(section.get('keep_last', defaults.keep_last)),
+            raw_max_age_days=section.get('raw_max_age_days', defaults.raw_max_age_days),
+            compress_after_days=section.get('compress_after_days', defaults.compress_after_days),
+            delete_after_days=section.get('delete_after_days', defaults.delete_after_days),
+            dedupe=bool(section.get('dedupe', defaults.dedupe)),
+        )
+
+
+@dataclass
+class RunInfo:
+    """A run directory as seen by the retention engine."""
+    
+    run_dir: Path
+    dataset: str
+    period_ym: str
+    created_at: datetime
+
+
+@dataclass
+class RetentionReport:
+    """Outcome of one retention pass."""
+    
+    runs: int = 0
+    deduped_files: int = 0
+    actions: List[Dict[str, Any]] = field(default_factory=list)
+    blobs_removed: int = 0
+    bytes_freed: int = 0
+    dry_run: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "deduped_files": self.deduped_files,
+            "actions": self.actions,
+            "blobs_removed": self.blobs_removed,
+            "bytes_freed": self.bytes_freed,
+            "dry_run": self.dry_run,
+        }
+
+
+def list_runs(runs_root: Path) -> List[RunInfo]:
+    """Run directories created by create_run (others are left alone).
+    
+    Args:
+        runs_root: workspace/runs
+    
+    Returns:
+        List of RunInfo, oldest first
+    """
+    runs = []
+    if not runs_root.is_dir():
+        return runs
+    for run_dir in runs_root.iterdir():
+        match = _RUN_ID_PATTERN.match(run_dir.name)
+        if not run_dir.is_dir() or not match:
+            continue
+        try:
+            created_at = datetime.strptime(run_dir.name[:15], "%Y%m%d_%H%M%S")
+        except ValueError:
+            created_at = datetime.fromtimestamp(run_dir.stat().st_mtime)
+        runs.append(RunInfo(run_dir, match.group(2), match.group(3), created_at))
+    return sorted(runs, key=lambda run: run.created_at)
+
+
+def disk_usage(path: Path) -> int:
+    """Bytes freed by removing a tree (files hardlinked elsewhere are not counted)."""
+    if path.is_file():
+        return path.stat().st_size if path.stat().st_nlink == 1 else 0
+    total = 0
+    for file_path in path.rglob("*"):
+        if file_path.is_file() and not file_path.is_symlink():
+            stat = file_path.stat()
+            if stat.st_nlink == 1:
+                total += stat.st_size
+    return total
+
+
+def _sha256(path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def dedupe_raw_files(runs: List[RunInfo], dry_run: bool = False) -> Dict[str, int]:
+    """Replace byte-identical raw workbooks by hardlinks to one copy.
+    
+    Args:
+        runs: Runs to scan (raw/ of each)
+        dry_run: Only count what would be linked
+    
+    Returns:
+        Dict with files (linked) and bytes (saved)
+    """
+    by_size: Dict[int, List[Path]] = {}
+    for run in runs:
+        raw_dir = run.run_dir / "raw"
+        if raw_dir.is_dir():
+            for file_path in raw_dir.rglob("*"):
+                if file_path.is_file() and not file_path.is_symlink():
+                    by_size.setdefault(file_path.stat().st_size, []).append(file_path)
+    
+    linked = 0
+    saved = 0
+    for size, paths in by_size.items():
+        if len(paths) < 2 or size == 0:
+            continue
+        originals: Dict[str, Path] = {}
+        for file_path in paths:
+            try:
+                digest = _sha256(file_path)
+                original = originals.setdefault(digest, file_path)
+                if original == file_path or os.path.samefile(original, file_path):
+                    continue
+            except OSError as e:
+                get_logger().warning(f"Not deduplicating {file_path}: {e}")
+                continue
+            if not dry_run:
+                tmp_path = file_path.with_name(f".{file_path.name}.link")
+                try:
+                    os.link(original, tmp_path)
+                    os.replace(tmp_path, file_path)
+                except OSError as e:
+                    # No hardlinks on this filesystem, too many links, permissions, ...
+                    get_logger().warning(f"Keeping a copy of {file_path} (hardlink failed: {e})")
+                    tmp_path.unlink(missing_ok=True)
+                    continue
+            linked += 1
+            saved += size
+    return {"files": linked, "bytes": saved}
+
+
+def compress_run(run_dir: Path, archive_dir: Path) -> Path:
+    """Pack a run directory into archive_dir/<run_id>.tar.gz and remove it.
+    
+    Args:
+        run_dir: Run directory
+        archive_dir: Directory for the archives
+    
+    Returns:
+        Path of the archive
+    """
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    archive_path = archive_dir / f"{run_dir.name}.tar.gz"
+    tmp_path = archive_path.with_name(f".{archive_path.name}.tmp")
+    with tarfile.open(tmp_path, "w:gz") as tar:
+        tar.add(run_dir, arcname=run_dir.name)
+    os.replace(tmp_path, archive_path)
+    shutil.rmtree(run_dir)
+    return archive_path
+
+
+def apply_retention(
+    workspace_root: Path,
+    policy: RetentionPolicy,
+    dry_run: bool = False,
+    now: Optional[datetime] = None,
+) -> RetentionReport:
+    """Apply a retention policy to workspace_root/runs.
+    
+    The newest policy.keep_last runs of each (dataset, period) are never
+    touched. Older runs are deleted, compressed or stripped of raw/ depending
+    on their age, the most aggressive matching rule winning.
+    
+    Args:
+        workspace_root: Workspace root (contains runs/)
+        policy: Retention policy
+        dry_run: Report what would be done without changing anything
+        now: Reference time for ages (default: now)
+    
+    Returns:
+        RetentionReport
+    """
+    logger = get_logger()
+    now = now or datetime.now()
+    runs = list_runs(workspace_root / "runs")
+    report = RetentionReport(runs=len(runs), dry_run=dry_run)
+    
+    if policy.dedupe:
+        dedupe = dedupe_raw_files(runs, dry_run=dry_run)
+        report.deduped_files = dedupe["files"]
+        report.bytes_freed += dedupe["bytes"]
+    
+    def older_than(run: RunInfo, days: Optional[float]) -> bool:
+        return days is not None and now - run.created_at > timedelta(days=days)
+    
+    groups: Dict[tuple, List[RunInfo]] = {}
+    for run in runs:
+        groups.setdefault((run.dataset, run.period_ym), []).append(run)
+    
+    for (dataset, period_ym), group in sorted(groups.items()):
+        for run in group[:-policy.keep_last]:
+            if older_than(run, policy.delete_after_days):
+                action, target = "delete", run.run_dir
+            elif older_than(run, policy.compress_after_days):
+                action, target = "compress", run.run_dir
+            elif older_than(run, policy.raw_max_age_days) and (run.run_dir / "raw").exists():
+                action, target = "drop_raw", run.run_dir / "raw"
+            else:
+                continue
+            
+            freed = disk_usage(target)
+            try:
+                if not dry_run:
+                    if action == "compress":
+                        archive_path = compress_run(run.run_dir, workspace_root / "archive" / dataset)
+                        freed -= archive_path.stat().st_size
+                    else:
+                        shutil.rmtree(target)
+            except OSError as e:
+                logger.warning(f"Retention: {action} of {run.run_dir.name} failed: {e}")
+                continue
+            
+            report.bytes_freed += max(freed, 0)
+            report.actions.append({"run_id": run.run_dir.name, "action": action, "bytes_freed": max(freed, 0)})
+            prefix = "Retention (dry run): would" if dry_run else "Retention:"
+            logger.info(f"{prefix} {action} {run.run_dir.name} ({freed / 1024 / 1024:.1f} MB)")
+    
+    # Raw files of pruned runs only free disk once their blob is gone too
+    blob_store = BlobStore(workspace_root / "blobs")
+    if blob_store.objects_dir.is_dir():
+        gc = blob_store.gc(dry_run=dry_run)
+        report.blobs_removed = gc["blobs"]
+        report.bytes_freed += gc["bytes"]
+    
+    return report
+
+
+def prune_workspace(config: Config, dry_run: bool = False) -> RetentionReport:
+    """Apply the retention policy from config to the configured workspace.
+    
+    Args:
+        config: Configuration object (workspace.root, retention section)
+        dry_run: Report what would be done without changing anything
+    
+    Returns:
+        RetentionReport
+    """
+    workspace_root = Path(config.get('workspace.root', './workspace'))
+    return apply_retention(workspace_root, RetentionPolicy.from_config(config), dry_run=dry_run)
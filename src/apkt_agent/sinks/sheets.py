@@ -7,7 +7,7 @@ import pandas as pd
 import gspread
 from google.oauth2.service_account import Credentials
 
-from ..logging_ import get_logger
+from ..logging_ import get_logger, traced
 
 # Google Sheets API scopes
 SCOPES = [
@@ -134,6 +134,7 @@ def ensure_worksheet(
     return worksheet
 
 
+@traced("sheets_upload")
 def upload_csv_to_worksheet(
     csv_path: Path,
     spreadsheet_id: str,
@@ -350,6 +351,7 @@ def upload_csv_to_worksheet(
         raise
 
 
+@traced("sheets_upload")
 def upload_dataframe_to_worksheet(
     df: "pd.DataFrame",
     spreadsheet_id: str,
@@ -3,13 +3,43 @@
 from .validate import (
     validate_se004_kumulatif, 
     validate_and_report, 
+    write_validation_report,
     ValidationResult,
     Validator,
 )
+from .reconcile import (
+    ReconciliationResult,
+    reconcile_se004_kumulatif,
+    reconcile_detail_with_se004,
+)
+from .rules import (
+    Rule,
+    NotNull,
+    InRange,
+    Unique,
+    ApproxProduct,
+    Predicate,
+    RuleSet,
+    RuleSetEvaluator,
+    RULE_SETS,
+)
 
 __all__ = [
     "validate_se004_kumulatif",
     "validate_and_report",
+    "write_validation_report",
     "ValidationResult",
     "Validator",
+    "ReconciliationResult",
+    "reconcile_se004_kumulatif",
+    "reconcile_detail_with_se004",
+    "Rule",
+    "NotNull",
+    "InRange",
+    "Unique",
+    "ApproxProduct",
+    "Predicate",
+    "RuleSet",
+    "RuleSetEvaluator",
+    "RULE_SETS",
 ]
@@ -0,0 +1,265 @@
+"""Reconciliation of SE004 totals against their detail rows.
+
+All checks are groupby aggregations over the combined frame, so they run in
+milliseconds and can gate the Google Sheets upload.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..logging_ import get_logger, traced
+
+
+# Additive columns whose detail rows should sum to the TOTAL KESELURUHAN row
+KUMULATIF_ADDITIVE_COLUMNS = [
+    "jml_plg_padam",
+    "jam_x_jml_plg_padam",
+    "saidi_jam",
+    "saifi_kali",
+    "jumlah_gangguan_kali",
+    "kwh_tak_tersalurkan",
+]
+
+# TOTAL KESELURUHAN column -> header metadata column reporting the same figure
+KUMULATIF_HEADER_COLUMNS = {
+    "saidi_jam": "saidi_total",
+    "saifi_kali": "saifi_total",
+}
+
+KUMULATIF_GROUP_COLUMNS = ["unit_induk", "period_ym"]
+
+# Detail gangguan column -> SE004 TOTAL KESELURUHAN column
+DETAIL_TO_SE004_COLUMNS = {
+    "jam_x_pelanggan_padam": "jam_x_jml_plg_padam",
+    "jumlah_pelanggan_padam": "jml_plg_padam",
+}
+
+CHECK_COLUMNS = [
+    "unit_induk",
+    "period_ym",
+    "check",
+    "column",
+    "expected",
+    "actual",
+    "diff",
+    "rel_diff",
+    "drift",
+]
+
+
+class ReconciliationResult:
+    """Outcome of a reconciliation run: one row per (group, check, column)."""
+    
+    def __init__(self, checks: Optional[pd.DataFrame] = None, rel_tol: float = 0.01, abs_tol: float = 0.01):
+        self.checks = checks if checks is not None else pd.DataFrame(columns=CHECK_COLUMNS)
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+    
+    @property
+    def drift_count(self) -> int:
+        """Number of checks outside tolerance."""
+        return int(self.checks["drift"].sum()) if not self.checks.empty else 0
+    
+    @property
+    def has_drift(self) -> bool:
+        """True if any check is outside tolerance."""
+        return self.drift_count > 0
+    
+    def merge(self, other: "ReconciliationResult") -> "ReconciliationResult":
+        """Append the checks of another result (e.g. per-file results of a streamed parse)."""
+        if not other.checks.empty:
+            frames = [df for df in (self.checks, other.checks) if not df.empty]
+            self.checks = pd.concat(frames, ignore_index=True)
+        return self
+    
+    def summary(self) -> List[str]:
+        """Human readable lines, one per drifted check."""
+        drifted = self.checks[self.checks["drift"]] if not self.checks.empty else self.checks
+        return [
+            f"{row.unit_induk} {row.period_ym} {row.check} {row.column}: "
+            f"expected {row.expected:,.4f}, got {row.actual:,.4f} (diff {row.diff:,.4f})"
+            for row in drifted.itertuples(index=False)
+        ]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for manifest / validation report."""
+        drifted = self.checks[self.checks["drift"]] if not self.checks.empty else self.checks
+        records = drifted.replace({np.nan: None}).to_dict("records")
+        return {
+            "rel_tol": self.rel_tol,
+            "abs_tol": self.abs_tol,
+            "checks": len(self.checks),
+            "drift_count": self.drift_count,
+            "drift": records,
+        }
+
+
+def _compare(
+    expected: pd.DataFrame,
+    actual: pd.DataFrame,
+    check: str,
+    rel_tol: float,
+    abs_tol: float,
+) -> pd.DataFrame:
+    """Compare two wide frames indexed by (unit_induk, period_ym) column by column.
+    
+    Returns:
+        Long frame with CHECK_COLUMNS, one row per group and column
+    """
+    if expected.empty or actual.empty:
+        return pd.DataFrame(columns=CHECK_COLUMNS)
+    
+    expected_long = expected.reset_index().melt(
+        id_vars=KUMULATIF_GROUP_COLUMNS, var_name="column", value_name="expected"
+    )
+    actual_long = actual.reset_index().melt(
+        id_vars=KUMULATIF_GROUP_COLUMNS, var_name="column", value_name="actual"
+    )
+    out = expected_long.merge(actual_long, on=KUMULATIF_GROUP_COLUMNS + ["column"], how="inner")
+    out = out.dropna(subset=["expected", "actual"])
+    if out.empty:
+        return pd.DataFrame(columns=CHECK_COLUMNS)
+    
+    out["diff"] = out["actual"] - out["expected"]
+    scale = out["expected"].abs()
+    out["rel_diff"] = (out["diff"].abs() / scale).where(scale > 0)
+    out["drift"] = out["diff"].abs() > np.maximum(abs_tol, rel_tol * scale)
+    out["check"] = check
+    
+    return out[CHECK_COLUMNS]
+
+
+def _total_rows(df: pd.DataFrame) -> pd.Series:
+    """Mask of TOTAL KESELURUHAN rows."""
+    return (
+        df["penyebab_gangguan"].fillna("").astype(str).str.upper()
+        .str.contains("TOTAL KESELURUHAN", regex=False)
+    )
+
+
+@traced("reconcile")
+def reconcile_se004_kumulatif(
+    df: pd.DataFrame,
+    rel_tol: float = 0.01,
+    abs_tol: float = 0.01,
+) -> ReconciliationResult:
+    """Reconcile SE004 totals within a parsed kumulatif/bulanan frame.
+    
+    Per unit_induk and period_ym:
+    1. detail_sum: sum of detail rows vs the TOTAL KESELURUHAN row
+    2. header: TOTAL KESELURUHAN saidi_jam/saifi_kali vs header saidi_total/saifi_total
+    
+    A check drifts when |actual - expected| > max(abs_tol, rel_tol * |expected|).
+    
+    Args:
+        df: Parsed DataFrame (SE004_KUMULATIF_COLUMNS)
+        rel_tol: Relative tolerance
+        abs_tol: Absolute tolerance
+    
+    Returns:
+        ReconciliationResult
+    """
+    result = ReconciliationResult(rel_tol=rel_tol, abs_tol=abs_tol)
+    if df.empty:
+        return result
+    
+    numeric_columns = list(dict.fromkeys(
+        KUMULATIF_ADDITIVE_COLUMNS + list(KUMULATIF_HEADER_COLUMNS.values())
+    ))
+    frame = df[KUMULATIF_GROUP_COLUMNS + ["row_type", "penyebab_gangguan"]].copy()
+    for col in numeric_columns:
+        frame[col] = pd.to_numeric(df[col], errors="coerce")
+    
+    total_mask = _total_rows(frame)
+    if not total_mask.any():
+        return result
+    
+    totals = frame[total_mask].groupby(KUMULATIF_GROUP_COLUMNS, dropna=False).first()
+    detail_sums = (
+        frame[frame["row_type"] == "detail"]
+        .groupby(KUMULATIF_GROUP_COLUMNS, dropna=False)[KUMULATIF_ADDITIVE_COLUMNS]
+        .sum(min_count=1)
+    )
+    
+    header = totals[list(KUMULATIF_HEADER_COLUMNS.values())].rename(
+        columns={v: k for k, v in KUMULATIF_HEADER_COLUMNS.items()}
+    )
+    
+    checks = [
+        _compare(totals[KUMULATIF_ADDITIVE_COLUMNS], detail_sums, "detail_sum", rel_tol, abs_tol),
+        _compare(header, totals[list(KUMULATIF_HEADER_COLUMNS)], "header", rel_tol, abs_tol),
+    ]
+    checks = [check for check in checks if not check.empty]
+    if checks:
+        result.checks = pd.concat(checks, ignore_index=True)
+    
+    if result.has_drift:
+        get_logger().warning(f"Reconciliation: {result.drift_count} of {len(result.checks)} checks drifted")
+    
+    return result
+
+
+@traced("reconcile")
+def reconcile_detail_with_se004(
+    detail_df: pd.DataFrame,
+    se004_df: pd.DataFrame,
+    unit_names: Optional[Dict[str, str]] = None,
+    kelompok: Optional[Iterable[str]] = None,
+    rel_tol: float = 0.05,
+    abs_tol: float = 1.0,
+) -> ReconciliationResult:
+    """Reconcile detail gangguan outages against SE004 TOTAL KESELURUHAN rows.
+    
+    Detail rows are summed per unit and period and compared with the SE004
+    frame of the same month (se004_bulanan; the kumulatif report sums from
+    January, so it only matches a detail frame covering the same months).
+    
+    Args:
+        detail_df: Parsed detail gangguan frame (unit_code, period, ...)
+        se004_df: Parsed SE004 frame (unit_induk, period_ym, ...)
+        unit_names: unit_code -> unit_induk mapping (default: parser UNIT_CODE_TO_NAME)
+        kelompok: Optional kelompok filter for detail rows (e.g. ["distribusi"])
+        rel_tol: Relative tolerance
+        abs_tol: Absolute tolerance
+    
+    Returns:
+        ReconciliationResult with check "detail_vs_se004"
+    """
+    result = ReconciliationResult(rel_tol=rel_tol, abs_tol=abs_tol)
+    if detail_df.empty or se004_df.empty:
+        return result
+    
+    if unit_names is None:
+        from ..datasets.se004.parser import UNIT_CODE_TO_NAME
+        unit_names = UNIT_CODE_TO_NAME
+    
+    detail = detail_df
+    if kelompok is not None:
+        detail = detail[detail["kelompok"].astype(str).isin(list(kelompok))]
+    
+    keys = pd.DataFrame({
+        "unit_induk": detail["unit_code"].astype(str).map(unit_names),
+        "period_ym": detail["period"].astype(str),
+    })
+    values = pd.DataFrame({
+        se004_col: pd.to_numeric(detail[detail_col], errors="coerce")
+        for detail_col, se004_col in DETAIL_TO_SE004_COLUMNS.items()
+    })
+    detail_sums = pd.concat([keys, values], axis=1).groupby(KUMULATIF_GROUP_COLUMNS).sum(min_count=1)
+    
+    se004_columns = list(DETAIL_TO_SE004_COLUMNS.values())
+    totals = se004_df[_total_rows(se004_df)]
+    totals = (
+        totals[KUMULATIF_GROUP_COLUMNS]
+        .assign(**{col: pd.to_numeric(totals[col], errors="coerce") for col in se004_columns})
+        .groupby(KUMULATIF_GROUP_COLUMNS)
+        .first()
+    )
+    
+    checks = _compare(totals, detail_sums, "detail_vs_se004", rel_tol, abs_tol)
+    if not checks.empty:
+        result.checks = checks
+    
+    return result
@@ -0,0 +1,360 @@
+"""Declarative, columnar validation rules for SE004 datasets.
+
+Each rule evaluates a whole DataFrame at once as a boolean mask. A RuleSet
+groups the rules of one dataset and can validate a complete frame or, via
+RuleSetEvaluator, a stream of frames (uniqueness is tracked across frames).
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..logging_ import traced
+from .validate import ValidationResult, _sample_rows
+
+
+class Rule:
+    """Base class for a single validation rule."""
+    
+    def __init__(self, name: str, columns: Sequence[str], severity: str = "warning"):
+        """Initialize rule.
+        
+        Args:
+            name: Rule name used in the report
+            columns: Columns the rule needs (rule is skipped if any is missing)
+            severity: "warning" or "error"
+        """
+        if severity not in ("warning", "error"):
+            raise ValueError(f"Invalid severity: {severity}")
+        self.name = name
+        self.columns = list(columns)
+        self.severity = severity
+    
+    def evaluate(self, df: pd.DataFrame, state: Dict[str, Any]) -> Tuple[pd.Series, pd.Series]:
+        """Evaluate the rule on a frame.
+        
+        Args:
+            df: Frame to check
+            state: Per-rule state kept across frames of the same evaluation
+        
+        Returns:
+            Tuple of (checked mask, failed mask)
+        """
+        raise NotImplementedError
+    
+    def describe(self) -> str:
+        """Human readable description of the rule."""
+        return self.name
+
+
+class NotNull(Rule):
+    """Column must not be null or blank."""
+    
+    def __init__(self, column: str, severity: str = "warning"):
+        super().__init__(f"{column}_not_null", [column], severity)
+        self.column = column
+    
+    def evaluate(self, df, state):
+        values = df[self.column]
+        failed = values.isna() | (values.astype(str).str.strip() == "")
+        return pd.Series(True, index=df.index), failed
+    
+    def describe(self) -> str:
+        return f"{self.column} is not null"
+
+
+class InRange(Rule):
+    """Numeric column must lie within [min_value, max_value] (nulls are not checked)."""
+    
+    def __init__(
+        self,
+        column: str,
+        min_value: Optional[float] = None,
+        max_value: Optional[float] = None,
+        severity: str = "warning",
+    ):
+        super().__init__(f"{column}_in_range", [column], severity)
+        self.column = column
+        self.min_value = min_value
+        self.max_value = max_value
+    
+    def evaluate(self, df, state):
+        values = pd.to_numeric(df[self.column], errors="coerce")
+        checked = values.notna()
+        failed = pd.Series(False, index=df.index)
+        if self.min_value is not None:
+            failed |= values < self.min_value
+        if self.max_value is not None:
+            failed |= values > self.max_value
+        return checked, failed & checked
+    
+    def describe(self) -> str:
+        low = "-inf" if self.min_value is None else self.min_value
+        high = "inf" if self.max_value is None else self.max_value
+        return f"{self.column} in [{low}, {high}]"
+
+
+class Unique(Rule):
+    """Combination of columns must be unique (across all frames of an evaluation)."""
+    
+    def __init__(self, columns: Sequence[str], severity: str = "warning"):
+        super().__init__(f"{'_'.join(columns)}_unique", columns, severity)
+    
+    def evaluate(self, df, state):
+        keys = df[self.columns]
+        checked = keys.notna().all(axis=1)
+        
+        # Duplicates within this frame
+        failed = checked & keys.duplicated(keep="first")
+        
+        # Duplicates of keys seen in earlier frames
+        if len(self.columns) == 1:
+            key_index = pd.Index(keys.iloc[:, 0].astype(object))
+        else:
+            key_index = pd.MultiIndex.from_frame(keys.astype(object))
+        seen = state.get("seen")
+        if seen is not None:
+            failed |= checked & key_index.isin(seen)
+        new_keys = key_index[checked.to_numpy()]
+        state["seen"] = new_keys.unique() if seen is None else seen.append(new_keys).unique()
+        
+        return checked, failed
+    
+    def describe(self) -> str:
+        return f"({', '.join(self.columns)}) is unique"
+
+
+class ApproxProduct(Rule):
+    """Column must approximately equal the product of other columns.
+    
+    A row fails when |target - product| > max(abs_tol, rel_tol * |product|)
+    plus the error introduced by factors that were rounded in the export
+    (`rounded` maps factor -> decimals). Rows where any operand is null are
+    not checked.
+    """
+    
+    def __init__(
+        self,
+        target: str,
+        factors: Sequence[str],
+        rel_tol: float = 0.01,
+        abs_tol: float = 0.0,
+        rounded: Optional[Dict[str, int]] = None,
+        severity: str = "warning",
+    ):
+        super().__init__(f"{target}_matches_product", [target, *factors], severity)
+        self.target = target
+        self.factors = list(factors)
+        self.rel_tol = rel_tol
+        self.abs_tol = abs_tol
+        self.rounded = rounded or {}
+    
+    def evaluate(self, df, state):
+        target = pd.to_numeric(df[self.target], errors="coerce").to_numpy(dtype="float64")
+        values = {
+            factor: pd.to_numeric(df[factor], errors="coerce").to_numpy(dtype="float64")
+            for factor in self.factors
+        }
+        product = np.ones(len(df), dtype="float64")
+        for factor in self.factors:
+            product *= values[factor]
+        
+        checked = ~(np.isnan(target) | np.isnan(product))
+        tolerance = np.maximum(self.abs_tol, self.rel_tol * np.abs(product))
+        
+        # A factor rounded to d decimals is off by up to 0.5 * 10^-d
+        for factor, decimals in self.rounded.items():
+            others = np.ones(len(df), dtype="float64")
+            for other in self.factors:
+                if other != factor:
+                    others *= values[other]
+            tolerance = tolerance + 0.5 * 10.0 ** -decimals * np.abs(others)
+        with np.errstate(invalid="ignore"):
+            failed = checked & (np.abs(target - product) > tolerance)
+        
+        return pd.Series(checked, index=df.index), pd.Series(failed, index=df.index)
+    
+    def describe(self) -> str:
+        rounded = f", rounded={self.rounded}" if self.rounded else ""
+        return f"{self.target} ≈ {' × '.join(self.factors)} (rel_tol={self.rel_tol}, abs_tol={self.abs_tol}{rounded})"
+
+
+class Predicate(Rule):
+    """Escape hatch: rule defined by a vectorized function returning a failed mask."""
+    
+    def __init__(
+        self,
+        name: str,
+        columns: Sequence[str],
+        fn: Callable[[pd.DataFrame], pd.Series],
+        description: str = "",
+        severity: str = "warning",
+    ):
+        super().__init__(name, columns, severity)
+        self.fn = fn
+        self.description = description
+    
+    def evaluate(self, df, state):
+        return pd.Series(True, index=df.index), self.fn(df).fillna(False).astype(bool)
+    
+    def describe(self) -> str:
+        return self.description or self.name
+
+
+class RuleSet:
+    """Named collection of rules for one dataset."""
+    
+    def __init__(self, dataset: str, rules: List[Rule], sample_columns: Optional[List[str]] = None):
+        """Initialize rule set.
+        
+        Args:
+            dataset: Dataset name
+            rules: Rules to evaluate
+            sample_columns: Extra columns included in sample rows (e.g. source_file)
+        """
+        self.dataset = dataset
+        self.rules = rules
+        self.sample_columns = sample_columns or []
+    
+    def evaluator(self) -> "RuleSetEvaluator":
+        """Create an evaluator for incremental (per-frame) validation."""
+        return RuleSetEvaluator(self)
+    
+    def validate(self, df: pd.DataFrame) -> ValidationResult:
+        """Validate a complete frame in one pass.
+        
+        Args:
+            df: DataFrame to validate
+        
+        Returns:
+            ValidationResult with per-rule statistics in result.rules
+        """
+        return self.evaluator().update(df).finish()
+
+
+class RuleSetEvaluator:
+    """Evaluates a RuleSet over one or more frames, accumulating the result."""
+    
+    def __init__(self, rule_set: RuleSet):
+        self.rule_set = rule_set
+        self.result = ValidationResult()
+        self.rows = 0
+        self._states: Dict[str, Dict[str, Any]] = {rule.name: {} for rule in rule_set.rules}
+        self._skipped: Dict[str, List[str]] = {}
+    
+    @traced("validate.rules")
+    def update(self, df: pd.DataFrame) -> "RuleSetEvaluator":
+        """Evaluate all rules on the next frame.
+        
+        Args:
+            df: Frame to check
+        
+        Returns:
+            self (for chaining)
+        """
+        self.rows += len(df)
+        if df.empty:
+            return self
+        
+        for rule in self.rule_set.rules:
+            missing = [col for col in rule.columns if col not in df.columns]
+            if missing:
+                self._skipped[rule.name] = missing
+                continue
+            
+            checked, failed = rule.evaluate(df, self._states[rule.name])
+            samples = _sample_rows(df, failed, self.rule_set.sample_columns + rule.columns)
+            self.result.record_rule(rule.name, int(checked.sum()), int(failed.sum()), samples)
+            
+            stats = self.result.rules[rule.name]
+            stats.setdefault("severity", rule.severity)
+            stats.setdefault("description", rule.describe())
+        
+        return self
+    
+    def finish(self) -> ValidationResult:
+        """Turn accumulated rule statistics into warnings/errors.
+        
+        Returns:
+            ValidationResult
+        """
+        for name, missing in self._skipped.items():
+            if name not in self.result.rules:
+                self.result.rules[name] = {
+                    "checked": 0,
+                    "failed": 0,
+                    "samples": [],
+                    "skipped": f"missing columns: {missing}",
+                }
+        
+        for rule in self.rule_set.rules:
+            stats = self.result.rules.get(rule.name)
+            if not stats or not stats["failed"]:
+                continue
+            message = f"{rule.describe()}: {stats['failed']} of {stats['checked']} rows failed"
+            if rule.severity == "error":
+                self.result.add_error(message)
+            else:
+                self.result.add_warning(message)
+        
+        return self.result
+
+
+# Per-dataset rule sets
+
+SE004_KUMULATIF_RULES = RuleSet(
+    "se004_kumulatif",
+    [
+        NotNull("unit_induk"),
+        NotNull("period_ym"),
+        InRange("jml_plg_padam", min_value=0),
+        InRange("jam_x_jml_plg_padam", min_value=0),
+        InRange("jumlah_gangguan_kali", min_value=0),
+        InRange("lama_padam_jam", min_value=0),
+        InRange("kwh_tak_tersalurkan", min_value=0),
+    ],
+    sample_columns=["source_file"],
+)
+
+SE004_DETAIL_GANGGUAN_RULES = RuleSet(
+    "se004_detail_gangguan",
+    [
+        NotNull("no_laporan"),
+        Unique(["no_laporan"]),
+        InRange("jumlah_pelanggan_padam", min_value=0),
+        InRange("lama_padam_jam", min_value=0),
+        InRange("jam_x_pelanggan_padam", min_value=0),
+        # lama_padam_jam is rounded to 2 decimals in the export; that error is
+        # added to the tolerance, so 1% only absorbs float noise and a wrong
+        # product on a large outage still shows
+        ApproxProduct(
+            "jam_x_pelanggan_padam",
+            ["jumlah_pelanggan_padam", "lama_padam_jam"],
+            rel_tol=0.01,
+            abs_tol=1.0,
+            rounded={"lama_padam_jam": 2},
+        ),
+    ],
+    sample_columns=["source_file"],
+)
+
+KOREKSI_CLEANSING_RULES = RuleSet(
+    "koreksi_cleansing",
+    [
+        NotNull("unit_induk"),
+        Predicate(
+            "period_ym_format",
+            ["period_ym"],
+            lambda df: ~df["period_ym"].astype(str).str.fullmatch(r"\d{6}"),
+            description="period_ym is YYYYMM",
+        ),
+        NotNull("No Laporan"),
+    ],
+    sample_columns=["source_file"],
+)
+
+RULE_SETS: Dict[str, RuleSet] = {
+    rule_set.dataset: rule_set
+    for rule_set in (SE004_KUMULATIF_RULES, SE004_DETAIL_GANGGUAN_RULES, KOREKSI_CLEANSING_RULES)
+}
@@ -1,10 +1,18 @@
 """Data validation utilities."""
 
+import json
+from datetime import datetime
+from pathlib import Path
 from typing import Dict, Any, List, Optional
+import numpy as np
 import pandas as pd
 
 from ..errors import ValidationError
-from ..logging_ import get_logger
+from ..logging_ import get_logger, traced
+
+
+# Maximum number of offending rows kept as samples per rule
+RULE_SAMPLE_SIZE = 5
 
 
 class ValidationResult:
@@ -14,6 +22,8 @@ class ValidationResult:
         self.warnings: List[str] = []
         self.errors: List[str] = []
         self.is_valid: bool = True
+        # Per-rule statistics: {rule: {"checked": int, "failed": int, "samples": [...]}}
+        self.rules: Dict[str, Dict[str, Any]] = {}
     
     def add_warning(self, message: str):
         """Add a warning message."""
@@ -24,6 +34,31 @@ class ValidationResult:
         self.errors.append(message)
         self.is_valid = False
     
+    def record_rule(self, rule: str, checked: int, failed: int, samples: Optional[List[Dict[str, Any]]] = None):
+        """Record the outcome of one rule (accumulates if the rule was already recorded).
+        
+        Args:
+            rule: Rule name
+            checked: Number of rows the rule was evaluated on
+            failed: Number of offending rows
+            samples: Sample offending rows (truncated to RULE_SAMPLE_SIZE)
+        """
+        stats = self.rules.setdefault(rule, {"checked": 0, "failed": 0, "samples": []})
+        stats["checked"] += checked
+        stats["failed"] += failed
+        room = RULE_SAMPLE_SIZE - len(stats["samples"])
+        if samples and room > 0:
+            stats["samples"].extend(samples[:room])
+    
+    def merge(self, other: "ValidationResult") -> "ValidationResult":
+        """Merge another result into this one (e.g. per-file results of a streamed parse)."""
+        self.warnings.extend(other.warnings)
+        self.errors.extend(other.errors)
+        self.is_valid = self.is_valid and other.is_valid
+        for rule, stats in other.rules.items():
+            self.record_rule(rule, stats["checked"], stats["failed"], stats["samples"])
+        return self
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for manifest."""
         return {
@@ -32,9 +67,22 @@ class ValidationResult:
             "errors": self.errors,
             "warning_count": len(self.warnings),
             "error_count": len(self.errors),
+            "rules": self.rules,
         }
 
 
+def _sample_rows(df: pd.DataFrame, mask: pd.Series, columns: List[str]) -> List[Dict[str, Any]]:
+    """Return up to RULE_SAMPLE_SIZE offending rows as JSON-friendly dicts."""
+    columns = [col for col in columns if col in df.columns]
+    sample = df.loc[mask, columns].head(RULE_SAMPLE_SIZE)
+    return [
+        {"row": int(idx) if isinstance(idx, (int, np.integer)) else str(idx),
+         **{col: (None if pd.isna(val) else str(val)) for col, val in row.items()}}
+        for idx, row in sample.iterrows()
+    ]
+
+
+@traced("validate")
 def validate_se004_kumulatif(df: pd.DataFrame) -> ValidationResult:
     """Validate SE004 Kumulatif DataFrame.
     
@@ -44,6 +92,10 @@ def validate_se004_kumulatif(df: pd.DataFrame) -> ValidationResult:
     3. jml_plg_padam should not be negative
     4. kode (if present) should be numeric or convertible to numeric
     
+    All rules are evaluated as boolean masks over the whole frame. Each rule
+    records how many rows it checked, how many failed and a few sample rows
+    in ValidationResult.rules.
+    
     Args:
         df: DataFrame to validate
         
@@ -58,7 +110,9 @@ def validate_se004_kumulatif(df: pd.DataFrame) -> ValidationResult:
         return result
     
     # Rule 1: period_ym consistency
-    unique_periods = df["period_ym"].dropna().unique()
+    periods = df["period_ym"].dropna()
+    unique_periods = periods.unique()
+    result.record_rule("period_consistent", len(periods), max(len(unique_periods) - 1, 0))
     if len(unique_periods) > 1:
         result.add_warning(
             f"Multiple period_ym values found: {list(unique_periods)}. "
@@ -66,43 +120,54 @@ def validate_se004_kumulatif(df: pd.DataFrame) -> ValidationResult:
         )
     
     # Rule 2: Check TOTAL KESELURUHAN row
-    total_mask = df["penyebab_gangguan"].fillna("").str.upper().str.contains("TOTAL KESELURUHAN")
-    total_rows = df[total_mask]
-    if len(total_rows) == 0:
+    total_mask = (
+        df["penyebab_gangguan"].fillna("").astype(str).str.upper()
+        .str.contains("TOTAL KESELURUHAN", regex=False)
+    )
+    total_count = int(total_mask.sum())
+    result.record_rule("total_row_present", len(df), 0 if total_count else 1)
+    if total_count == 0:
         result.add_warning("No 'TOTAL KESELURUHAN' row found in data")
     else:
-        for idx, row in total_rows.iterrows():
-            if pd.isna(row["saidi_jam"]):
+        for column, rule in (("saidi_jam", "total_saidi_not_null"), ("saifi_kali", "total_saifi_not_null")):
+            null_mask = total_mask & df[column].isna()
+            failed = int(null_mask.sum())
+            samples = _sample_rows(df, null_mask, ["source_file", column])
+            result.record_rule(rule, total_count, failed, samples)
+            if failed:
+                files = ", ".join(sorted({s["source_file"] for s in samples if s.get("source_file")}))
                 result.add_warning(
-                    f"TOTAL KESELURUHAN row (source: {row['source_file']}) has null saidi_jam"
-                )
-            if pd.isna(row["saifi_kali"]):
-                result.add_warning(
-                    f"TOTAL KESELURUHAN row (source: {row['source_file']}) has null saifi_kali"
+                    f"{failed} TOTAL KESELURUHAN row(s) have null {column} (e.g. source: {files})"
                 )
     
     # Rule 3: jml_plg_padam not negative
-    negative_mask = df["jml_plg_padam"].fillna(0) < 0
-    negative_rows = df[negative_mask]
-    if len(negative_rows) > 0:
+    negative_mask = pd.to_numeric(df["jml_plg_padam"], errors="coerce").fillna(0) < 0
+    negative_count = int(negative_mask.sum())
+    result.record_rule(
+        "jml_plg_padam_non_negative",
+        len(df),
+        negative_count,
+        _sample_rows(df, negative_mask, ["source_file", "kode", "jml_plg_padam"]),
+    )
+    if negative_count > 0:
         result.add_warning(
-            f"Found {len(negative_rows)} rows with negative jml_plg_padam"
+            f"Found {negative_count} rows with negative jml_plg_padam"
         )
     
     # Rule 4: kode should be numeric (for detail rows)
-    detail_rows = df[df["row_type"] == "detail"]
-    non_numeric_kode_found = False
-    for idx, row in detail_rows.iterrows():
-        kode = row["kode"]
-        if kode is not None and str(kode).strip() != "":
-            try:
-                float(str(kode).replace(" ", ""))
-            except (ValueError, TypeError):
-                if not non_numeric_kode_found:
-                    result.add_warning(
-                        f"Non-numeric kode '{kode}' in file {row['source_file']}"
-                    )
-                    non_numeric_kode_found = True
+    kode = df["kode"]
+    kode_str = kode.astype(str).str.replace(" ", "", regex=False)
+    present_mask = (df["row_type"] == "detail") & kode.notna() & (kode.astype(str).str.strip() != "")
+    non_numeric_mask = present_mask & pd.to_numeric(kode_str.where(present_mask), errors="coerce").isna()
+    non_numeric_count = int(non_numeric_mask.sum())
+    samples = _sample_rows(df, non_numeric_mask, ["source_file", "kode"])
+    result.record_rule("kode_numeric", int(present_mask.sum()), non_numeric_count, samples)
+    if non_numeric_count:
+        first = samples[0]
+        result.add_warning(
+            f"Non-numeric kode '{first['kode']}' in file {first['source_file']}"
+            + (f" ({non_numeric_count} rows in total)" if non_numeric_count > 1 else "")
+        )
     
     # Summary logging
     logger.info(f"Validation complete: {len(result.warnings)} warnings, {len(result.errors)} errors")
@@ -110,6 +175,42 @@ def validate_se004_kumulatif(df: pd.DataFrame) -> ValidationResult:
     return result
 
 
+def write_validation_report(
+    result: ValidationResult,
+    run_dir: Path,
+    dataset: Optional[str] = None,
+    rows: Optional[int] = None,
+    sections: Optional[Dict[str, Any]] = None,
+) -> Path:
+    """Write validation_report.json next to the run manifest.
+    
+    Args:
+        result: Validation result to write
+        run_dir: Run directory (where manifest.json lives)
+        dataset: Optional dataset name recorded in the report
+        rows: Optional number of rows validated
+        sections: Optional extra report sections (e.g. reconciliation)
+        
+    Returns:
+        Path to the report file
+    """
+    report = {
+        "dataset": dataset,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "rows": rows,
+        **result.to_dict(),
+        **(sections or {}),
+    }
+    
+    report_path = Path(run_dir) / "validation_report.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+    
+    get_logger().info(f"Validation report saved: {report_path}")
+    return report_path
+
+
 def validate_and_report(df: pd.DataFrame, run_dir: Optional[str] = None) -> ValidationResult:
     """Validate DataFrame and optionally save report.
     
@@ -123,12 +224,7 @@ def validate_and_report(df: pd.DataFrame, run_dir: Optional[str] = None) -> Vali
     result = validate_se004_kumulatif(df)
     
     if run_dir:
-        import json
-        from pathlib import Path
-        
-        report_path = Path(run_dir) / "validation_report.json"
-        with open(report_path, "w", encoding="utf-8") as f:
-            json.dump(result.to_dict(), f, indent=2)
+        write_validation_report(result, run_dir, dataset="se004_kumulatif", rows=len(df))
     
     return result
 
@@ -2,6 +2,7 @@
 
 import json
 import random
+import re
 import string
 from dataclasses import asdict, dataclass
 from datetime import datetime
@@ -117,3 +118,67 @@ def create_run(
         json.dump(manifest, f, indent=2)
     
     return ctx
+
+
+# run_id layout from create_run: {YYYYMMDD}_{HHMMSS}_{dataset}_{YYYYMM}_{suffix}
+_RUN_ID_PATTERN = re.compile(r"^(\d{8})_\d{6}_(.+)_(\d{6})_([A-Z0-9]{4})$")
+
+
+def load_run(run_dir: Path) -> RunContext:
+    """Rebuild the RunContext of an existing run directory.
+    
+    Dataset and period come from the run_id (directory name) written by
+    create_run, falling back to the run's manifest.json.
+    
+    Args:
+        run_dir: Run directory (workspace/runs/<run_id>)
+        
+    Returns:
+        RunContext pointing at the existing raw/excel, parsed and logs dirs
+        
+    Raises:
+        FileNotFoundError: If run_dir does not exist
+        ValueError: If dataset or period cannot be determined
+    """
+    run_dir = Path(run_dir)
+    if not run_dir.is_dir():
+        raise FileNotFoundError(f"Run directory not found: {run_dir}")
+    
+    manifest_path = run_dir / 'manifest.json'
+    manifest = {}
+    if manifest_path.exists():
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            manifest = {}
+    
+    run_id = run_dir.name
+    match = _RUN_ID_PATTERN.match(run_id)
+    dataset = manifest.get('dataset') or manifest.get('type') or (match.group(2) if match else None)
+    period_ym = manifest.get('period_ym') or manifest.get('period') or (match.group(3) if match else None)
+    snapshot_date = (
+        manifest.get('snapshot_date')
+        or manifest.get('download_date')
+        or (match.group(1) if match else datetime.now().strftime('%Y%m%d'))
+    )
+    
+    if not dataset or not period_ym:
+        raise ValueError(f"Cannot determine dataset/period of run directory: {run_dir}")
+    
+    raw_dir = run_dir / 'raw'
+    logs_dir = run_dir / 'logs'
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    
+    return RunContext(
+        run_id=run_id,
+        dataset=dataset,
+        period_ym=str(period_ym),
+        snapshot_date=str(snapshot_date),
+        run_dir=run_dir,
+        raw_dir=raw_dir,
+        excel_dir=raw_dir / 'excel',
+        parsed_dir=run_dir / 'parsed',
+        logs_dir=logs_dir,
+        manifest_path=manifest_path,
+    )